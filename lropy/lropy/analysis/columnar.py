@@ -0,0 +1,159 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Union, Any, Optional, Iterable
+
+import numpy as np
+import pandas as pd
+
+from lropy.analysis.schema import get_schema_of_columns
+
+# A columnar directory stores every column of a DataFrame as separate .npy file, described by a
+# JSON header. Columns can then be memory-mapped and loaded selectively. Groups of columns can be
+# stored together as one 2D array, so that they are read as equally spaced views of it.
+header_file_name = "columns.json"
+index_file_name = "index.npy"
+
+
+def write_columns(
+    path: Union[Path, str],
+    df: pd.DataFrame,
+    attributes: Optional[dict[str, Any]] = None,
+    groups: Optional[Iterable[list[str]]] = None,
+):
+    """
+    Writes a DataFrame to a columnar directory. The directory is replaced atomically, so readers
+    never see a partially written directory.
+
+    Args:
+        path: directory to write to
+        df: DataFrame with unique column names
+        attributes: JSON-serializable attributes to store in the header
+        groups: lists of columns with the same dtype to store as one array, the matrix variables
+            by default (see rotation.get_rotation_matrices())
+    """
+    if isinstance(path, str):
+        path = Path(path)
+
+    tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+
+    if groups is None:
+        groups = get_schema_of_columns(df.columns).groups_of_kind("matrix").values()
+
+    header = {
+        "columns": [str(column) for column in df.columns],
+        "dtypes": [str(dtype) for dtype in df.dtypes],
+        "index": None,
+        "attributes": attributes or {},
+        "groups": [],
+    }
+
+    grouped = set()
+    for group in groups:
+        if len({df[column].dtype for column in group}) != 1:
+            continue
+        # Rows of the array are the columns, like the 2D blocks of pandas
+        np.save(
+            tmp_path / f"group{len(header['groups'])}.npy",
+            np.stack([df[column].to_numpy() for column in group]),
+        )
+        header["groups"].append([str(column) for column in group])
+        grouped.update(group)
+
+    for i, column in enumerate(df.columns):
+        if column not in grouped:
+            np.save(tmp_path / f"{i}.npy", np.ascontiguousarray(df[column].to_numpy()))
+
+    if not isinstance(df.index, pd.RangeIndex):
+        index = df.index
+        header["index"] = {"name": index.name, "tz": None}
+        if isinstance(index, pd.DatetimeIndex) and index.tz is not None:
+            header["index"]["tz"] = str(index.tz)
+            index = index.tz_convert(None)
+        np.save(tmp_path / index_file_name, index.to_numpy())
+
+    with (tmp_path / header_file_name).open("w") as f:
+        json.dump(header, f)
+
+    if path.exists():
+        shutil.rmtree(path)
+    tmp_path.rename(path)
+
+
+def read_columns(
+    path: Union[Path, str],
+    columns: Optional[Iterable[str]] = None,
+    mmap: bool = True,
+    rows: Optional[slice] = None,
+) -> pd.DataFrame:
+    """
+    Reads a DataFrame from a columnar directory.
+
+    Args:
+        path: directory written by write_columns()
+        columns: names of columns to load, all columns if None
+        mmap: memory-map the column files instead of reading them into memory. Modifications
+            of the arrays are never written back to the files.
+        rows: slice of rows to load, all rows if None
+
+    Returns:
+        DataFrame with the requested columns in the requested order
+    """
+    if isinstance(path, str):
+        path = Path(path)
+
+    header = read_header(path)
+    column_idx = {column: i for i, column in enumerate(header["columns"])}
+    if columns is None:
+        columns = header["columns"]
+
+    if rows is None:
+        rows = slice(None)
+
+    # File and row within the file by column, the row is None for columns stored on their own
+    locations = {column: (f"{i}.npy", None) for column, i in column_idx.items()}
+    for i, group in enumerate(header.get("groups", [])):
+        for row, column in enumerate(group):
+            locations[column] = (f"group{i}.npy", row)
+
+    arrays = {}
+    data = {}
+    for column in columns:
+        file, row = locations[column]
+        if file not in arrays:
+            arrays[file] = _load_array(path / file, mmap)
+        array = arrays[file] if row is None else arrays[file][row]
+        data[column] = array[rows]
+
+    index = None
+    if header["index"] is not None:
+        index = pd.Index(
+            _load_array(path / index_file_name, mmap)[rows], name=header["index"]["name"]
+        )
+        if header["index"]["tz"] is not None:
+            index = index.tz_localize(header["index"]["tz"])
+
+    # copy=False keeps every column as its own block, so the memory maps are not copied and
+    # grouped columns stay views of one array
+    return pd.DataFrame(data, index=index, copy=False)
+
+
+def _load_array(file: Path, mmap: bool) -> np.ndarray:
+    # Copy-on-write mapping, viewed as plain ndarray so pandas does not see the memmap subclass
+    return np.asarray(np.load(file, mmap_mode="c" if mmap else None))
+
+
+def read_header(path: Union[Path, str]) -> dict[str, Any]:
+    if isinstance(path, str):
+        path = Path(path)
+
+    with (path / header_file_name).open() as f:
+        return json.load(f)
+
+
+def read_attributes(path: Union[Path, str]) -> dict[str, Any]:
+    return read_header(path)["attributes"]
@@ -0,0 +1,135 @@
+import os
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from lropy.analysis.spice_tools import (
+    as_et,
+    as_et_array,
+    calculate_eclipses,
+    get_cache_dir,
+    get_cache_key,
+)
+
+# Occultation types, "NONE" outside of all occultations
+occultation_types = ["NONE", "PARTIAL", "ANNULAR", "FULL"]
+
+
+class EclipseIndex:
+    """
+    Occultation intervals sorted by start, which can be queried for the occultation type at many
+    epochs at once. Intervals are computed with calculate_eclipses() and cached on disk.
+    """
+
+    begins: np.ndarray
+    ends: np.ndarray
+    types: np.ndarray
+
+    def __init__(self, begins: np.ndarray, ends: np.ndarray, types: np.ndarray):
+        """
+        Args:
+            begins: start epochs of the intervals
+            ends: end epochs of the intervals
+            types: indices into occultation_types
+        """
+        self.begins = begins
+        self.ends = ends
+        self.types = types
+
+    @classmethod
+    def from_occultations(cls, occultations: list[tuple[float, float, str]]) -> "EclipseIndex":
+        """Creates an index from the output of calculate_eclipses()"""
+        occultations = sorted(occultations)
+        return cls(
+            np.array([o[0] for o in occultations], dtype=float),
+            np.array([o[1] for o in occultations], dtype=float),
+            np.array([occultation_types.index(o[2]) for o in occultations], dtype=np.int8),
+        )
+
+    @classmethod
+    def compute(
+        cls, occulted, occulting, observer, start, stop, n_workers=1, use_cache=True
+    ) -> "EclipseIndex":
+        """
+        Computes the occultation intervals with calculate_eclipses(), or loads them from the cache
+        if they were computed for the same bodies and span before.
+
+        Args:
+            occulted: name of the occulted body, e.g. "Sun"
+            occulting: name of the occulting body
+            observer: name of the observer
+            start: start of the span, as ET or UTC string
+            stop: end of the span, as ET or UTC string
+            n_workers: number of processes to compute the intervals with
+            use_cache: read and write the cache
+
+        Returns:
+            Index of the occultation intervals
+        """
+        if isinstance(start, str):
+            start = as_et(start)
+        if isinstance(stop, str):
+            stop = as_et(stop)
+
+        key = get_cache_key(occulted, occulting, observer, float(start), float(stop))
+        cache_file = get_cache_dir("eclipses") / f"{key}.npz"
+        if use_cache and cache_file.exists():
+            return cls.load(cache_file)
+
+        index = cls.from_occultations(
+            calculate_eclipses(occulted, occulting, observer, start, stop, n_workers=n_workers)
+        )
+
+        if use_cache:
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                index.save(cache_file)
+            except OSError:
+                pass
+
+        return index
+
+    def query(self, t_et) -> pd.Categorical:
+        """
+        Finds the occultation type at every epoch with a binary search of the intervals.
+
+        Args:
+            t_et: ephemeris times
+
+        Returns:
+            Occultation type per epoch, see occultation_types
+        """
+        t_et = np.atleast_1d(np.asarray(t_et, dtype=float))
+
+        # Last interval starting before each epoch, intervals do not overlap
+        i = np.searchsorted(self.begins, t_et, side="right") - 1
+        inside = i >= 0
+        inside[inside] = t_et[inside] <= self.ends[i[inside]]
+
+        codes = np.zeros(len(t_et), dtype=np.int8)
+        codes[inside] = self.types[i[inside]]
+        return pd.Categorical.from_codes(codes, categories=occultation_types)
+
+    def mark(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Occultation type per row of a run DataFrame, at the epochs of its "t_et" column or of its
+        UTC datetime index if it has none (compact mode)
+        """
+        if "t_et" in df.columns:
+            t_et = df["t_et"].to_numpy()
+        else:
+            t_et = as_et_array(df.index)
+        return pd.Series(self.query(t_et), index=df.index, name="occultation")
+
+    def save(self, path: Union[Path, str]):
+        # Written atomically, concurrent writers of the same index use different temporary files
+        tmp_path = Path(path).with_name(f"{Path(path).stem}.tmp-{os.getpid()}.npz")
+        np.savez(tmp_path, begins=self.begins, ends=self.ends, types=self.types)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Union[Path, str]) -> "EclipseIndex":
+        with np.load(path) as data:
+            return cls(data["begins"], data["ends"], data["types"])
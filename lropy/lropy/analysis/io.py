@@ -1,21 +1,36 @@
-import csv
-import json
-import re
+import datetime
+import shutil
+import tempfile
+from collections import OrderedDict
+from collections.abc import Mapping, Iterator, Iterable
+from contextlib import contextmanager
 from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
-from typing import Union, Tuple
+from typing import Union, Tuple, Optional
 
 import numpy as np
 import pandas as pd
-
-# noinspection PyUnresolvedReferences
-import swifter
 from tqdm import tqdm
 
-from lropy.analysis.spice_tools import as_utc
-from lropy.analysis.transform import cart2track
-
-swifter.set_defaults(progress_bar=False)
+from lropy.analysis.columnar import read_columns, write_columns, read_attributes, read_header
+from lropy.analysis.metadata_index import (
+    MetadataIndex,
+    get_result_dirs,
+    load_run_metadata,
+    load_resource_usage,
+    load_walltime_duration,
+)
+from lropy.analysis.schema import (
+    ColumnSchema,
+    get_column_schema,
+    get_schema_of_columns,
+    _get_column_name,
+)
+from lropy.analysis.spice_tools import as_utc_datetime, as_et
+from lropy.analysis.store import ResultsStore, load_stored_simulation_results
+from lropy.analysis.transform import cart2track_batch, dot_rows, norm_rows
+from lropy.constants import lro_period
 
 
 pos_names = ["pos_x", "pos_y", "pos_z"]
@@ -33,85 +48,33 @@ irr_names = ["irr_sun", "irr_moon"]
 panels_count_names = ["panels_vis_moon", "panels_ill_moon", "panels_vis_ill_moon"]
 
 
-def _get_column_names(result_dir: Path):
-    colnames = []
-
-    with (result_dir / "dependent_variable_names.csv").open(newline="") as f:
-        for var in csv.DictReader(f, delimiter=";"):
-            name = _get_column_name(var["ID"])
-            size = int(var["Size"])
-            if size == 1:
-                # Scalar
-                colnames.append(name)
-            else:
-                if size == 3:
-                    # Vector
-                    elements = ["x", "y", "z"]
-                elif size == 9:
-                    # Row-major matrix
-                    elements = ["r11", "r12", "r13", "r21", "r22", "r23", "r31", "r32", "r33"]
-                elif name == "kepler":
-                    elements = ["a", "e", "i", "argPeri", "longAscNode", "trueAnom"]
-                else:
-                    raise Exception(f"Unrecognized variable {name}")
+def _get_column_schema(result_dir: Path) -> ColumnSchema:
+    return get_column_schema(result_dir / "dependent_variable_names.csv")
 
-                colnames.extend([f"{name}_{elem}" for elem in elements])
 
-    return colnames
+def _get_column_names(result_dir: Path) -> list[str]:
+    return list(_get_column_schema(result_dir).columns)
 
 
-def _get_column_name(id: str) -> str:
-    if match := re.fullmatch(r"Relative (position|velocity) of (\S+) w.r.t. (\S+)", id):
-        type, target, observer = match.groups()
+def _select_columns(schema: ColumnSchema, columns: Optional[Iterable[str]]) -> list[str]:
+    """
+    Selects columns by name. Names of vector/matrix variables (e.g. "acc_rp_moon") select all
+    their elements.
+    """
+    if columns is None:
+        return list(schema.columns)
 
-        prefix = type[:3]
-
-        if target in ["LRO", "MPO", "Vehicle"]:
-            return prefix
+    selected = []
+    for column in columns:
+        if column in schema.dtypes:
+            selected.append(column)
+        elif column in schema.groups:
+            selected.extend(schema.groups[column])
         else:
-            return f"{prefix}_{target.lower()}"
-    elif match := re.fullmatch(r"Kepler elements of (\S+) w.r.t. (\S+)", id):
-        return "kepler"
-    elif match := re.fullmatch(r"Altitude of (\S+) w.r.t. (\S+)", id):
-        return "h"
-    elif match := re.fullmatch(r"TNW to inertial frame rotation matrix of (\S+) w.r.t. (\S+)", id):
-        target, central = match.groups()
-        return f"rot_{target}_{central}"
-    elif match := re.fullmatch(
-        r"Spherical position angle (latitude|longitude) angle of (\S+) w.r.t. (\S+)", id
-    ):
-        type, target, observer = match.groups()
-        return f"{type[:3]}_{observer.lower()}"
-    elif match := re.fullmatch(
-        r"Single acceleration in inertial frame of type (.+), acting on (\S+), exerted by (\S+)",
-        id,
-    ):
-        type, target, exerter = match.groups()
-        if "gravity" in type:
-            return f"acc_grav_{exerter.lower()}"
-        elif "radiation pressure" in type:
-            return f"acc_rp_{exerter.lower()}"
-    elif match := re.fullmatch(r"Received irradiance at (\S+) due to (\S+)", id):
-        target, source = match.groups()
-        return f"irr_{source.lower()}"
-    elif match := re.fullmatch(r"Received fraction of irradiance at (\S+) due to (\S+)", id):
-        target, source = match.groups()
-        return f"occ_{source.lower()}"
-    elif match := re.fullmatch(r"Number of (.+) source panels of (\S+) as seen from (\S+)", id):
-        type, source, target = match.groups()
-        if type == "visible":
-            return f"panels_vis_{source.lower()}"
-        elif type == "illuminated":
-            return f"panels_ill_{source.lower()}"
-        elif type == "visible and illuminated":
-            return f"panels_vis_ill_{source.lower()}"
-        elif type == "visible and emitting":
-            return f"panels_vis_emi_{source.lower()}"
-    elif match := re.fullmatch(r"Visible area of (\S+) as seen from (\S+)", id):
-        source, target = match.groups()
-        return f"area_vis_{source.lower()}"
-
-    raise Exception(f'Unknown variable id "{id}"')
+            raise KeyError(f'Unknown column "{column}"')
+
+    # Remove duplicates, but keep order
+    return list(dict.fromkeys(selected))
 
 
 def _get_number_of_columns(dependent_variable_history_file: str):
@@ -120,100 +83,457 @@ def _get_number_of_columns(dependent_variable_history_file: str):
     return first_line.count(",") + 1
 
 
-def load_simulation_results(result_dir: Union[Path, str], do_tf=False):
+def load_simulation_results(
+    result_dir: Union[Path, str],
+    do_tf=False,
+    use_cache=True,
+    columns: Optional[Iterable[str]] = None,
+    start=None,
+    end=None,
+    revolutions: Optional[tuple[float, float]] = None,
+    compact=False,
+    float32_derived=False,
+):
+    """
+    Loads the dependent variable history of a single run.
+
+    Args:
+        result_dir: directory of the run
+        do_tf: add magnitudes, RSW components of RP accelerations and the subsolar angle
+        use_cache: use and create the columnar cache of the dependent variable history. The cache
+            is only created by loads of all columns and epochs.
+        columns: names of columns to load, all columns if None. Vector and matrix variables can be
+            selected by their name without element suffix (e.g. "acc_rp_moon").
+        start: only load epochs from this time on, as ET or UTC string/datetime
+        end: only load epochs up to this time, as ET or UTC string/datetime
+        revolutions: only load the given number of revolutions after the given revolution,
+            counted from the first epoch, as tuple (start_rev, n_rev)
+        compact: save memory by storing panel counts as integers and dropping the "t_et" column
+        float32_derived: store the columns added by do_tf as float32
+
+    Returns:
+        DataFrame with UTC datetime index and "t_et" column (unless compact)
+    """
     if isinstance(result_dir, str):
         result_dir = Path(result_dir)
 
-    dependent_variable_history_file = result_dir / "dependent_variable_history.csv"
-    colnames = _get_column_names(result_dir)
-    # Add 1 because of time index
-    assert len(colnames) + 1 == _get_number_of_columns(dependent_variable_history_file)
+    df = _load_dependent_variable_history(
+        result_dir, use_cache, columns, _as_et_bound(start), _as_et_bound(end), revolutions
+    )
+    df.index = as_utc_datetime(df["t_et"]).rename("t")
+
+    return _transform_df(df, do_tf, compact, float32_derived)
+
+
+def iter_simulation_results(
+    result_dir: Union[Path, str],
+    chunk_size=100000,
+    do_tf=False,
+    use_cache=True,
+    columns: Optional[Iterable[str]] = None,
+    start=None,
+    end=None,
+    revolutions: Optional[tuple[float, float]] = None,
+    compact=False,
+    float32_derived=False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Loads the dependent variable history of a single run as time-ordered chunks of rows, so that
+    runs larger than memory can be reduced chunk by chunk. The arguments are the same as for
+    load_simulation_results(). The columnar cache is only used if it already exists, since
+    creating it requires the whole table.
+
+    Args:
+        result_dir: directory of the run
+        chunk_size: number of rows per chunk
+
+    Returns:
+        Generator of DataFrames like those returned by load_simulation_results()
+    """
+    if isinstance(result_dir, str):
+        result_dir = Path(result_dir)
+
+    for df in _iter_dependent_variable_history(
+        result_dir,
+        chunk_size,
+        use_cache,
+        columns,
+        _as_et_bound(start),
+        _as_et_bound(end),
+        revolutions,
+    ):
+        df.index = as_utc_datetime(df["t_et"]).rename("t")
+
+        yield _transform_df(df, do_tf, compact, float32_derived)
 
-    df = pd.read_csv(dependent_variable_history_file, names=colnames)
-    df["t_et"] = df.index
-    df.index = pd.to_datetime(df["t_et"].swifter.apply(lambda t: as_utc(t, sec_prec=6))).rename("t")
+
+def _transform_df(df: pd.DataFrame, do_tf: bool, compact: bool, float32_derived: bool):
+    loaded_columns = df.columns
 
     if do_tf:
         df = _enhance_df(df)
 
+    if float32_derived:
+        derived_columns = df.columns.difference(loaded_columns)
+        df[derived_columns] = df[derived_columns].astype(np.float32)
+
+    if compact:
+        # Panel counts are small integers, position/velocity and other variables stay float64
+        count_columns = get_schema_of_columns(df.columns).count_columns
+        df[count_columns] = df[count_columns].astype(np.int32)
+
+        # The datetime index already represents the time
+        df = df.drop(columns="t_et")
+
     return df
 
 
-def _enhance_df(df: pd.DataFrame):
-    def tf(row):
-        pos = row[pos_names].to_numpy()
-        vel = row[vel_names].to_numpy()
-        pos_sun = row[["pos_sun_x", "pos_sun_y", "pos_sun_z"]].to_numpy()
+def _iter_dependent_variable_history(
+    result_dir: Path,
+    chunk_size: int,
+    use_cache: bool,
+    columns: Optional[Iterable[str]],
+    start: Optional[float],
+    end: Optional[float],
+    revolutions: Optional[tuple[float, float]],
+) -> Iterator[pd.DataFrame]:
+    dependent_variable_history_file = result_dir / "dependent_variable_history.csv"
+    cache_dir = result_dir / "dependent_variable_history.cache"
+    fingerprint = _get_file_fingerprint(
+        dependent_variable_history_file, result_dir / "dependent_variable_names.csv"
+    )
 
-        # Find RP accelerations in RSW frame
-        for source in ["sun", "moon", "mercury", "earth"]:
-            if f"acc_rp_{source}_x" not in row.index:
-                continue
+    if use_cache and _is_cache_valid(cache_dir, fingerprint):
+        selected, rows = _get_cached_selection(cache_dir, columns, start, end, revolutions)
+        for chunk_start in range(rows.start, rows.stop, chunk_size):
+            chunk_rows = slice(chunk_start, min(chunk_start + chunk_size, rows.stop))
+            yield read_columns(cache_dir, selected, rows=chunk_rows)
+        return
 
-            acc = row[[f"acc_rp_{source}_x", f"acc_rp_{source}_y", f"acc_rp_{source}_z"]].to_numpy()
-            (
-                row[f"acc_rp_{source}_radial"],
-                row[f"acc_rp_{source}_along"],
-                row[f"acc_rp_{source}_cross"],
-            ) = cart2track(acc, vel, pos)
+    schema = _get_column_schema(result_dir)
+    colnames = schema.columns
+    # Add 1 because of time index
+    assert len(colnames) + 1 == _get_number_of_columns(dependent_variable_history_file)
+
+    start, end = _get_time_bounds(
+        _get_first_epoch(dependent_variable_history_file), start, end, revolutions
+    )
+    for chunk in _iter_csv_chunks(
+        dependent_variable_history_file,
+        colnames,
+        _select_columns(schema, columns),
+        start,
+        end,
+        chunk_size,
+    ):
+        yield _stack_matrix_columns(chunk)
+
+
+def _as_et_bound(time) -> Optional[float]:
+    if time is None or isinstance(time, (int, float, np.number)):
+        return time
+    if isinstance(time, np.datetime64):
+        time = pd.Timestamp(time)
+    if isinstance(time, datetime.datetime):
+        # Naive datetimes are in UTC, like in trim_df()
+        if time.tzinfo is not None:
+            time = time.astimezone(datetime.timezone.utc)
+        time = time.strftime("%Y-%m-%d %H:%M:%S.%f UTC")
+    return as_et(time)
+
+
+def _load_dependent_variable_history(
+    result_dir: Path,
+    use_cache: bool,
+    columns: Optional[Iterable[str]] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    revolutions: Optional[tuple[float, float]] = None,
+) -> pd.DataFrame:
+    """
+    Loads the dependent variable history with a "t_et" column. The parsed CSV is cached in a
+    columnar sidecar directory, which is memory-mapped on later loads as long as the CSV and
+    names files are unchanged. Column and time selections are applied while reading. The cache
+    always contains the full table, so it is only created by loads without selection. Selective
+    loads without valid cache parse only the selected part of the CSV.
+    """
+    dependent_variable_history_file = result_dir / "dependent_variable_history.csv"
+    cache_dir = result_dir / "dependent_variable_history.cache"
+    fingerprint = _get_file_fingerprint(
+        dependent_variable_history_file, result_dir / "dependent_variable_names.csv"
+    )
+
+    if use_cache and _is_cache_valid(cache_dir, fingerprint):
+        return _read_cached_history(cache_dir, columns, start, end, revolutions)
+
+    schema = _get_column_schema(result_dir)
+    colnames = schema.columns
+    # Add 1 because of time index
+    assert len(colnames) + 1 == _get_number_of_columns(dependent_variable_history_file)
+
+    if use_cache and columns is None and start is None and end is None and revolutions is None:
+        df = pd.read_csv(dependent_variable_history_file, names=colnames, dtype=schema.dtypes)
+        df["t_et"] = df.index
+        df.reset_index(drop=True, inplace=True)
+        df = _stack_matrix_columns(df)
 
-        # Find subsolar angle
-        pos_unit = pos / np.linalg.norm(pos)
-        pos_sun_unit = pos_sun / np.linalg.norm(pos_sun)
-        row["angle_subsolar"] = np.degrees(np.arccos(np.clip(pos_unit @ pos_sun_unit, -1, 1)))
+        try:
+            write_columns(cache_dir, df, {"fingerprint": fingerprint})
+        except OSError:
+            # Result directory might be read-only
+            pass
 
-        return row
+        return df
+
+    start, end = _get_time_bounds(
+        _get_first_epoch(dependent_variable_history_file), start, end, revolutions
+    )
+    selected = _select_columns(schema, columns)
+    chunks = list(_iter_csv_chunks(dependent_variable_history_file, colnames, selected, start, end))
+    if not chunks:
+        # Window outside of the propagation, empty like when read from the cache
+        return pd.DataFrame(
+            {
+                column: np.empty(0, dtype=schema.dtypes.get(column, np.float64))
+                for column in selected + ["t_et"]
+            }
+        )
+    return _stack_matrix_columns(pd.concat(chunks, ignore_index=True))
+
+
+def _stack_matrix_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Stores the columns of every matrix variable in a single array, like the columnar cache does,
+    so that get_rotation_matrices() can view them as (N, 3, 3) array. Parsed CSV columns are
+    separate arrays.
+    """
+    groups = get_schema_of_columns(df.columns).groups_of_kind("matrix")
+    if not groups:
+        return df
+
+    data = {column: df[column].to_numpy() for column in df.columns}
+    for group in groups.values():
+        data.update(zip(group, np.stack([data[column] for column in group])))
+    # Setting the columns of df would copy them
+    return pd.DataFrame(data, index=df.index, copy=False)
+
+
+def _is_cache_valid(cache_dir: Path, fingerprint: list[list[int]]) -> bool:
+    if not cache_dir.exists():
+        return False
+    try:
+        return read_attributes(cache_dir).get("fingerprint") == fingerprint
+    except (OSError, ValueError, KeyError):
+        # Corrupt cache, will be overwritten
+        return False
+
+
+def _read_cached_history(
+    cache_dir: Path,
+    columns: Optional[Iterable[str]],
+    start: Optional[float],
+    end: Optional[float],
+    revolutions: Optional[tuple[float, float]],
+) -> pd.DataFrame:
+    selected, rows = _get_cached_selection(cache_dir, columns, start, end, revolutions)
+    return read_columns(cache_dir, selected, rows=rows)
+
+
+def _get_cached_selection(
+    cache_dir: Path,
+    columns: Optional[Iterable[str]],
+    start: Optional[float],
+    end: Optional[float],
+    revolutions: Optional[tuple[float, float]],
+) -> tuple[list[str], slice]:
+    colnames = read_header(cache_dir)["columns"]
+    selected = _select_columns(get_schema_of_columns(colnames[:-1]), columns) + ["t_et"]
+
+    t_et = read_columns(cache_dir, ["t_et"])["t_et"].to_numpy()
+    start, end = _get_time_bounds(t_et[0], start, end, revolutions)
+    rows = _get_row_slice(t_et, start, end)
+
+    return selected, rows
+
+
+def _get_time_bounds(
+    first_epoch: float,
+    start: Optional[float],
+    end: Optional[float],
+    revolutions: Optional[tuple[float, float]],
+) -> tuple[Optional[float], Optional[float]]:
+    if revolutions is not None:
+        start_rev, n_rev = revolutions
+        revolutions_start = first_epoch + start_rev * lro_period
+        revolutions_end = revolutions_start + n_rev * lro_period
+        start = revolutions_start if start is None else max(start, revolutions_start)
+        end = revolutions_end if end is None else min(end, revolutions_end)
+    return start, end
+
+
+def _get_row_slice(t_et: np.ndarray, start: Optional[float], end: Optional[float]) -> slice:
+    # Epochs are sorted, so the window is a contiguous range of rows
+    row_start = 0 if start is None else np.searchsorted(t_et, start, side="left")
+    row_end = len(t_et) if end is None else np.searchsorted(t_et, end, side="right")
+    return slice(row_start, row_end)
+
+
+def _get_first_epoch(dependent_variable_history_file: Path) -> float:
+    with open(dependent_variable_history_file) as f:
+        return float(f.readline().split(",", 1)[0])
+
+
+def _iter_csv_chunks(
+    dependent_variable_history_file: Path,
+    colnames: list[str],
+    selected: list[str],
+    start: Optional[float],
+    end: Optional[float],
+    chunk_size: int = 100000,
+) -> Iterator[pd.DataFrame]:
+    """
+    Parses only the selected columns of the CSV in chunks of rows and stops reading after the
+    end of the time window.
+    """
+    with pd.read_csv(
+        dependent_variable_history_file,
+        names=["t_et"] + colnames,
+        usecols=["t_et"] + selected,
+        chunksize=chunk_size,
+    ) as reader:
+        for chunk in reader:
+            t_et = chunk["t_et"].to_numpy()
+            rows = _get_row_slice(t_et, start, end)
+            if rows.stop > rows.start:
+                yield chunk.iloc[rows][selected + ["t_et"]]
+
+            if end is not None and t_et[-1] > end:
+                break
+
+
+def _get_file_fingerprint(*files: Path) -> list[list[int]]:
+    fingerprint = []
+    for file in files:
+        stat = file.stat()
+        fingerprint.append([stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+def _enhance_df(df: pd.DataFrame):
+    # Columns may have been deselected when loading, so only derive what is possible
+    schema = get_schema_of_columns(df.columns)
+    pos_columns = schema.group("pos")
+    vel_columns = schema.group("vel")
+    pos_sun_columns = schema.group("pos_sun")
 
     # Find magnitudes of positions and accelerations
-    df["r"] = np.sqrt(np.square(df[pos_names]).sum(axis=1))
-    if "pos_sun_x" in df.columns:
-        df["r_sun"] = np.sqrt(np.square(df[["pos_sun_x", "pos_sun_y", "pos_sun_z"]]).sum(axis=1))
+    if pos_columns:
+        df["r"] = np.sqrt(np.square(df[pos_columns]).sum(axis=1))
+    if pos_sun_columns:
+        df["r_sun"] = np.sqrt(np.square(df[pos_sun_columns]).sum(axis=1))
     for acc in acc_names:
-        if f"{acc}_x" in df.columns:
-            df[acc] = np.sqrt(np.square(df[[f"{acc}_x", f"{acc}_y", f"{acc}_z"]]).sum(axis=1))
+        if acc_columns := schema.group(acc):
+            df[acc] = np.sqrt(np.square(df[acc_columns]).sum(axis=1))
 
     # Convert latitude/longitude to degrees
     for angle in ["lat_moon", "lon_moon"]:
         if angle in df.columns:
             df[angle] = np.degrees(df[angle])
 
-    df = df.swifter.apply(tf, axis=1)
-    return df
-
+    if not pos_columns:
+        return df
 
-def load_walltime_duration(result_dir: Union[Path, str]):
-    if isinstance(result_dir, str):
-        result_dir = Path(result_dir)
+    # All transformations below operate on whole (N, 3) blocks at once
+    pos = df[pos_columns].to_numpy()
 
-    cpu_time = pd.read_csv(result_dir / "cpu_time.csv", names=["t_sim", "t_wall"])
-    walltime_propagation = cpu_time["t_wall"].iloc[-1] - cpu_time["t_wall"].iloc[0]
+    # Find RP accelerations in RSW frame
+    if vel_columns:
+        vel = df[vel_columns].to_numpy()
+        for source in ["sun", "moon", "mercury", "earth"]:
+            acc_columns = schema.group(f"acc_rp_{source}")
+            if not acc_columns:
+                continue
 
-    walltime_file_total = result_dir / "walltime.txt"
-    if walltime_file_total.exists():
-        with walltime_file_total.open() as f:
-            walltime_total = list(map(float, f.read().strip().split("\n")))
-    else:
-        walltime_total = []
+            acc = df[acc_columns].to_numpy()
+            (
+                df[f"acc_rp_{source}_radial"],
+                df[f"acc_rp_{source}_along"],
+                df[f"acc_rp_{source}_cross"],
+            ) = cart2track_batch(acc, vel, pos)
+
+    # Find subsolar angle
+    if pos_sun_columns:
+        pos_sun = df[pos_sun_columns].to_numpy()
+        pos_unit = pos / norm_rows(pos)[:, None]
+        pos_sun_unit = pos_sun / norm_rows(pos_sun)[:, None]
+        df["angle_subsolar"] = np.degrees(
+            np.arccos(np.clip(dot_rows(pos_unit, pos_sun_unit), -1, 1))
+        )
 
-    return walltime_propagation, walltime_total
+    return df
 
 
 def load_all_simulation_results(
-    results_base: Union[Path, str], load_runs=False, do_tf=False, n_workers=1
+    results_base: Union[Path, str],
+    load_runs=False,
+    do_tf=False,
+    n_workers=1,
+    lazy=False,
+    max_resident=8,
+    compact=False,
+    zero_copy=True,
+    use_index=True,
+    update_index=False,
 ):
+    """
+    Loads the metadata and optionally the runs of all result directories in results_base.
+
+    Args:
+        results_base: directory containing one directory per run, named by run number
+        load_runs: also return the run DataFrames
+        do_tf: apply transformations to the runs (see load_simulation_results)
+        n_workers: number of processes to use for loading
+        lazy: return runs as LazyRunMapping, which only loads runs when accessed
+        max_resident: maximum number of runs the LazyRunMapping keeps in memory
+        compact: load runs in compact mode (see load_simulation_results)
+        zero_copy: transfer runs from the worker processes through memory-mapped scratch files
+            instead of pickling them (see _transfer_run)
+        use_index: take the metadata from the MetadataIndex of results_base if the runs are not
+            loaded eagerly. Runs that are missing from the index or whose metadata files changed
+            since they were indexed are loaded from their directories.
+        update_index: add the metadata of these runs to the index
+
+    Returns:
+        Metadata, and dict or LazyRunMapping of runs by run number if load_runs is set
+    """
     if isinstance(results_base, str):
         results_base = Path(results_base)
 
-    result_dirs = [e for e in results_base.iterdir() if e.is_dir()]
+    result_dirs = get_result_dirs(results_base)
 
     metadata = {}
     runs = {}
+    load_runs_eagerly = load_runs and not lazy
+
+    index = MetadataIndex(results_base)
+    use_index = use_index and not load_runs_eagerly
+    dirs_to_load = result_dirs
+    if use_index:
+        fingerprints = index.get_changed(result_dirs)
+        dirs_to_load = [results_base / str(run_no) for run_no in fingerprints]
 
-    with tqdm(total=len(result_dirs)) as pbar:
+    with tqdm(total=len(dirs_to_load)) as pbar, _transfer_dir(zero_copy) as transfer_dir:
         with ProcessPoolExecutor(max_workers=n_workers) as executor:
             futures = [
-                executor.submit(_load_metadata_and_run, result_dir, load_runs, do_tf)
-                for result_dir in result_dirs
+                executor.submit(
+                    _load_metadata_and_run,
+                    result_dir,
+                    load_runs_eagerly,
+                    do_tf,
+                    compact,
+                    transfer_dir,
+                )
+                for result_dir in dirs_to_load
             ]
 
             for future in as_completed(futures):
@@ -222,13 +542,26 @@ def load_all_simulation_results(
 
                 run_no = res[0]
                 metadata[run_no] = res[1]
-                if load_runs:
-                    runs[run_no] = res[2]
+                if load_runs_eagerly:
+                    runs[run_no] = _receive_run(res[2], transfer_dir, run_no)
 
-    metadata = pd.DataFrame(metadata).T
+    if use_index:
+        if update_index:
+            _add_to_index(index, metadata, fingerprints)
+        metadata = _merge_with_index(index, metadata, result_dirs)
+    else:
+        metadata = pd.DataFrame(metadata).T
     metadata.sort_index(inplace=True)
 
-    runs = dict(sorted(runs.items()))
+    if lazy:
+        runs = LazyRunMapping(
+            {int(result_dir.name): result_dir for result_dir in result_dirs},
+            do_tf=do_tf,
+            max_resident=max_resident,
+            compact=compact,
+        )
+    else:
+        runs = dict(sorted(runs.items()))
 
     if load_runs:
         return metadata, runs
@@ -236,26 +569,279 @@ def load_all_simulation_results(
         return metadata
 
 
-def _load_metadata_and_run(result_dir, load_run, do_tf):
+def _add_to_index(index: MetadataIndex, metadata: dict[int, dict], fingerprints: dict[int, dict]):
+    try:
+        for run_no, run_metadata in metadata.items():
+            index.add(run_no, run_metadata, fingerprints[run_no])
+    except OSError:
+        # Results directory is not writable, the index is then only used for reading
+        pass
+
+
+def _merge_with_index(
+    index: MetadataIndex, metadata: dict[int, dict], result_dirs: list[Path]
+) -> pd.DataFrame:
+    """Returns the metadata of all result_dirs, from the index unless it was loaded"""
+    indexed = index.load().drop(columns="settings_hash", errors="ignore")
+    run_numbers = [int(result_dir.name) for result_dir in result_dirs]
+    indexed = indexed.loc[indexed.index.intersection(run_numbers).difference(list(metadata))]
+    if not metadata:
+        return indexed
+    elif indexed.empty:
+        return pd.DataFrame(metadata).T
+    else:
+        return pd.concat([indexed, pd.DataFrame(metadata).T])
+
+
+def _load_metadata_and_run(result_dir, load_run, do_tf, compact, transfer_dir=None):
     """Only to be used by load_all_simulation_results()"""
-    run_no = int(result_dir.name)
-    with (result_dir / "settings.json").open() as f:
-        metadata = json.load(f)
-    metadata["walltime_propagation"], metadata["walltime_total"] = load_walltime_duration(
-        result_dir
-    )
+    run_no, metadata = load_run_metadata(result_dir)
 
     if load_run:
-        run = load_simulation_results(result_dir, do_tf=do_tf)
+        run = _load_run(result_dir, do_tf, compact, transfer_dir)
         return run_no, metadata, run
     else:
         return run_no, metadata
 
 
+def _load_run(
+    result_dir: Path, do_tf: bool, compact: bool, transfer_dir: Optional[Path] = None
+) -> Optional[pd.DataFrame]:
+    """Loads a run in a worker process and hands it to the parent with _transfer_run()"""
+    run = load_simulation_results(result_dir, do_tf=do_tf, compact=compact)
+    return _transfer_run(run, transfer_dir, int(result_dir.name))
+
+
+@contextmanager
+def _transfer_dir(zero_copy: bool) -> Iterator[Optional[Path]]:
+    """
+    Scratch directory for _transfer_run(), in shared memory if available. It is removed on exit,
+    runs received from it stay valid since their memory maps keep the data alive.
+    """
+    if not zero_copy:
+        yield None
+        return
+
+    shm = Path("/dev/shm")
+    with tempfile.TemporaryDirectory(
+        prefix="lropy-transfer-", dir=shm if shm.is_dir() else None
+    ) as transfer_dir:
+        yield Path(transfer_dir)
+
+
+def _transfer_run(
+    run: pd.DataFrame, transfer_dir: Optional[Path], run_no: int
+) -> Optional[pd.DataFrame]:
+    """
+    Prepares a run loaded in a worker process for returning it to the parent. Returning a
+    DataFrame pickles it through a pipe, which the parent has to unpickle one run at a time.
+    Instead, the columns are written to the transfer directory and only memory-mapped by the
+    parent in _receive_run(), so it does not copy the data.
+
+    Returns:
+        None if the run was written to transfer_dir, otherwise the run itself
+    """
+    # Only plain NumPy columns can be memory-mapped, not e.g. strings or categoricals
+    if transfer_dir is None or any(
+        not isinstance(dtype, np.dtype) or dtype.hasobject for dtype in run.dtypes
+    ):
+        return run
+
+    try:
+        write_columns(transfer_dir / str(run_no), run)
+    except OSError:
+        # E.g. shared memory is full, fall back to pickling
+        return run
+    return None
+
+
+def _receive_run(
+    run: Optional[pd.DataFrame], transfer_dir: Optional[Path], run_no: int
+) -> pd.DataFrame:
+    """Receives a run from _transfer_run() in the parent process"""
+    if run is not None:
+        return run
+
+    path = transfer_dir / str(run_no)
+    run = read_columns(path, mmap=True)
+    # The mapping stays valid after the files are removed, this frees the shared memory as soon
+    # as the run is no longer referenced
+    shutil.rmtree(path)
+    return run
+
+
+class LazyRunMapping(Mapping[int, pd.DataFrame]):
+    """
+    Maps run numbers to run DataFrames, which are only loaded when first accessed. The most
+    recently used runs are kept in memory, older ones are evicted and reloaded on next access.
+    """
+
+    result_dirs: dict[int, Path]
+    do_tf: bool
+    max_resident: int
+    compact: bool
+
+    def __init__(self, result_dirs: dict[int, Path], do_tf=False, max_resident=8, compact=False):
+        self.result_dirs = dict(sorted(result_dirs.items()))
+        self.do_tf = do_tf
+        self.max_resident = max_resident
+        self.compact = compact
+        self._resident: OrderedDict[int, pd.DataFrame] = OrderedDict()
+
+    def __getitem__(self, run_no: int) -> pd.DataFrame:
+        if run_no in self._resident:
+            self._resident.move_to_end(run_no)
+            return self._resident[run_no]
+
+        run = load_simulation_results(
+            self.result_dirs[run_no], do_tf=self.do_tf, compact=self.compact
+        )
+        self._add_resident(run_no, run)
+        return run
+
+    def __contains__(self, run_no) -> bool:
+        # Mapping.__contains__ would load the run
+        return run_no in self.result_dirs
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.result_dirs)
+
+    def __len__(self) -> int:
+        return len(self.result_dirs)
+
+    def is_resident(self, run_no: int) -> bool:
+        return run_no in self._resident
+
+    def prefetch(self, run_numbers: Iterable[int], n_workers=1, zero_copy=True):
+        """
+        Loads multiple runs in parallel so that later accesses are served from memory. Only the
+        last max_resident runs will be resident afterwards.
+        """
+        run_numbers = [run_no for run_no in run_numbers if run_no not in self._resident]
+        run_numbers = run_numbers[-self.max_resident :]
+        if not run_numbers:
+            return
+
+        with _transfer_dir(zero_copy) as transfer_dir:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                runs = executor.map(
+                    partial(
+                        _load_run,
+                        do_tf=self.do_tf,
+                        compact=self.compact,
+                        transfer_dir=transfer_dir,
+                    ),
+                    [self.result_dirs[run_no] for run_no in run_numbers],
+                )
+                for run_no, run in zip(run_numbers, runs):
+                    self._add_resident(run_no, _receive_run(run, transfer_dir, run_no))
+
+    def clear(self):
+        self._resident.clear()
+
+    def _add_resident(self, run_no: int, run: pd.DataFrame):
+        self._resident[run_no] = run
+        self._resident.move_to_end(run_no)
+        while len(self._resident) > self.max_resident:
+            self._resident.popitem(last=False)
+
+
+def update_results_store(
+    results_base: Union[Path, str], load_runs=True, do_tf=False, n_workers=1
+) -> ResultsStore:
+    """
+    Adds the runs in results_base to its results store. Only run directories that are new or
+    whose files changed since they were stored are processed, so adding runs to an existing
+    sweep costs time proportional to the number of new runs.
+
+    Args:
+        results_base: directory containing one directory per run, named by run number
+        load_runs: store the run data in addition to the metadata
+        do_tf: apply transformations to the runs (see load_simulation_results)
+        n_workers: number of processes to use for loading
+
+    Returns:
+        The updated store
+    """
+    if isinstance(results_base, str):
+        results_base = Path(results_base)
+
+    store = ResultsStore(results_base / "results")
+    stored_fingerprints = store.load_fingerprints()
+
+    fingerprints = {}
+    for result_dir in get_result_dirs(results_base):
+        run_no = int(result_dir.name)
+        fingerprint = {
+            "files": _get_run_fingerprint(result_dir),
+            "load_runs": load_runs,
+            "do_tf": do_tf,
+        }
+        if stored_fingerprints.get(run_no) != fingerprint:
+            fingerprints[run_no] = fingerprint
+
+    if not fingerprints:
+        return store
+
+    metadata = {}
+    with tqdm(total=len(fingerprints)) as pbar:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            # Workers write runs directly into the store, so only metadata is sent back
+            futures = [
+                executor.submit(
+                    _store_run, results_base / str(run_no), store.path, load_runs, do_tf
+                )
+                for run_no in fingerprints.keys()
+            ]
+
+            for future in as_completed(futures):
+                run_no, run_metadata = future.result()
+                metadata[run_no] = run_metadata
+                pbar.update(1)
+
+    metadata = pd.DataFrame(metadata).T
+    metadata.sort_index(inplace=True)
+    store.append(metadata, fingerprints=fingerprints)
+
+    return store
+
+
+def _get_run_fingerprint(result_dir: Path) -> dict[str, Optional[list[int]]]:
+    fingerprint = {}
+    for file_name in [
+        "settings.json",
+        "dependent_variable_names.csv",
+        "dependent_variable_history.csv",
+        "cpu_time.csv",
+        "walltime.txt",
+        "resources.jsonl",
+    ]:
+        file = result_dir / file_name
+        fingerprint[file_name] = _get_file_fingerprint(file)[0] if file.exists() else None
+    return fingerprint
+
+
+def _store_run(result_dir: Path, store_path: Path, load_run: bool, do_tf: bool):
+    """Only to be used by update_results_store()"""
+    run_no, metadata = load_run_metadata(result_dir)
+    if load_run:
+        # The store replaces the cache, so none is created in the result directory
+        run = load_simulation_results(result_dir, do_tf=do_tf, use_cache=False)
+        ResultsStore(store_path).write_run(run_no, run)
+    return run_no, metadata
+
+
 def load_pickled_simulation_results(
     results_base: Path,
 ) -> Tuple[pd.DataFrame, dict[int, pd.DataFrame]]:
+    """
+    Loads the results.pkl of a sweep. Sweeps without one, i.e. all sweeps since the results store
+    replaced it, are loaded from their results store.
+    """
     if isinstance(results_base, str):
         results_base = Path(results_base)
 
-    return pd.read_pickle(results_base / "results.pkl")
+    pickle_file = results_base / "results.pkl"
+    if not pickle_file.exists():
+        return load_stored_simulation_results(results_base)
+    return pd.read_pickle(pickle_file)
@@ -0,0 +1,300 @@
+import hashlib
+import json
+import os
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Union, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+# Settings that differ between otherwise identical runs
+run_specific_settings = ["id", "hostname", "start_timestamp", "save_dir"]
+# Files of a run directory that the metadata is loaded from
+metadata_files = ["settings.json", "cpu_time.csv", "walltime.txt", "resources.jsonl"]
+
+
+class MetadataIndex:
+    """
+    Persistent index of the metadata of all runs in a results directory. Every finished run
+    appends its settings, settings hash and walltimes to a single JSON lines table, so the
+    metadata of a sweep can be queried without touching the run directories. Entries record the
+    sizes and modification times of the files they were loaded from, so changed runs can be
+    found with get_changed().
+    """
+
+    path: Path
+
+    def __init__(self, results_base: Union[Path, str]):
+        if isinstance(results_base, str):
+            results_base = Path(results_base)
+        self.path = results_base / "index.jsonl"
+        self._cache: Optional[tuple[tuple[int, int], pd.DataFrame, dict[int, Any]]] = None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def add(self, run_no: int, metadata: dict[str, Any], fingerprint: Optional[dict] = None):
+        """
+        Adds the metadata of a run to the index, replacing earlier entries of the same run.
+
+        Args:
+            run_no: run number
+            metadata: metadata as loaded by load_run_metadata()
+            fingerprint: get_metadata_fingerprint() of the run directory before the metadata was
+                loaded, runs without fingerprint are always considered changed
+        """
+        entry = {
+            "run_no": int(run_no),
+            "settings_hash": get_settings_hash(metadata),
+            "metadata": metadata,
+            "fingerprint": fingerprint,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # A single write of a whole line, so concurrently finishing runs do not interleave
+        with self.path.open("a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def add_run(self, result_dir: Union[Path, str]):
+        # Fingerprint first, so changes while loading are detected later
+        fingerprint = get_metadata_fingerprint(result_dir)
+        self.add(*load_run_metadata(result_dir), fingerprint)
+
+    def update(self, results_base: Optional[Union[Path, str]] = None) -> list[int]:
+        """
+        Adds the runs in results_base that are not indexed yet, e.g. of sweeps that were run
+        before the index existed, and replaces the entries of runs that changed. Runs without
+        complete metadata files are skipped.
+
+        Returns:
+            Numbers of the added runs
+        """
+        if results_base is None:
+            results_base = self.path.parent
+        if isinstance(results_base, str):
+            results_base = Path(results_base)
+
+        added = []
+        for run_no, fingerprint in self.get_changed(get_result_dirs(results_base)).items():
+            try:
+                metadata = load_run_metadata(results_base / str(run_no))
+            except (OSError, ValueError):
+                # Run that failed or is still running
+                continue
+            self.add(*metadata, fingerprint)
+            added.append(run_no)
+        return added
+
+    def get_changed(self, result_dirs: Iterable[Union[Path, str]]) -> dict[int, dict]:
+        """
+        Finds the runs whose metadata files changed since they were indexed, or that are not
+        indexed at all.
+
+        Returns:
+            Current fingerprints of these runs by run number, in the order of result_dirs
+        """
+        indexed = self.load_fingerprints()
+        changed = {}
+        for result_dir in result_dirs:
+            run_no = int(Path(result_dir).name)
+            fingerprint = get_metadata_fingerprint(result_dir)
+            if indexed.get(run_no) != fingerprint:
+                changed[run_no] = fingerprint
+        return changed
+
+    def load(self) -> pd.DataFrame:
+        """
+        Loads the index. It is only parsed again if the file changed since the last call.
+
+        Returns:
+            Metadata indexed by run number, with an additional settings_hash column
+        """
+        return self._load()[0]
+
+    def load_fingerprints(self) -> dict[int, Optional[dict]]:
+        """Fingerprints of the indexed runs by run number"""
+        return self._load()[1]
+
+    def _load(self) -> tuple[pd.DataFrame, dict[int, Optional[dict]]]:
+        if not self.exists():
+            return pd.DataFrame(), {}
+
+        stat = self.path.stat()
+        key = (stat.st_size, stat.st_mtime_ns)
+        if self._cache is not None and self._cache[0] == key:
+            return self._cache[1:]
+
+        metadata = {}
+        fingerprints = {}
+        with self.path.open() as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                # Later entries replace earlier ones of the same run
+                metadata[entry["run_no"]] = {
+                    **entry["metadata"],
+                    "settings_hash": entry["settings_hash"],
+                }
+                fingerprints[entry["run_no"]] = entry.get("fingerprint")
+
+        metadata = pd.DataFrame(metadata).T
+        metadata.sort_index(inplace=True)
+        self._cache = (key, metadata, fingerprints)
+        return metadata, fingerprints
+
+    def select(self, where: Callable[[pd.DataFrame], Any]) -> list[int]:
+        """
+        Finds runs by metadata predicate, e.g. lambda m: m["target_type"] == "Paneled"
+
+        Returns:
+            Numbers of runs for which the predicate holds
+        """
+        metadata = self.load()
+        if metadata.empty:
+            return []
+        return list(metadata.index[np.asarray(where(metadata), dtype=bool)])
+
+    def group_by_settings(
+        self, run_numbers: Optional[Iterable[int]] = None
+    ) -> dict[str, list[int]]:
+        """
+        Groups runs with identical settings, e.g. the repetitions of a benchmark.
+
+        Returns:
+            Run numbers by settings hash
+        """
+        metadata = self.load()
+        if run_numbers is not None:
+            metadata = metadata.loc[metadata.index.intersection(list(run_numbers))]
+        return {
+            settings_hash: list(group.index)
+            for settings_hash, group in metadata.groupby("settings_hash", sort=False)
+        }
+
+
+def get_settings_hash(settings: dict[str, Any]) -> str:
+    """Hash of the settings that determine the outcome of a run"""
+    settings = {
+        key: value
+        for key, value in settings.items()
+        if key not in run_specific_settings
+        and not key.startswith("walltime_")
+        and not key.startswith("resource_")
+    }
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+def get_result_dirs(results_base: Union[Path, str]) -> list[Path]:
+    if isinstance(results_base, str):
+        results_base = Path(results_base)
+
+    # scandir knows the entry types from the directory listing, so no run directory is touched.
+    # Other directories like the results store are not run directories.
+    with os.scandir(results_base) as it:
+        return [results_base / e.name for e in it if e.name.isdigit() and e.is_dir()]
+
+
+def get_metadata_fingerprint(result_dir: Union[Path, str]) -> dict[str, Optional[list[int]]]:
+    """Sizes and modification times of the metadata files of a run, None for missing files"""
+    if isinstance(result_dir, str):
+        result_dir = Path(result_dir)
+
+    fingerprint = {}
+    for file_name in metadata_files:
+        try:
+            stat = (result_dir / file_name).stat()
+            fingerprint[file_name] = [stat.st_size, stat.st_mtime_ns]
+        except FileNotFoundError:
+            fingerprint[file_name] = None
+    return fingerprint
+
+
+def load_run_metadata(result_dir: Union[Path, str]) -> tuple[int, dict]:
+    if isinstance(result_dir, str):
+        result_dir = Path(result_dir)
+
+    run_no = int(result_dir.name)
+    with (result_dir / "settings.json").open() as f:
+        metadata = json.load(f)
+    metadata["walltime_propagation"], metadata["walltime_total"] = load_walltime_duration(
+        result_dir
+    )
+    metadata.update(load_resource_usage(result_dir))
+
+    return run_no, metadata
+
+
+def load_walltime_duration(result_dir: Union[Path, str]):
+    if isinstance(result_dir, str):
+        result_dir = Path(result_dir)
+
+    walltime_propagation = load_walltime_propagation(result_dir / "cpu_time.csv")
+
+    walltime_file_total = result_dir / "walltime.txt"
+    if walltime_file_total.exists():
+        with walltime_file_total.open() as f:
+            walltime_total = list(map(float, f.read().strip().split("\n")))
+    else:
+        walltime_total = []
+
+    return walltime_propagation, walltime_total
+
+
+def load_resource_usage(result_dir: Union[Path, str]) -> dict[str, list]:
+    """
+    Resource usage of every execution of a run, as recorded by Runner in resources.jsonl.
+
+    Returns:
+        Lists of values by name prefixed with resource_, e.g. resource_max_rss, in the order of
+        the executions like walltime_total. Empty for runs without resources.jsonl.
+    """
+    if isinstance(result_dir, str):
+        result_dir = Path(result_dir)
+
+    resources_file = result_dir / "resources.jsonl"
+    if not resources_file.exists():
+        return {}
+
+    resources = {}
+    with resources_file.open() as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for name, value in json.loads(line).items():
+                resources.setdefault(f"resource_{name}", []).append(value)
+    return resources
+
+
+def load_walltime_propagation(cpu_time_file: Path) -> float:
+    """
+    Wall time between the first and last entry of a cpu_time.csv file. Only its first and last
+    line are read, since the file has one line per propagation step.
+    """
+    with cpu_time_file.open("rb") as f:
+        first_line = f.readline()
+
+        # Read backwards in blocks until the last non-empty line is complete
+        end = f.seek(0, os.SEEK_END)
+        block_size = 1024
+        tail = b""
+        while True:
+            start = max(end - block_size, 0)
+            f.seek(start)
+            tail = f.read(end - start) + tail
+            lines = tail.strip().split(b"\n")
+            if len(lines) > 1 or start == 0:
+                last_line = lines[-1]
+                break
+            end = start
+
+    return _parse_wall_time(last_line) - _parse_wall_time(first_line)
+
+
+def _parse_wall_time(line: bytes) -> float:
+    # Lines are t_sim,t_wall
+    fields = line.split(b",")
+    if len(fields) < 2:
+        # Empty or truncated file of a run that was killed
+        raise ValueError(f"Invalid cpu_time.csv line: {line!r}")
+    return float(fields[1])
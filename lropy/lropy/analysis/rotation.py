@@ -0,0 +1,161 @@
+import weakref
+from collections.abc import Iterable
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from lropy.analysis.schema import get_schema_of_columns
+from lropy.analysis.transform import cart2track_batch
+
+# Rotation matrix arrays by (id(df), target, central), removed when the DataFrame is collected
+_rotation_cache: dict[tuple[int, str, str], tuple[int, np.ndarray]] = {}
+
+
+def get_rotation_matrices(df: pd.DataFrame, target="LRO", central="Moon") -> np.ndarray:
+    """
+    Returns the TNW to inertial frame rotation matrices stored in the rot_{target}_{central}
+    columns of a run as (N, 3, 3) array. If the nine columns are equally spaced in one block of
+    memory, like in runs loaded by load_simulation_results() or a DataFrame created from a 2D
+    array, the array is a read-only view of them. Otherwise the columns are stacked into a new
+    array. The array is cached for as long as the
+    DataFrame lives.
+
+    Args:
+        df: run DataFrame
+        target: body whose TNW frame the matrices describe
+        central: central body of the TNW frame
+
+    Returns:
+        Array with rotation[n] @ v_tnw = v_inertial for row n
+    """
+    group = get_schema_of_columns(df.columns).group(f"rot_{target}_{central}")
+    if group is None:
+        raise KeyError(f'Run has no rotation matrix "rot_{target}_{central}"')
+
+    first_column = df[group[0]].to_numpy()
+    key = (id(df), target, central)
+    if key in _rotation_cache:
+        address, rotation = _rotation_cache[key]
+        # Columns might have been replaced since the array was cached
+        if address == _get_address(first_column):
+            return rotation
+    else:
+        weakref.finalize(df, _rotation_cache.pop, key, None)
+
+    rotation = _view_matrices([df[column].to_numpy() for column in group])
+    if rotation is None:
+        rotation = np.stack([df[column].to_numpy() for column in group], axis=-1).reshape(-1, 3, 3)
+    _rotation_cache[key] = (_get_address(first_column), rotation)
+    return rotation
+
+
+def _get_address(array: np.ndarray) -> int:
+    return array.__array_interface__["data"][0]
+
+
+def _view_matrices(columns: list[np.ndarray]):
+    """(N, 3, 3) view of nine row-major matrix element columns, None if they are not viewable"""
+    first = columns[0]
+    if first.dtype != np.float64 or first.ndim != 1:
+        return None
+
+    addresses = [_get_address(column) for column in columns]
+    spacing = addresses[1] - addresses[0]
+    if spacing == 0 or any(
+        column.dtype != first.dtype
+        or column.strides != first.strides
+        or column.shape != first.shape
+        or address - addresses[0] != i * spacing
+        for i, (column, address) in enumerate(zip(columns, addresses))
+    ):
+        return None
+
+    # All columns must be part of the same allocation, otherwise the view reaches outside of it
+    root = _get_root(first)
+    if any(_get_root(column) is not root for column in columns[1:]):
+        return None
+
+    return np.lib.stride_tricks.as_strided(
+        first,
+        shape=(len(first), 3, 3),
+        strides=(first.strides[0], 3 * spacing, spacing),
+        writeable=False,
+    )
+
+
+def _get_root(array: np.ndarray) -> np.ndarray:
+    """Array that owns the memory of a view"""
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def _get_vectors(df: pd.DataFrame, names: list[str]) -> np.ndarray:
+    """Stacks vector column groups as (N, len(names), 3) array"""
+    schema = get_schema_of_columns(df.columns)
+    vectors = np.empty((len(df), len(names), 3))
+    for i, name in enumerate(names):
+        group = schema.group(name)
+        if group is None or schema.kinds[name] != "vector":
+            raise KeyError(f'Unknown vector "{name}"')
+        for j, column in enumerate(group):
+            vectors[:, i, j] = df[column].to_numpy()
+    return vectors
+
+
+def rotate_to_tnw(
+    df: pd.DataFrame, names: Union[str, Iterable[str]], target="LRO", central="Moon"
+) -> pd.DataFrame:
+    """
+    Rotates vector column groups from the inertial frame into the TNW frame in a single batched
+    operation, using the rotation matrices stored in the run.
+
+    Args:
+        df: run DataFrame
+        names: names of the vector groups, e.g. "acc_rp_moon"
+        target: body whose TNW frame to rotate to
+        central: central body of the TNW frame
+
+    Returns:
+        DataFrame with the columns {name}_t, {name}_n, {name}_w per vector
+    """
+    names = [names] if isinstance(names, str) else list(names)
+    rotation = get_rotation_matrices(df, target, central)
+    # Transpose of the rotation is its inverse
+    rotated = np.einsum("nji,nkj->nki", rotation, _get_vectors(df, names))
+
+    return pd.DataFrame(
+        {
+            f"{name}_{component}": rotated[:, i, j]
+            for i, name in enumerate(names)
+            for j, component in enumerate(["t", "n", "w"])
+        },
+        index=df.index,
+    )
+
+
+def rotate_to_rsw(df: pd.DataFrame, names: Union[str, Iterable[str]]) -> pd.DataFrame:
+    """
+    Rotates vector column groups from the inertial frame into the RSW frame defined by the
+    position and velocity columns, like the RSW components of RP accelerations in _enhance_df().
+
+    Args:
+        df: run DataFrame with pos and vel columns
+        names: names of the vector groups, e.g. "acc_rp_moon"
+
+    Returns:
+        DataFrame with the columns {name}_radial, {name}_along, {name}_cross per vector
+    """
+    names = [names] if isinstance(names, str) else list(names)
+    pos, vel = _get_vectors(df, ["pos", "vel"]).transpose(1, 0, 2)
+    vectors = _get_vectors(df, names)
+
+    rotated = {}
+    for i, name in enumerate(names):
+        (
+            rotated[f"{name}_radial"],
+            rotated[f"{name}_along"],
+            rotated[f"{name}_cross"],
+        ) = cart2track_batch(vectors[:, i], vel, pos)
+    return pd.DataFrame(rotated, index=df.index)
@@ -0,0 +1,192 @@
+import csv
+import hashlib
+import io
+import re
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+vector_elements = ["x", "y", "z"]
+matrix_elements = ["r11", "r12", "r13", "r21", "r22", "r23", "r31", "r32", "r33"]
+kepler_elements = ["a", "e", "i", "argPeri", "longAscNode", "trueAnom"]
+
+# Elements of multi-column variables by variable kind
+group_elements = {
+    "vector": vector_elements,
+    "matrix": matrix_elements,
+    "kepler": kepler_elements,
+}
+
+
+class ColumnSchema:
+    """
+    Resolved column layout of a run: the column names, their dtypes and the columns that form
+    vector, matrix and Kepler element variables. Schemas are shared by all runs with the same
+    layout, see get_column_schema() and get_schema_of_columns().
+    """
+
+    columns: list[str]
+    dtypes: dict[str, np.dtype]
+    groups: dict[str, list[str]]
+    kinds: dict[str, str]
+
+    def __init__(self, columns: list[str], groups: dict[str, list[str]], kinds: dict[str, str]):
+        self.columns = columns
+        # The history is written as floating point numbers only
+        self.dtypes = {column: np.dtype(np.float64) for column in columns}
+        self.groups = groups
+        self.kinds = kinds
+
+    @classmethod
+    def from_variables(cls, variables: Iterable[tuple[str, int]]) -> "ColumnSchema":
+        """
+        Args:
+            variables: (name, size) of the dependent variables in the order they are written
+        """
+        columns = []
+        groups = {}
+        kinds = {}
+        for name, size in variables:
+            if size == 1:
+                # Scalar
+                columns.append(name)
+                continue
+
+            if size == 3:
+                kind = "vector"
+            elif size == 9:
+                # Row-major matrix
+                kind = "matrix"
+            elif name == "kepler":
+                kind = "kepler"
+            else:
+                raise Exception(f"Unrecognized variable {name}")
+
+            group = [f"{name}_{elem}" for elem in group_elements[kind]]
+            columns.extend(group)
+            groups[name] = group
+            kinds[name] = kind
+
+        return cls(columns, groups, kinds)
+
+    @classmethod
+    def from_columns(cls, columns: Iterable[str]) -> "ColumnSchema":
+        """Infers the variables from column names, e.g. of a loaded DataFrame"""
+        columns = list(columns)
+        column_set = set(columns)
+
+        groups = {}
+        kinds = {}
+        for column in columns:
+            for kind, elements in group_elements.items():
+                suffix = f"_{elements[0]}"
+                if not column.endswith(suffix):
+                    continue
+
+                name = column[: -len(suffix)]
+                group = [f"{name}_{elem}" for elem in elements]
+                if name not in groups and column_set.issuperset(group):
+                    groups[name] = group
+                    kinds[name] = kind
+
+        return cls(columns, groups, kinds)
+
+    def group(self, name: str) -> Optional[list[str]]:
+        """Columns of a multi-column variable, None if the schema does not contain it"""
+        return self.groups.get(name)
+
+    def groups_of_kind(self, kind: str) -> dict[str, list[str]]:
+        return {name: group for name, group in self.groups.items() if self.kinds[name] == kind}
+
+    @property
+    def count_columns(self) -> list[str]:
+        """Columns holding panel counts, which are integers"""
+        return [column for column in self.columns if column.startswith("panels_")]
+
+
+# Schemas by hash of the names file and by column names, a sweep only has a few distinct layouts
+_schemas_by_hash: dict[str, ColumnSchema] = {}
+_schemas_by_columns: dict[tuple[str, ...], ColumnSchema] = {}
+
+
+def get_column_schema(names_file: Path) -> ColumnSchema:
+    """
+    Resolves the columns of a dependent_variable_names.csv file. The file is fingerprinted by
+    its content, so its variable IDs are only parsed once per distinct layout.
+    """
+    content = names_file.read_bytes()
+    key = hashlib.sha1(content).hexdigest()
+
+    if key not in _schemas_by_hash:
+        reader = csv.DictReader(io.StringIO(content.decode(), newline=""), delimiter=";")
+        schema = ColumnSchema.from_variables(
+            (_get_column_name(var["ID"]), int(var["Size"])) for var in reader
+        )
+        _schemas_by_hash[key] = schema
+        _schemas_by_columns.setdefault(tuple(schema.columns), schema)
+
+    return _schemas_by_hash[key]
+
+
+def get_schema_of_columns(columns: Iterable[str]) -> ColumnSchema:
+    """Schema of a set of column names, e.g. of a loaded DataFrame"""
+    key = tuple(columns)
+    if key not in _schemas_by_columns:
+        _schemas_by_columns[key] = ColumnSchema.from_columns(key)
+    return _schemas_by_columns[key]
+
+
+def _get_column_name(id: str) -> str:
+    if match := re.fullmatch(r"Relative (position|velocity) of (\S+) w.r.t. (\S+)", id):
+        type, target, observer = match.groups()
+
+        prefix = type[:3]
+
+        if target in ["LRO", "MPO", "Vehicle"]:
+            return prefix
+        else:
+            return f"{prefix}_{target.lower()}"
+    elif match := re.fullmatch(r"Kepler elements of (\S+) w.r.t. (\S+)", id):
+        return "kepler"
+    elif match := re.fullmatch(r"Altitude of (\S+) w.r.t. (\S+)", id):
+        return "h"
+    elif match := re.fullmatch(r"TNW to inertial frame rotation matrix of (\S+) w.r.t. (\S+)", id):
+        target, central = match.groups()
+        return f"rot_{target}_{central}"
+    elif match := re.fullmatch(
+        r"Spherical position angle (latitude|longitude) angle of (\S+) w.r.t. (\S+)", id
+    ):
+        type, target, observer = match.groups()
+        return f"{type[:3]}_{observer.lower()}"
+    elif match := re.fullmatch(
+        r"Single acceleration in inertial frame of type (.+), acting on (\S+), exerted by (\S+)",
+        id,
+    ):
+        type, target, exerter = match.groups()
+        if "gravity" in type:
+            return f"acc_grav_{exerter.lower()}"
+        elif "radiation pressure" in type:
+            return f"acc_rp_{exerter.lower()}"
+    elif match := re.fullmatch(r"Received irradiance at (\S+) due to (\S+)", id):
+        target, source = match.groups()
+        return f"irr_{source.lower()}"
+    elif match := re.fullmatch(r"Received fraction of irradiance at (\S+) due to (\S+)", id):
+        target, source = match.groups()
+        return f"occ_{source.lower()}"
+    elif match := re.fullmatch(r"Number of (.+) source panels of (\S+) as seen from (\S+)", id):
+        type, source, target = match.groups()
+        if type == "visible":
+            return f"panels_vis_{source.lower()}"
+        elif type == "illuminated":
+            return f"panels_ill_{source.lower()}"
+        elif type == "visible and illuminated":
+            return f"panels_vis_ill_{source.lower()}"
+        elif type == "visible and emitting":
+            return f"panels_vis_emi_{source.lower()}"
+    elif match := re.fullmatch(r"Visible area of (\S+) as seen from (\S+)", id):
+        source, target = match.groups()
+        return f"area_vis_{source.lower()}"
+
+    raise Exception(f'Unknown variable id "{id}"')
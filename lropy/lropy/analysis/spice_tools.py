@@ -1,46 +1,182 @@
 import glob
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Optional, Iterable
 
 import numpy as np
 import pandas as pd
 import spiceypy as spice
 import spiceypy.utils.support_types as stypes
 
-from lropy.constants import moon_polar_radius
+from lropy.constants import moon_polar_radius, UNIX_ON_J2000
 
-if os.getenv("HOSTNAME") == "eudoxos.lr.tudelft.nl":
-    spice_base = "/home2/dominik/dev/hpb-project/spice"
-else:
-    spice_base = "/home/dominik/dev/hpb-project/spice"
+# Mission whose kernels are loaded by init_spice_lro()/init_spice_bepicolombo(), None if none
+_loaded_mission: Optional[str] = None
 
 
-def init_spice_lro():
+def get_spice_base() -> str:
+    """
+    Directory containing the SPICE kernels, taken from the SPICE_BASE environment variable (like
+    the simulations) or a default depending on the host.
+    """
+    spice_base = os.getenv("SPICE_BASE")
+    if spice_base:
+        return spice_base.rstrip("/")
+    elif os.getenv("HOSTNAME") == "eudoxos.lr.tudelft.nl":
+        return "/home2/dominik/dev/hpb-project/spice"
+    else:
+        return "/home/dominik/dev/hpb-project/spice"
+
+
+def get_loaded_mission() -> Optional[str]:
+    return _loaded_mission
+
+
+def init_spice_lro(start=None, stop=None):
+    """
+    Unloads all kernels and loads the LRO kernels. If a time window is given, only the SPK and
+    CK files whose coverage overlaps it are loaded (see get_kernel_coverage()).
+
+    Args:
+        start: start of the time window, as ET or UTC string
+        stop: end of the time window, as ET or UTC string
+    """
+    global _loaded_mission
     spice.kclear()
+    _loaded_mission = None
+
+    kernels, files = _get_lro_kernels()
+    for kernel in kernels:
+        spice.furnsh(kernel)
+
+    if start is not None or stop is not None:
+        # CK coverage requires the SCLK and LSK loaded above
+        coverage = get_kernel_coverage(files, f"{get_spice_base()}/lro/data/coverage.json")
+        files = [file for file in files if _overlaps(coverage[file], start, stop)]
+
+    for file in files:
+        spice.furnsh(file)
+
+    _loaded_mission = "lro"
 
+
+def _get_lro_kernels() -> tuple[list[str], list[str]]:
+    """
+    Returns:
+        Paths of the LRO kernels that are always loaded, and of the SPK and CK files
+    """
+    spice_base = get_spice_base()
     lro_spice_base = f"{spice_base}/lro/data"
     generic_spice_base = f"{spice_base}/generic"
 
-    spice.furnsh(f"{lro_spice_base}/lsk/naif0012.tls")
-    spice.furnsh(f"{lro_spice_base}/pck/pck00010.tpc")
-    spice.furnsh(f"{generic_spice_base}/spk/de421.bsp")
-    spice.furnsh(f"{lro_spice_base}/fk/moon_080317.tf")
-    spice.furnsh(f"{lro_spice_base}/pck/moon_pa_de421_1900_2050.bpc")
-    spice.furnsh(f"{lro_spice_base}/fk/lro_frames_2012255_v02.tf")
-    spice.furnsh(f"{lro_spice_base}/sclk/lro_clkcor_2022075_v00.tsc")
+    kernels = [
+        f"{lro_spice_base}/lsk/naif0012.tls",
+        f"{lro_spice_base}/pck/pck00010.tpc",
+        f"{generic_spice_base}/spk/de421.bsp",
+        f"{lro_spice_base}/fk/moon_080317.tf",
+        f"{lro_spice_base}/pck/moon_pa_de421_1900_2050.bpc",
+        f"{lro_spice_base}/fk/lro_frames_2012255_v02.tf",
+        f"{lro_spice_base}/sclk/lro_clkcor_2022075_v00.tsc",
+    ]
+    files = glob.glob(f"{lro_spice_base}/spk/*.bsp") + glob.glob(f"{lro_spice_base}/ck/*.bc")
+    return kernels, files
+
+
+def get_furnished_kernels() -> list[str]:
+    """Paths of the loaded kernel files, in the order they were loaded"""
+    return [spice.kdata(i, "ALL")[0] for i in range(spice.ktotal("ALL"))]
+
+
+def get_kernel_coverage(
+    files: list[str], index_file: Optional[str] = None
+) -> dict[str, list[tuple[float, float]]]:
+    """
+    Determines the time intervals covered by SPK and CK files. The coverage of a file is
+    computed once and stored in index_file, until the size or modification time of the file
+    changes. CK coverage can only be computed with the spacecraft clock kernel loaded.
+
+    Args:
+        files: paths of SPK and CK files
+        index_file: JSON file to store the coverage in, nothing is stored if None
+
+    Returns:
+        Covered (start, stop) intervals in ET by file, for all objects in the file
+    """
+    index = {}
+    if index_file is not None and os.path.exists(index_file):
+        with open(index_file) as f:
+            index = json.load(f)
+
+    coverage = {}
+    changed = False
+    for file in files:
+        stat = os.stat(file)
+        entry = index.get(file)
+        if entry is None or [entry["size"], entry["mtime_ns"]] != [stat.st_size, stat.st_mtime_ns]:
+            entry = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "intervals": _get_coverage_intervals(file),
+            }
+            index[file] = entry
+            changed = True
+
+        coverage[file] = [tuple(interval) for interval in entry["intervals"]]
+
+    if changed and index_file is not None:
+        tmp_index_file = f"{index_file}.tmp-{os.getpid()}"
+        try:
+            with open(tmp_index_file, "w") as f:
+                json.dump(index, f)
+            os.replace(tmp_index_file, index_file)
+        except OSError:
+            # Kernel directory might be read-only
+            pass
+
+    return coverage
+
+
+def _get_coverage_intervals(file: str) -> list[list[float]]:
+    """Union of the coverage of all objects in an SPK or CK file"""
+    kernel_type = spice.getfat(file)[1]
+
+    # Coverage of all objects is added to the same window
+    window = stypes.SPICEDOUBLE_CELL(100000)
+    if kernel_type == "SPK":
+        ids = spice.spkobj(file)
+        for i in range(spice.card(ids)):
+            spice.spkcov(file, ids[i], window)
+    elif kernel_type == "CK":
+        ids = spice.ckobj(file)
+        for i in range(spice.card(ids)):
+            spice.ckcov(file, ids[i], False, "INTERVAL", 0.0, "TDB", window)
+    else:
+        raise Exception(f'Unsupported kernel type "{kernel_type}" of {file}')
+
+    return [list(spice.wnfetd(window, i)) for i in range(spice.wncard(window))]
 
-    for file in glob.glob(f"{lro_spice_base}/spk/*.bsp"):
-        spice.furnsh(file)
-    for file in glob.glob(f"{lro_spice_base}/ck/*.bc"):
-        spice.furnsh(file)
 
+def _overlaps(intervals: list[tuple[float, float]], start, stop) -> bool:
+    start = -np.inf if start is None else start
+    stop = np.inf if stop is None else stop
+    if isinstance(start, str):
+        start = spice.str2et(start)
+    if isinstance(stop, str):
+        stop = spice.str2et(stop)
 
-init_spice_lro()
+    return any(begin <= stop and end >= start for begin, end in intervals)
 
 
 def init_spice_bepicolombo():
+    global _loaded_mission
     spice.kclear()
+    _loaded_mission = None
 
-    bepicolombo_spice_base = f"{spice_base}/bepicolombo/kernels"
+    bepicolombo_spice_base = f"{get_spice_base()}/bepicolombo/kernels"
 
     spice.furnsh(f"{bepicolombo_spice_base}/lsk/naif0012.tls")
     spice.furnsh(f"{bepicolombo_spice_base}/pck/pck00010.tpc")
@@ -51,16 +187,56 @@ def init_spice_bepicolombo():
     for file in glob.glob(f"{bepicolombo_spice_base}/spk/*.bsp"):
         spice.furnsh(file)
 
+    _loaded_mission = "bepicolombo"
+
 
-def generate_lro_ephemeris(timestamps):
-    ephemeris = spice.spkezr("LRO", timestamps, "ECLIPJ2000", "NONE", "Moon")[0]
+def init_spice_time():
+    """
+    Only loads the leap second kernel, which is all time conversions need. Other kernels that are
+    already loaded are kept.
+    """
+    spice.furnsh(f"{get_spice_base()}/lro/data/lsk/naif0012.tls")
+
+
+def _ensure_spice_mission():
+    """
+    Loads the LRO kernels on first use, unless kernels of a mission were loaded explicitly.
+    Unlike init_spice_lro(), kernels that were loaded by hand are kept and not loaded again.
+    """
+    global _loaded_mission
+    if _loaded_mission is not None:
+        return
+
+    furnished = {os.path.abspath(kernel) for kernel in get_furnished_kernels()}
+    kernels, files = _get_lro_kernels()
+    for kernel in kernels + files:
+        if os.path.abspath(kernel) not in furnished:
+            spice.furnsh(kernel)
+    _loaded_mission = "lro"
+
+
+def _ensure_spice_time():
+    """Loads the leap second kernel on first use, unless leap seconds were loaded already"""
+    if not spice.expool("DELTET/DELTA_AT"):
+        init_spice_time()
+
+
+def generate_lro_ephemeris(timestamps, use_cache=True, n_workers=1):
+    """
+    Loads the SPICE states of LRO w.r.t. the Moon. See get_states() for the caching and parallel
+    generation.
+
+    Returns:
+        DataFrame with UTC datetime index, "t_et" column and positions/velocities in m and m/s
+    """
+    ephemeris = get_states("LRO", "Moon", timestamps, use_cache=use_cache, n_workers=n_workers)
 
     colnames = ["pos_x", "pos_y", "pos_z", "vel_x", "vel_y", "vel_z"]
 
     df = pd.DataFrame(ephemeris, index=timestamps, columns=colnames)
     df["t_et"] = df.index
     df[colnames] *= 1e3
-    df.index = pd.to_datetime(df["t_et"].apply(lambda t: as_utc(t, sec_prec=6))).rename("t")
+    df.index = as_utc_datetime(df["t_et"]).rename("t")
 
     df["r"] = np.sqrt(np.square(df[["pos_x", "pos_y", "pos_z"]]).sum(axis=1))
     df["h"] = df["r"] - moon_polar_radius
@@ -68,7 +244,127 @@ def generate_lro_ephemeris(timestamps):
     return df
 
 
+def get_states(
+    target: str,
+    observer: str,
+    times,
+    frame="ECLIPJ2000",
+    use_cache=True,
+    n_workers=1,
+    chunk_size=10000,
+) -> np.ndarray:
+    """
+    Geometric states of target w.r.t. observer, like spkezr without aberration correction. The
+    states are cached on disk by target, observer, frame, time grid and loaded kernels (see
+    get_cache_key() and get_ephemeris_cache_dir()), so repeated queries of the same epochs do not
+    use SPICE.
+
+    Args:
+        target: name of the target body
+        observer: name of the observing body
+        times: ephemeris times
+        frame: reference frame of the states
+        use_cache: read and write the cache
+        n_workers: number of processes to generate the states with
+        chunk_size: number of epochs per process task
+
+    Returns:
+        (N, 6) array of positions and velocities in km and km/s
+    """
+    times = np.atleast_1d(np.asarray(times, dtype=float))
+
+    cache_file = (
+        get_ephemeris_cache_dir() / f"{_get_ephemeris_key(target, observer, frame, times)}.npy"
+    )
+    if use_cache and cache_file.exists():
+        return np.load(cache_file)
+
+    _ensure_spice_mission()
+    chunks = [times[i : i + chunk_size] for i in range(0, len(times), chunk_size)]
+    get_chunk_states = partial(_get_states_chunk, target, observer, frame)
+    if n_workers == 1 or len(chunks) <= 1:
+        states = list(map(get_chunk_states, chunks))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_spice_worker,
+            initargs=(_loaded_mission, _get_loaded_kernel_files()),
+        ) as executor:
+            states = list(executor.map(get_chunk_states, chunks))
+    states = np.concatenate(states) if states else np.empty((0, 6))
+
+    if use_cache:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_cache_file = cache_file.with_name(f"{cache_file.stem}.tmp-{os.getpid()}.npy")
+            np.save(tmp_cache_file, states)
+            tmp_cache_file.replace(cache_file)
+        except OSError:
+            pass
+
+    return states
+
+
+def get_cache_dir(name: str) -> Path:
+    """Directory of a cache of SPICE results, in LROPY_CACHE if set or ~/.cache/lropy otherwise"""
+    cache_base = os.getenv("LROPY_CACHE")
+    cache_base = Path(cache_base) if cache_base else Path.home() / ".cache" / "lropy"
+    return cache_base / name
+
+
+def get_ephemeris_cache_dir() -> Path:
+    return get_cache_dir("ephemeris")
+
+
+def get_cache_key(*parts, arrays: Iterable[np.ndarray] = ()) -> str:
+    """
+    Key of a cached SPICE result, from JSON-serializable parts and arrays of its inputs. The
+    loaded mission and the paths, sizes and modification times of the loaded kernels are part of
+    every key, so results are computed again when the kernels change.
+    """
+    # Lazy initialization loads the LRO kernels
+    mission = _loaded_mission or "lro"
+
+    key = hashlib.sha1(json.dumps([*parts, mission, _get_kernel_fingerprints()]).encode())
+    for array in arrays:
+        key.update(np.ascontiguousarray(array).tobytes())
+    return key.hexdigest()
+
+
+def _get_kernel_fingerprints() -> list[list]:
+    """[path, size, modification time] of the kernels that are loaded or loaded lazily"""
+    kernels = [os.path.abspath(kernel) for kernel in get_furnished_kernels()]
+    if _loaded_mission is None:
+        # The kernels that _ensure_spice_mission() will load
+        furnished = set(kernels)
+        lro_kernels, lro_files = _get_lro_kernels()
+        kernels += [
+            os.path.abspath(kernel)
+            for kernel in lro_kernels + lro_files
+            if os.path.abspath(kernel) not in furnished
+        ]
+
+    fingerprints = []
+    for kernel in kernels:
+        try:
+            stat = os.stat(kernel)
+            fingerprints.append([kernel, stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            fingerprints.append([kernel, None, None])
+    return fingerprints
+
+
+def _get_ephemeris_key(target: str, observer: str, frame: str, times: np.ndarray) -> str:
+    return get_cache_key(target, observer, frame, arrays=[times])
+
+
+def _get_states_chunk(target: str, observer: str, frame: str, times: np.ndarray) -> np.ndarray:
+    _ensure_spice_mission()
+    return np.array(spice.spkezr(target, times, frame, "NONE", observer)[0]).reshape(-1, 6)
+
+
 def get_lro_orbital_plane_normal(t):
+    _ensure_spice_mission()
     state = spice.spkezr("LRO", t, "ECLIPJ2000", "NONE", "Moon")[0]
     normal = np.cross(state[:3], state[3:])  # angular momentum vector
     return normal / np.linalg.norm(normal)
@@ -92,10 +388,29 @@ def get_frame(body):
 
 
 def get_distance(first, second, time):
+    _ensure_spice_mission()
     return np.linalg.norm(spice.spkpos(first, time, "ECLIPJ2000", "NONE", second)[0]) * 1e3
 
 
-def calculate_eclipses(occulted, occulting, observer, start, stop):
+def calculate_eclipses(occulted, occulting, observer, start, stop, n_workers=1, n_chunks=None):
+    """
+    Finds the intervals in which occulted is fully, annularly or partially occulted by occulting
+    as seen from observer.
+
+    Args:
+        occulted: name of the occulted body, e.g. "Sun"
+        occulting: name of the occulting body
+        observer: name of the observer
+        start: start of the search window, as ET or UTC string
+        stop: end of the search window, as ET or UTC string
+        n_workers: number of processes to search with. The search window is split into chunks,
+            which are searched in parallel, and intervals at the chunk borders are merged.
+        n_chunks: number of chunks, four per worker by default
+
+    Returns:
+        Sorted list of (start, stop, type) intervals
+    """
+    _ensure_spice_mission()
     stepsize = 300.0
 
     if isinstance(start, str):
@@ -103,12 +418,47 @@ def calculate_eclipses(occulted, occulting, observer, start, stop):
     if isinstance(stop, str):
         stop = spice.str2et(stop)
 
+    if n_workers == 1:
+        return _calculate_eclipses_window(occulted, occulting, observer, start, stop, stepsize)
+
+    if n_chunks is None:
+        n_chunks = 4 * n_workers
+    # Chunks shorter than the step size would search the same steps multiple times
+    n_chunks = max(min(n_chunks, int((stop - start) // stepsize)), 1)
+    borders = np.linspace(start, stop, n_chunks + 1)
+    borders[-1] = stop
+
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        initializer=_init_spice_worker,
+        initargs=(_loaded_mission, _get_loaded_kernel_files()),
+    ) as executor:
+        chunks = executor.map(
+            partial(
+                _calculate_eclipses_window,
+                occulted,
+                occulting,
+                observer,
+                stepsize=stepsize,
+            ),
+            borders[:-1],
+            borders[1:],
+        )
+        occultations = [occultation for chunk in chunks for occultation in chunk]
+
+    return _merge_occultations(sorted(occultations), borders[1:-1])
+
+
+def _calculate_eclipses_window(occulted, occulting, observer, start, stop, stepsize):
     confine = stypes.SPICEDOUBLE_CELL(2)
     spice.wninsd(start, stop, confine)
 
+    # Every window starts within a different search step, which bounds the number of windows
+    max_windows = int(np.ceil((stop - start) / stepsize)) + 2
+
     occultations = []
     for occ_type in ["FULL", "ANNULAR", "PARTIAL"]:
-        occultation_windows = stypes.SPICEDOUBLE_CELL(10000)
+        occultation_windows = stypes.SPICEDOUBLE_CELL(2 * max_windows)
         spice.gfoclt(
             occ_type,
             occulting,
@@ -132,15 +482,63 @@ def calculate_eclipses(occulted, occulting, observer, start, stop):
     return occultations
 
 
+def _merge_occultations(occultations: list[tuple[float, float, str]], borders) -> list:
+    """Merges intervals of the same type that were split at chunk borders"""
+    borders = set(borders)
+    # Index of the last merged interval of each type
+    last = {}
+    merged = []
+    for begin, end, occ_type in occultations:
+        i = last.get(occ_type)
+        if i is not None and merged[i][1] == begin and begin in borders:
+            merged[i] = (merged[i][0], end, occ_type)
+        else:
+            last[occ_type] = len(merged)
+            merged.append((begin, end, occ_type))
+
+    merged.sort()
+    return merged
+
+
+def _get_loaded_kernel_files() -> list[str]:
+    """Kernel files that were furnished directly, i.e. not through a meta-kernel"""
+    kernels = []
+    for i in range(spice.ktotal("ALL")):
+        file, _, source, _ = spice.kdata(i, "ALL")
+        if not source:
+            kernels.append(file)
+    return kernels
+
+
+def _init_spice_worker(mission: Optional[str], kernels: list[str]):
+    """
+    Loads the kernels of the parent process in worker processes that did not inherit them, i.e.
+    that were not forked.
+
+    Args:
+        mission: loaded mission of the parent
+        kernels: _get_loaded_kernel_files() of the parent
+    """
+    global _loaded_mission
+    if _get_loaded_kernel_files() != kernels:
+        spice.kclear()
+        for kernel in kernels:
+            spice.furnsh(kernel)
+    _loaded_mission = mission
+
+
 def rotate_frame(from_frame, to_frame, time):
+    _ensure_spice_mission()
     return spice.pxform(from_frame, to_frame, time)
 
 
 def as_et(time):
+    _ensure_spice_time()
     return spice.str2et(time)
 
 
 def as_utc(time, sec_prec=0):
+    _ensure_spice_time()
     sec_fmt = ""
     if sec_prec > 0:
         sec_fmt = "." + sec_prec * "#"
@@ -149,4 +547,94 @@ def as_utc(time, sec_prec=0):
 
 
 def as_tdb(time):
+    _ensure_spice_time()
     return spice.timout(time, "YYYY-MM-DD HR:MN:SC TDB ::TDB")
+
+
+def as_utc_datetime(times) -> pd.DatetimeIndex:
+    """
+    Converts ephemeris times to UTC datetimes. This gives the same result as parsing
+    as_utc(t, sec_prec=6) for each element (up to rare off-by-one microsecond truncations due to
+    floating-point rounding), but operates on the whole array at once using the leap second table
+    of the loaded LSK.
+
+    Args:
+        times: single or multiple ephemeris times
+
+    Returns:
+        UTC datetimes, truncated to microseconds
+    """
+    _ensure_spice_time()
+    et = np.atleast_1d(np.asarray(times, dtype=float))
+    delta_t_a, k, eb, m, leapseconds_tai, delta_at = _get_time_constants()
+
+    # ET - TAI, see DELTET
+    mean_anomaly = m[0] + m[1] * et
+    eccentric_anomaly = mean_anomaly + eb * np.sin(mean_anomaly)
+    tai = et - delta_t_a - k * np.sin(eccentric_anomaly)
+
+    # Number of leap seconds that have occurred before each epoch, SPICE assumes one less than the
+    # first table entry for epochs before 1972
+    leapsecond_idx = np.searchsorted(leapseconds_tai, tai, side="right") - 1
+    n_leapseconds = np.where(leapsecond_idx >= 0, delta_at[leapsecond_idx], delta_at[0] - 1)
+
+    utc = tai - n_leapseconds
+
+    # Truncate to microseconds like TIMOUT
+    seconds = np.floor(utc)
+    microseconds = np.floor((utc - seconds) * 1e6)
+    unix_microseconds = (seconds + UNIX_ON_J2000) * 1e6 + microseconds
+
+    return pd.to_datetime(unix_microseconds.astype(np.int64), unit="us", utc=True)
+
+
+def as_et_array(times) -> np.ndarray:
+    """
+    Converts UTC datetimes to ephemeris times, the inverse of as_utc_datetime(). Like it, this
+    uses the leap second table of the loaded LSK for the whole array at once.
+
+    Args:
+        times: single or multiple datetimes, naive datetimes are in UTC
+
+    Returns:
+        Ephemeris times
+    """
+    _ensure_spice_time()
+    times = pd.DatetimeIndex(np.atleast_1d(times))
+    if times.tz is not None:
+        times = times.tz_convert(None)
+    delta_t_a, k, eb, m, leapseconds_tai, delta_at = _get_time_constants()
+
+    # Seconds past J2000 in integer microseconds, floats of Unix time lose microseconds
+    unix_microseconds = times.as_unit("us").asi8
+    seconds = unix_microseconds // 10**6 - UNIX_ON_J2000
+    utc = seconds + (unix_microseconds % 10**6) * 1e-6
+
+    leapsecond_idx = np.searchsorted(leapseconds_tai - delta_at, utc, side="right") - 1
+    n_leapseconds = np.where(leapsecond_idx >= 0, delta_at[leapsecond_idx], delta_at[0] - 1)
+    tai = utc + n_leapseconds
+
+    # ET - TAI depends on ET itself, its periodic term is below 2 ms so two iterations converge
+    et = tai + delta_t_a
+    for _ in range(2):
+        mean_anomaly = m[0] + m[1] * et
+        eccentric_anomaly = mean_anomaly + eb * np.sin(mean_anomaly)
+        et = tai + delta_t_a + k * np.sin(eccentric_anomaly)
+
+    return et
+
+
+def _get_time_constants():
+    """Reads the time conversion constants from the loaded leap second kernel"""
+    delta_t_a = spice.gdpool("DELTET/DELTA_T_A", 0, 1)[0]
+    k = spice.gdpool("DELTET/K", 0, 1)[0]
+    eb = spice.gdpool("DELTET/EB", 0, 1)[0]
+    m = spice.gdpool("DELTET/M", 0, 2)
+
+    # Alternating number of leap seconds and UTC epoch (in seconds past J2000) they take effect
+    n_delta_at = spice.dtpool("DELTET/DELTA_AT")[0]
+    delta_at_table = spice.gdpool("DELTET/DELTA_AT", 0, n_delta_at).reshape(-1, 2)
+    delta_at = delta_at_table[:, 0]
+    leapseconds_tai = delta_at_table[:, 1] + delta_at
+
+    return delta_t_a, k, eb, m, leapseconds_tai, delta_at
@@ -0,0 +1,163 @@
+import json
+from collections.abc import Mapping, Iterable, Callable
+from pathlib import Path
+from typing import Union, Optional, Any
+
+import numpy as np
+import pandas as pd
+
+from lropy.analysis.columnar import write_columns, read_columns
+
+
+class ResultsStore:
+    """
+    Partitioned store for processed simulation results. The metadata of all runs is kept in a
+    single JSON lines table and every run in its own columnar directory, so runs can be appended
+    without rewriting existing data and loaded selectively without unpickling anything.
+    """
+
+    path: Path
+
+    def __init__(self, path: Union[Path, str]):
+        if isinstance(path, str):
+            path = Path(path)
+        self.path = path
+
+    @property
+    def metadata_file(self) -> Path:
+        return self.path / "metadata.jsonl"
+
+    @property
+    def runs_dir(self) -> Path:
+        return self.path / "runs"
+
+    def exists(self) -> bool:
+        return self.metadata_file.exists()
+
+    def append(
+        self,
+        metadata: pd.DataFrame,
+        runs: Optional[Mapping[int, pd.DataFrame]] = None,
+        fingerprints: Optional[Mapping[int, Any]] = None,
+    ):
+        """
+        Adds runs to the store. Runs that are already stored are replaced.
+
+        Args:
+            metadata: metadata indexed by run number
+            runs: run DataFrames by run number
+            fingerprints: fingerprints of the run directories by run number, used to detect
+                changed runs in update_results_store()
+        """
+        # Write runs before their metadata, so readers only see complete runs
+        if runs is not None:
+            for run_no, run in runs.items():
+                self.write_run(run_no, run)
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        with self.metadata_file.open("a") as f:
+            for run_no, row in metadata.iterrows():
+                entry = {"run_no": int(run_no), "metadata": row.to_dict()}
+                if fingerprints is not None:
+                    entry["fingerprint"] = fingerprints[run_no]
+                f.write(json.dumps(entry, default=_to_json) + "\n")
+
+    def write_run(self, run_no: int, run: pd.DataFrame):
+        """Writes only the run data, which is not visible until its metadata is appended"""
+        self.runs_dir.mkdir(parents=True, exist_ok=True)
+        write_columns(self.runs_dir / str(run_no), run)
+
+    def _load_entries(self) -> dict[int, dict[str, Any]]:
+        entries = {}
+        if not self.exists():
+            return entries
+
+        with self.metadata_file.open() as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                # Later entries replace earlier ones of the same run
+                entries[entry["run_no"]] = entry
+        return entries
+
+    def load_fingerprints(self) -> dict[int, Any]:
+        return {run_no: entry.get("fingerprint") for run_no, entry in self._load_entries().items()}
+
+    def load_metadata(self) -> pd.DataFrame:
+        metadata = {run_no: entry["metadata"] for run_no, entry in self._load_entries().items()}
+
+        metadata = pd.DataFrame(metadata).T
+        metadata.sort_index(inplace=True)
+        return metadata
+
+    def select(self, where: Callable[[pd.DataFrame], Any]) -> list[int]:
+        """
+        Finds runs by metadata predicate, e.g. lambda m: m["target_type"] == "Paneled"
+
+        Returns:
+            Numbers of runs for which the predicate holds
+        """
+        metadata = self.load_metadata()
+        return list(metadata.index[np.asarray(where(metadata), dtype=bool)])
+
+    def has_run(self, run_no: int) -> bool:
+        return (self.runs_dir / str(run_no)).exists()
+
+    def load_run(
+        self, run_no: int, columns: Optional[Iterable[str]] = None, mmap=True
+    ) -> pd.DataFrame:
+        return read_columns(self.runs_dir / str(run_no), columns, mmap)
+
+    def load_runs(
+        self,
+        run_numbers: Optional[Iterable[int]] = None,
+        where: Optional[Callable[[pd.DataFrame], Any]] = None,
+        columns: Optional[Iterable[str]] = None,
+        mmap=True,
+    ) -> dict[int, pd.DataFrame]:
+        """
+        Loads stored runs, all of them if neither run_numbers nor where are given.
+
+        Args:
+            run_numbers: numbers of runs to load
+            where: metadata predicate selecting runs to load (see select())
+            columns: names of columns to load
+            mmap: memory-map the run data
+
+        Returns:
+            Runs by run number
+        """
+        if run_numbers is None:
+            run_numbers = self.load_metadata().index
+        run_numbers = set(run_numbers)
+        if where is not None:
+            run_numbers &= set(self.select(where))
+
+        return {
+            run_no: self.load_run(run_no, columns, mmap)
+            for run_no in sorted(run_numbers)
+            if self.has_run(run_no)
+        }
+
+
+def _to_json(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def load_stored_simulation_results(
+    results_base: Union[Path, str],
+    run_numbers: Optional[Iterable[int]] = None,
+    where: Optional[Callable[[pd.DataFrame], Any]] = None,
+    columns: Optional[Iterable[str]] = None,
+) -> tuple[pd.DataFrame, dict[int, pd.DataFrame]]:
+    """Loads metadata and (selected) runs from the results store of a results directory"""
+    if isinstance(results_base, str):
+        results_base = Path(results_base)
+
+    store = ResultsStore(results_base / "results")
+    return store.load_metadata(), store.load_runs(run_numbers, where, columns)
@@ -0,0 +1,239 @@
+import warnings
+from pathlib import Path
+from typing import Callable, Union
+
+import numpy as np
+from numpy.polynomial import chebyshev
+
+from lropy.analysis.spice_tools import get_states
+from lropy.analysis.transform import dot_rows, norm_rows
+
+
+class ChebyshevEphemeris:
+    """
+    Piecewise Chebyshev interpolation of the states of a body, as fast replacement for SPICE in
+    geometry surveys. Segments are split until the interpolation error on a check grid between
+    and around the interpolation nodes is within the tolerances, see fit().
+    """
+
+    boundaries: np.ndarray
+    position_coefficients: np.ndarray
+    velocity_coefficients: np.ndarray
+    position_error: float
+    velocity_error: float
+
+    def __init__(
+        self,
+        boundaries: np.ndarray,
+        position_coefficients: np.ndarray,
+        velocity_coefficients: np.ndarray,
+        position_error=np.nan,
+        velocity_error=np.nan,
+    ):
+        """
+        Args:
+            boundaries: (M + 1,) epochs between the M segments
+            position_coefficients: (M, degree + 1, 3) Chebyshev coefficients of the positions
+            velocity_coefficients: (M, degree + 1, 3) Chebyshev coefficients of the velocities
+            position_error: maximum position error on the check grid
+            velocity_error: maximum velocity error on the check grid
+        """
+        self.boundaries = boundaries
+        self.position_coefficients = position_coefficients
+        self.velocity_coefficients = velocity_coefficients
+        self.position_error = position_error
+        self.velocity_error = velocity_error
+
+    @classmethod
+    def fit(
+        cls,
+        state_function: Callable[[np.ndarray], np.ndarray],
+        start: float,
+        stop: float,
+        degree=12,
+        segment_length=3600.0,
+        position_tolerance=1e-3,
+        velocity_tolerance=1e-6,
+        max_splits=20,
+        checks_per_interval=4,
+    ) -> "ChebyshevEphemeris":
+        """
+        Fits segments to the states of state_function. All segments of a refinement level are
+        sampled with a single call of state_function. Segments whose error exceeds a tolerance
+        on the check grid are split in half. The check grid has equally spaced points between
+        each pair of neighboring nodes and between the outer nodes and the segment boundaries,
+        which are checked as well. A warning with the achieved error is issued if segments
+        still exceed a tolerance after max_splits.
+
+        Args:
+            state_function: returns (N, 6) states for N epochs
+            start: first epoch
+            stop: last epoch
+            degree: degree of the Chebyshev polynomials
+            segment_length: initial length of the segments
+            position_tolerance: maximum norm of the position error
+            velocity_tolerance: maximum norm of the velocity error
+            max_splits: maximum number of times a segment can be split
+            checks_per_interval: number of check points between neighboring nodes
+
+        Returns:
+            Fitted ephemeris
+        """
+        n_segments = max(int(np.ceil((stop - start) / segment_length)), 1)
+        boundaries = np.linspace(start, stop, n_segments + 1)
+        pending = np.column_stack([boundaries[:-1], boundaries[1:]])
+
+        # Interpolation nodes and check points in between, on [-1, 1]. The nodes do not include
+        # the boundaries, where the error is largest.
+        nodes = np.sort(chebyshev.chebpts1(degree + 1))
+        edges = np.concatenate([[-1.0], nodes, [1.0]])
+        fractions = np.arange(1, checks_per_interval + 1) / (checks_per_interval + 1)
+        checks = (edges[:-1, None] + np.diff(edges)[:, None] * fractions).ravel()
+        checks = np.concatenate([[-1.0], checks, [1.0]])
+
+        segments = []
+        position_coefficients = []
+        velocity_coefficients = []
+        position_error = 0.0
+        velocity_error = 0.0
+        for split in range(max_splits + 1):
+            begin, end = pending[:, :1], pending[:, 1:]
+            n = len(pending)
+
+            states = state_function(_to_epochs(np.concatenate([nodes, checks]), begin, end))
+            states = states.reshape(n, len(nodes) + len(checks), 6)
+            node_states, check_states = states[:, : len(nodes)], states[:, len(nodes) :]
+
+            # All segments share the nodes on [-1, 1], so they are fitted at once
+            coefficients = chebyshev.chebfit(
+                nodes, node_states.transpose(1, 0, 2).reshape(len(nodes), -1), degree
+            )
+            coefficients = coefficients.reshape(degree + 1, n, 6)
+
+            # (n, 6, n_checks) values at the check points
+            errors = chebyshev.chebval(checks, coefficients).transpose(0, 2, 1) - check_states
+            coefficients = coefficients.transpose(1, 0, 2)
+            segment_position_error = np.linalg.norm(errors[..., :3], axis=-1).max(axis=1)
+            segment_velocity_error = np.linalg.norm(errors[..., 3:], axis=-1).max(axis=1)
+
+            accepted = (segment_position_error <= position_tolerance) & (
+                segment_velocity_error <= velocity_tolerance
+            )
+            if split == max_splits and not accepted.all():
+                warnings.warn(
+                    f"{np.count_nonzero(~accepted)} segments exceed the tolerances after "
+                    f"{max_splits} splits, with position error "
+                    f"{segment_position_error.max():.3g} and velocity error "
+                    f"{segment_velocity_error.max():.3g}"
+                )
+                accepted[:] = True
+
+            segments.append(pending[accepted])
+            position_coefficients.append(coefficients[accepted, :, :3])
+            velocity_coefficients.append(coefficients[accepted, :, 3:])
+            if accepted.any():
+                position_error = max(position_error, segment_position_error[accepted].max())
+                velocity_error = max(velocity_error, segment_velocity_error[accepted].max())
+
+            rejected = pending[~accepted]
+            if len(rejected) == 0:
+                break
+            middle = (rejected[:, 0] + rejected[:, 1]) / 2
+            pending = np.concatenate(
+                [
+                    np.column_stack([rejected[:, 0], middle]),
+                    np.column_stack([middle, rejected[:, 1]]),
+                ]
+            )
+
+        segments = np.concatenate(segments)
+        order = np.argsort(segments[:, 0])
+        return cls(
+            np.append(segments[order, 0], segments[order[-1], 1]),
+            np.concatenate(position_coefficients)[order],
+            np.concatenate(velocity_coefficients)[order],
+            position_error,
+            velocity_error,
+        )
+
+    @classmethod
+    def fit_spice(
+        cls, target: str, observer: str, start: float, stop: float, frame="ECLIPJ2000", **kwargs
+    ) -> "ChebyshevEphemeris":
+        """Fits the SPICE states of target w.r.t. observer, see fit() for the other arguments"""
+        return cls.fit(
+            lambda times: get_states(target, observer, times, frame, use_cache=False),
+            start,
+            stop,
+            **kwargs,
+        )
+
+    def position(self, times) -> np.ndarray:
+        """Positions at the given epochs as (N, 3) array"""
+        return self._evaluate(self.position_coefficients, times)
+
+    def velocity(self, times) -> np.ndarray:
+        """Velocities at the given epochs as (N, 3) array"""
+        return self._evaluate(self.velocity_coefficients, times)
+
+    def state(self, times) -> np.ndarray:
+        """States at the given epochs as (N, 6) array, like get_states()"""
+        return np.hstack([self.position(times), self.velocity(times)])
+
+    def _evaluate(self, coefficients: np.ndarray, times) -> np.ndarray:
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        if np.any(times < self.boundaries[0]) or np.any(times > self.boundaries[-1]):
+            raise ValueError("Epochs outside of the fitted interval")
+
+        segment = np.searchsorted(self.boundaries, times, side="right") - 1
+        segment = np.clip(segment, 0, len(self.boundaries) - 2)
+        begin = self.boundaries[segment]
+        end = self.boundaries[segment + 1]
+        x = (2 * (times - begin) / (end - begin) - 1)[:, None]
+
+        # Clenshaw recurrence, gathering the coefficients of one degree at a time
+        b1 = np.zeros((len(times), 3))
+        b2 = np.zeros((len(times), 3))
+        for k in range(coefficients.shape[1] - 1, 0, -1):
+            b1, b2 = 2 * x * b1 - b2 + coefficients[segment, k], b1
+        return x * b1 - b2 + coefficients[segment, 0]
+
+    def save(self, path: Union[Path, str]):
+        np.savez(
+            path,
+            boundaries=self.boundaries,
+            position_coefficients=self.position_coefficients,
+            velocity_coefficients=self.velocity_coefficients,
+            errors=np.array([self.position_error, self.velocity_error]),
+        )
+
+    @classmethod
+    def load(cls, path: Union[Path, str]) -> "ChebyshevEphemeris":
+        with np.load(path) as data:
+            return cls(
+                data["boundaries"],
+                data["position_coefficients"],
+                data["velocity_coefficients"],
+                *data["errors"],
+            )
+
+
+def _to_epochs(x: np.ndarray, begin: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """Maps points on [-1, 1] to every segment, as flat array ordered by segment"""
+    return (begin + (x + 1) / 2 * (end - begin)).ravel()
+
+
+def get_beta_angle(lro: ChebyshevEphemeris, sun: ChebyshevEphemeris, times) -> np.ndarray:
+    """Same as spice_tools.get_lro_beta_angle(), with the states of LRO and the Sun w.r.t. the Moon"""
+    normal = np.cross(lro.position(times), lro.velocity(times))
+    normal /= norm_rows(normal)[:, None]
+
+    sun_pos = sun.position(times)
+    sun_dir = sun_pos / norm_rows(sun_pos)[:, None]
+
+    return np.degrees(np.arccos(dot_rows(sun_dir, normal))) - 90
+
+
+def get_distance(ephemeris: ChebyshevEphemeris, times) -> np.ndarray:
+    """Same as spice_tools.get_distance(), with the states of one body w.r.t. the other"""
+    return norm_rows(ephemeris.position(times)) * 1e3
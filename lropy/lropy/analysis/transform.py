@@ -10,14 +10,35 @@ def spher2cart(radius, polar, azimuth):
     return x, y, z
 
 
+def spher2cart_batch(radius, polar, azimuth):
+    """Same as spher2cart, but returns an (N, 3) array of vectors"""
+    vec = np.empty(np.broadcast_shapes(np.shape(radius), np.shape(polar), np.shape(azimuth)) + (3,))
+    sin_polar = np.sin(polar)
+    np.multiply(radius * np.cos(azimuth), sin_polar, out=vec[..., 0])
+    np.multiply(radius * np.sin(azimuth), sin_polar, out=vec[..., 1])
+    np.multiply(radius, np.cos(polar), out=vec[..., 2])
+
+    return vec
+
+
 def cart2spher(x, y, z):
-    radius = np.linalg.norm([x, y, z])
+    # Element-wise, so x, y and z can also be arrays of coordinates
+    radius = np.sqrt(np.square(x) + np.square(y) + np.square(z))
     polar = np.arccos(z / radius)
     azimuth = np.arctan2(y, x)
 
     return radius, polar, azimuth
 
 
+def cart2spher_batch(vec):
+    """Same as cart2spher, but for an (N, 3) array of vectors"""
+    radius = norm_rows(vec)
+    polar = np.arccos(vec[:, 2] / radius)
+    azimuth = np.arctan2(vec[:, 1], vec[:, 0])
+
+    return radius, polar, azimuth
+
+
 def cart2track(acc, vel, pos):
     radialUnit = pos / np.linalg.norm(pos)
     alongTrackUnit = vel - radialUnit * (vel @ radialUnit)
@@ -29,6 +50,29 @@ def cart2track(acc, vel, pos):
     return acc.dot(radialUnit), acc.dot(alongTrackUnit), acc.dot(crossTrackUnit)
 
 
+def cart2track_batch(acc, vel, pos):
+    """Same as cart2track, but for (N, 3) arrays of vectors"""
+    radialUnit = pos / norm_rows(pos)[:, None]
+    alongTrackUnit = vel - radialUnit * dot_rows(vel, radialUnit)[:, None]
+    alongTrackUnit /= norm_rows(alongTrackUnit)[:, None]
+    crossTrackUnit = np.cross(radialUnit, alongTrackUnit)
+
+    return (
+        dot_rows(acc, radialUnit),
+        dot_rows(acc, alongTrackUnit),
+        dot_rows(acc, crossTrackUnit),
+    )
+
+
+def dot_rows(a, b):
+    # Stacked matmul uses the same dot kernel as the 1D case, giving bit-identical results
+    return np.matmul(a[:, None, :], b[:, :, None])[:, 0, 0]
+
+
+def norm_rows(a):
+    return np.sqrt(dot_rows(a, a))
+
+
 def align_vectors(from_vec, to_vec):
     # From https://stackoverflow.com/a/67767180
     a, b = (from_vec / np.linalg.norm(from_vec)).reshape(3), (
@@ -42,3 +86,37 @@ def align_vectors(from_vec, to_vec):
         return np.eye(3) + kmat + kmat.dot(kmat) * ((1 - c) / (s**2))
     else:
         return np.eye(3)  # cross of all zeros only occurs on identical directions
+
+
+def align_vectors_batch(from_vec, to_vec):
+    """
+    Same as align_vectors, but for (N, 3) arrays of vectors. Either argument can also be a single
+    vector, which is then aligned with/to all vectors of the other.
+
+    Returns:
+        (N, 3, 3) array of rotation matrices
+    """
+    from_vec, to_vec = np.broadcast_arrays(np.atleast_2d(from_vec), np.atleast_2d(to_vec))
+    a = from_vec / norm_rows(from_vec)[:, None]
+    b = to_vec / norm_rows(to_vec)[:, None]
+    v = np.cross(a, b)
+    c = dot_rows(a, b)
+    s_squared = dot_rows(v, v)
+
+    # kmat @ kmat = v v^T - s^2 I, so the rotation is c I + kmat + v v^T (1 - c) / s^2
+    rotation = np.einsum("ni,nj->nij", v, v)
+    # Cross of all zeros only occurs on identical directions, the rotation is then I
+    aligned = s_squared == 0
+    factor = np.divide(1 - c, s_squared, out=np.zeros_like(c), where=~aligned)
+    rotation *= factor[:, None, None]
+
+    diagonal = np.einsum("nii->ni", rotation)
+    diagonal += np.where(aligned, 1, c)[:, None]
+    rotation[:, 0, 1] -= v[:, 2]
+    rotation[:, 0, 2] += v[:, 1]
+    rotation[:, 1, 0] += v[:, 2]
+    rotation[:, 1, 2] -= v[:, 0]
+    rotation[:, 2, 0] -= v[:, 1]
+    rotation[:, 2, 1] += v[:, 0]
+
+    return rotation
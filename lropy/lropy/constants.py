@@ -3,6 +3,7 @@ moon_radius = 1737.4e3  # m
 earth_equatorial_radius = 6378e3  # m
 JULIAN_DAY = 86400.0  # s
 JULIAN_DAY_ON_J2000 = 2451545.0  # s
+UNIX_ON_J2000 = 946728000.0  # s, 2000-01-01 12:00:00 UTC
 c = 299792458  # m/s
 lro_period = 6781.7  # s, about 113.03 min
 astronomical_unit = 1.495978707e11  # m
@@ -1,4 +1,5 @@
 import os
+import sys
 
 os.environ["OPENBLAS_NUM_THREADS"] = "1"
 os.environ["MKL_NUM_THREADS"] = "1"
@@ -6,24 +7,18 @@ os.environ["NUMEXPR_NUM_THREADS"] = "1"
 os.environ["OMP_NUM_THREADS"] = "1"
 os.environ["VECLIB_MAXIMUM_THREADS"] = "1"
 
-import pickle
-
-from lropy.analysis.io import load_all_simulation_results
+from lropy.analysis.io import update_results_store
+from lropy.run.admission import AdmissionController
+from lropy.run.async_runner import AsyncRunner
 from lropy.run.runner import Runner
 from lropy.run.configurator import *
+from lropy.run.configurator import results_base
+from lropy.run.scheduler import CostModel
 
 if __name__ == "__main__":
-    if os.getenv("HOSTNAME") == "eudoxos.lr.tudelft.nl":
-        n_threads = 42
-    else:
-        n_threads = 4
-
-    # if get_average_load() > 0.2:
-    #     # Prevent interference with other users
-    #     print(f"Current average load of {get_average_load()} too high")
-    #     sys.exit(-1)
-
-    runner = Runner(n_threads)
+    # Upper bound of concurrent runs, the admission controller adapts it to the load and free
+    # memory of the server
+    n_threads = os.cpu_count()
 
     # configurator = SingleConfigurator()
     configurator = FullConfigurator()
@@ -32,15 +27,25 @@ if __name__ == "__main__":
     # configurator = AlbedoThermalConfigurator()
     # configurator = StaticVsDynamicConfigurator()
 
-    runs = configurator.get_runs()
+    # Continue the latest sweep of the configuration with --resume
+    runs = configurator.get_runs(resume="--resume" in sys.argv)
     # for run in runs:
     #     print(run.as_json())
 
+    # Pause starting new runs with `touch <results dir>/pause` or `kill -USR1 <pid>`, resume by
+    # removing the file or with `kill -USR2 <pid>`
+    admission = AdmissionController(pause_file=runs[0].base_dir / "pause")
+    if "--async" in sys.argv:
+        # Reports the progress of every run and the ETA of the sweep
+        runner = AsyncRunner(n_threads, admission)
+    else:
+        runner = Runner(n_threads, admission)
+
     print(f"======== RUNNING {len(runs)} SIMULATIONS ======== ")
-    runner.run_all(runs)
+    # Walltimes of all previous sweeps predict the walltimes of their settings
+    cost_model = CostModel.from_results(results_base.glob("*"))
+    runner.run_all(runs, cost_model=cost_model)
 
     print(f"======== PROCESSING RESULTS ======== ")
     base_dir = runs[0].base_dir
-    results = load_all_simulation_results(base_dir, load_runs=True, do_tf=True, n_workers=n_threads)
-    with (base_dir / "results.pkl").open("wb") as f:
-        pickle.dump(results, f)
+    update_results_store(base_dir, load_runs=True, do_tf=True, n_workers=n_threads)
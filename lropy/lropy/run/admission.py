@@ -0,0 +1,104 @@
+import os
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+from lropy.run.util import get_load_averages, get_available_memory
+
+
+class AdmissionController:
+    """
+    Decides when a sweep may start another run, so that it shares a server with other users.
+    New runs are admitted while
+
+    - the sweep is not paused, by pause() or by the existence of the pause file,
+    - the load of other processes leaves a CPU for the run below max_load,
+    - the available memory fits the predicted peak memory of the run.
+
+    The number of concurrent runs thereby follows the load of the server. Runs in flight are
+    never stopped, a paused sweep only starts no new runs.
+    """
+
+    max_load: float
+    min_free_memory: float
+    default_memory: float
+    ramp_time: float
+    pause_file: Optional[Path]
+
+    def __init__(
+        self,
+        max_load=0.9,
+        min_free_memory=4 * 2**30,
+        default_memory=2 * 2**30,
+        ramp_time=60.0,
+        pause_file: Optional[Path] = None,
+    ):
+        """
+        Args:
+            max_load: maximum load of the server per CPU, including the runs of the sweep
+            min_free_memory: memory in bytes that is kept available for other users
+            default_memory: peak memory in bytes of runs without prediction
+            ramp_time: time in seconds until a run reaches its peak memory, the predicted
+                memory of runs started within it is not yet part of the used memory
+            pause_file: the sweep is paused while this file exists
+        """
+        self.max_load = max_load
+        self.min_free_memory = min_free_memory
+        self.default_memory = default_memory
+        self.ramp_time = ramp_time
+        self.pause_file = pause_file
+
+        self._paused = False
+        self._was_paused = False
+        self._starting: list[tuple[float, float]] = []
+        self._lock = Lock()
+
+    def pause(self, *args):
+        """Stops admitting runs, takes the arguments of a signal handler"""
+        self._paused = True
+
+    def resume(self, *args):
+        """Admits runs again, takes the arguments of a signal handler"""
+        self._paused = False
+
+    def is_paused(self) -> bool:
+        paused = self._paused or (self.pause_file is not None and self.pause_file.exists())
+        if paused != self._was_paused:
+            print("Sweep paused" if paused else "Sweep resumed")
+            self._was_paused = paused
+        return paused
+
+    def admit(self, n_running: int, memory: Optional[float] = None) -> bool:
+        """
+        Args:
+            n_running: number of runs of the sweep in flight
+            memory: predicted peak memory of the run in bytes
+
+        Returns:
+            Whether the run can be started now. Admitted runs are accounted as starting.
+        """
+        if self.is_paused():
+            return False
+        if memory is None:
+            memory = self.default_memory
+
+        with self._lock:
+            now = time.monotonic()
+            self._starting = [(t, m) for t, m in self._starting if now - t < self.ramp_time]
+
+            # Without runs in flight, the sweep always makes progress
+            if n_running > 0:
+                n_cpus = os.cpu_count()
+                # The load average lags behind, so runs of the sweep are counted directly. Runs
+                # that finished recently are still part of it, which errs towards fewer runs.
+                other_load = max(get_load_averages(normalize=False)[0] - n_running, 0)
+                if n_running + 1 > self.max_load * n_cpus - other_load:
+                    return False
+
+                starting_memory = sum(m for _, m in self._starting)
+                if get_available_memory() - starting_memory - memory < self.min_free_memory:
+                    return False
+
+            self._starting.append((now, memory))
+            return True
@@ -0,0 +1,285 @@
+import asyncio
+import os
+import re
+import signal
+import subprocess
+import time
+from collections import deque
+from datetime import timedelta
+from threading import current_thread, main_thread
+from typing import Optional
+
+from lropy.analysis.spice_tools import as_et
+from lropy.run.admission import AdmissionController
+from lropy.run.runner import Runner
+from lropy.run.scheduler import CostModel
+from lropy.run.simulation_run import SimulationRun
+
+# Lines printed by Tudat every print interval of the propagation, e.g.
+# "Current time and state in integration: <epoch> <state>"
+progress_prefix = b"Current time"
+_number_pattern = re.compile(rb"[-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?")
+
+
+def parse_epoch(line: bytes, start: float, end: float) -> Optional[float]:
+    """
+    Epoch of a propagation print line of Tudat. Since Tudat versions differ in what they print
+    before the epoch, the epoch is the first number after the colon within the propagation
+    interval.
+
+    Args:
+        line: line of the simulation output
+        start: start epoch of the propagation
+        end: end epoch of the propagation
+
+    Returns:
+        Epoch, None if the line is no propagation print line
+    """
+    if not line.startswith(progress_prefix):
+        return None
+
+    # Printed epochs might be rounded
+    lower, upper = min(start, end) - 1, max(start, end) + 1
+    _, _, values = line.partition(b":")
+    for value in _number_pattern.findall(values):
+        epoch = float(value)
+        if lower <= epoch <= upper:
+            return epoch
+    return None
+
+
+class RunProgress:
+    """Progress of a run in simulated time, as parsed from its output"""
+
+    run: SimulationRun
+    cost: float
+    start_epoch: float
+    end_epoch: float
+    epoch: float
+    time_start: float
+    time_end: Optional[float]
+
+    def __init__(self, run: SimulationRun, cost: float):
+        """
+        Args:
+            run: the run
+            cost: predicted walltime of the run, weighs its progress in the progress of the sweep
+        """
+        self.run = run
+        self.cost = cost
+        self.start_epoch = as_et(run.simulation_start)
+        self.end_epoch = self.start_epoch + run.simulation_duration
+        self.epoch = self.start_epoch
+        self.time_start = time.perf_counter()
+        self.time_end = None
+
+    def update(self, line: bytes) -> bool:
+        """Updates the progress from a line of output, returns whether it changed"""
+        epoch = parse_epoch(line, self.start_epoch, self.end_epoch)
+        if epoch is None:
+            return False
+        self.epoch = epoch
+        return True
+
+    def finish(self):
+        self.epoch = self.end_epoch
+        self.time_end = time.perf_counter()
+
+    @property
+    def fraction(self) -> float:
+        """Fraction of the simulated time that was propagated"""
+        if self.end_epoch == self.start_epoch:
+            return 1.0
+        return min(max((self.epoch - self.start_epoch) / (self.end_epoch - self.start_epoch), 0), 1)
+
+    @property
+    def throughput(self) -> float:
+        """Simulated seconds per wall clock second"""
+        time_end = self.time_end if self.time_end is not None else time.perf_counter()
+        elapsed = time_end - self.time_start
+        return abs(self.epoch - self.start_epoch) / elapsed if elapsed > 0 else 0.0
+
+
+class AsyncRunner(Runner):
+    """
+    Executes runs in parallel as child processes of an asyncio event loop, which reads their
+    output while they run to report the progress of every run and the ETA of the sweep. No
+    thread is used per run, so n_threads can be in the hundreds.
+
+    The processes are created with subprocess and awaited through a pidfd, instead of with the
+    asyncio subprocess functions. Those reap the processes themselves, with one thread per
+    process before Python 3.12, so the resource usage from wait4 would be lost.
+    """
+
+    report_interval: float
+    progress: list[RunProgress]
+
+    def __init__(
+        self,
+        n_threads: int = None,
+        admission: Optional[AdmissionController] = None,
+        report_interval=60.0,
+    ):
+        """
+        Args:
+            n_threads: maximum number of concurrent runs, the number of CPUs by default
+            admission: decides when to start runs, see Runner
+            report_interval: seconds between progress reports of the sweep
+        """
+        super().__init__(n_threads, admission)
+        self.report_interval = report_interval
+        self.progress = []
+        # Set for every sweep by run_all()
+        self._total_cost = 0.0
+        self._time_start = time.perf_counter()
+
+    def run_all(
+        self,
+        runs: list[SimulationRun],
+        resume: bool = True,
+        schedule: bool = True,
+        cost_model: Optional[CostModel] = None,
+    ):
+        """Same as Runner.run_all()"""
+        # The progress of the sweep is weighted by the predicted walltimes
+        if cost_model is None:
+            cost_model = CostModel.from_results({run.base_dir for run in runs})
+        runs, cost_model = self._prepare_runs(runs, resume, schedule, cost_model)
+        asyncio.run(self._run_all(runs, cost_model))
+
+    async def _run_all(self, runs: list[SimulationRun], cost_model: CostModel):
+        loop = asyncio.get_running_loop()
+        self.progress = []
+        self._total_cost = sum(cost_model.predict(run) for run in runs)
+        self._time_start = time.perf_counter()
+
+        pending = deque(runs)
+        running = set()
+        finished = []
+
+        # Signals can only be handled by the main thread
+        handle_signals = self.admission is not None and current_thread() is main_thread()
+        if handle_signals:
+            loop.add_signal_handler(signal.SIGUSR1, self.admission.pause)
+            loop.add_signal_handler(signal.SIGUSR2, self.admission.resume)
+        reporter = asyncio.create_task(self._report_periodically())
+
+        try:
+            while pending or running:
+                while (
+                    pending
+                    and len(running) < self.n_threads
+                    and (
+                        self.admission is None
+                        or self.admission.admit(len(running), cost_model.predict_memory(pending[0]))
+                    )
+                ):
+                    run = pending.popleft()
+                    running.add(
+                        asyncio.create_task(self.run_single_async(run, cost_model.predict(run)))
+                    )
+
+                if not running:
+                    # Paused
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                done, running = await asyncio.wait(
+                    running,
+                    # Without admission control, runs only start when others finish
+                    timeout=self.poll_interval if self.admission is not None else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                finished.extend(done)
+        finally:
+            reporter.cancel()
+            if handle_signals:
+                loop.remove_signal_handler(signal.SIGUSR1)
+                loop.remove_signal_handler(signal.SIGUSR2)
+
+        self.report()
+        for task in finished:
+            task.result()
+
+    async def run_single_async(self, run: SimulationRun, cost: float = 1.0):
+        """Executes a single run, reporting its progress whenever the simulation prints it"""
+        loop = asyncio.get_running_loop()
+        progress = RunProgress(run, cost)
+        json_path = self._start_run(run)
+        self.progress.append(progress)
+
+        if run.save_results:
+            output_file = run.save_dir / "out.txt"
+        else:
+            output_file = os.devnull
+
+        with open(output_file, "wb") as output_file:
+            p = subprocess.Popen(
+                [self.executable, str(json_path)],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                env=self._get_env(),
+            )
+
+            reader = asyncio.StreamReader()
+            transport, _ = await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader), p.stdout
+            )
+            try:
+                partial_line = b""
+                while chunk := await reader.read(2**16):
+                    output_file.write(chunk)
+                    *lines, partial_line = (partial_line + chunk).split(b"\n")
+                    if any([progress.update(line) for line in lines]):
+                        print(
+                            f"Run {run.id}: {progress.fraction:.0%} of simulated time, "
+                            f"{progress.throughput:.0f} s/s"
+                        )
+                    # Progress lines are short, so long lines need not be kept
+                    partial_line = partial_line[-1024:]
+            finally:
+                transport.close()
+
+            rusage = await self._wait(p)
+
+        progress.finish()
+        self._finish_run(run, p.returncode, progress.time_end - progress.time_start, rusage)
+
+    @staticmethod
+    async def _wait(p: subprocess.Popen):
+        """Waits for a process to exit without blocking the event loop, returns its rusage"""
+        loop = asyncio.get_running_loop()
+        exited = loop.create_future()
+        # A pidfd becomes readable when its process exits
+        pidfd = os.pidfd_open(p.pid)
+        loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+        try:
+            await exited
+        finally:
+            loop.remove_reader(pidfd)
+            os.close(pidfd)
+
+        _, status, rusage = os.wait4(p.pid, 0)
+        p.returncode = os.waitstatus_to_exitcode(status)
+        return rusage
+
+    async def _report_periodically(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.report()
+
+    def report(self):
+        """Prints the progress and ETA of the sweep"""
+        running = [progress for progress in self.progress if progress.time_end is None]
+        done_cost = sum(progress.cost * progress.fraction for progress in self.progress)
+        fraction = done_cost / self._total_cost if self._total_cost > 0 else 1.0
+        elapsed = time.perf_counter() - self._time_start
+
+        if fraction > 0:
+            eta = str(timedelta(seconds=round(elapsed * (1 - fraction) / fraction)))
+        else:
+            eta = "unknown"
+        throughput = sum(progress.throughput for progress in running)
+        print(
+            f"[{self.n_finished}/{self.n_total}] {len(running)} runs in flight at "
+            f"{throughput:.0f} s/s, {fraction:.0%} of the sweep done, ETA {eta}"
+        )
@@ -7,9 +7,7 @@ os.environ["NUMEXPR_NUM_THREADS"] = "1"
 os.environ["OMP_NUM_THREADS"] = "1"
 os.environ["VECLIB_MAXIMUM_THREADS"] = "1"
 
-import pickle
-
-from lropy.analysis.io import load_all_simulation_results
+from lropy.analysis.io import update_results_store
 from lropy.run.runner import Runner
 from lropy.run.configurator import *
 
@@ -27,13 +25,13 @@ if __name__ == "__main__":
 
     runs = configurator.get_runs()
     runs = runs * n_iterations
+    # Random order instead of scheduling by cost, so that the walltimes of a configuration are
+    # not biased by which other runs execute at the same time
     random.shuffle(runs)
 
     print(f"======== RUNNING {len(runs)} SIMULATIONS ======== ")
-    runner.run_all(runs)
+    runner.run_all(runs, schedule=False)
 
     print(f"======== PROCESSING RESULTS ======== ")
     base_dir = runs[0].base_dir
-    results = load_all_simulation_results(base_dir, load_runs=False, n_workers=n_threads)
-    with (base_dir / "results.pkl").open("wb") as f:
-        pickle.dump(results, f)
+    update_results_store(base_dir, load_runs=False, n_workers=n_threads)
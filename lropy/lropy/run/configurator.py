@@ -1,6 +1,6 @@
 import itertools
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
 from lropy.run.simulation_run import (
     SimulationRun,
@@ -9,8 +9,11 @@ from lropy.run.simulation_run import (
     AlbedoDistribution,
     PanelingType,
 )
+from lropy.run.ledger import JobLedger
 from lropy.run.util import generate_folder_name
 
+results_base = Path("../results")
+
 
 class Configurator:
     """Generates runs as combinations of settings"""
@@ -33,7 +36,9 @@ class Configurator:
     def _get_settings(self) -> list[dict[str, Any]]:
         # Produce combinations of settings
         # If moon radiation is not used, do not use combinations of moon-specific parameters like number of panels
-        all_run_settings = set()
+        # Combinations are deduplicated in order of generation. The order of a set depends on
+        # the hash seed of the process, and the baselines are derived from the first settings.
+        all_run_settings = {}
         for single_run_settings in itertools.product(*self.settings.values()):
             single_run_settings = list(single_run_settings)
             target_type = single_run_settings[2]
@@ -65,10 +70,10 @@ class Configurator:
             if target_type != TargetType.Paneled:
                 single_run_settings[3] = False  # with_instantaneous_reradiation
 
-            # Necessary to allow hashing for set
+            # Necessary to allow hashing for dict
             single_run_settings[10] = tuple(single_run_settings[10])
 
-            all_run_settings.add(tuple(single_run_settings))
+            all_run_settings[tuple(single_run_settings)] = None
 
         settings = [
             {k: v for k, v in zip(self.settings.keys(), single_run_settings)}
@@ -92,20 +97,60 @@ class Configurator:
             baseline_settings.append(settings)
         return baseline_settings
 
-    def get_runs(self) -> list[SimulationRun]:
+    def get_runs(
+        self, results_dir: Optional[Path] = None, resume: bool = False
+    ) -> list[SimulationRun]:
+        """
+        Args:
+            results_dir: directory to store the runs in, a new one by default
+            resume: use the latest results directory of this configuration, so that Runner can
+                skip the runs that finished in it
+
+        Returns:
+            Runs with all combinations of settings
+        """
         all_settings = self._get_settings()
         if self.add_baseline:
             all_settings.extend(self._get_baseline_settings(all_settings[0]))
         print(f"Generated {len(all_settings)} run settings")
 
-        results_dir = Path("../results") / (self.configuration_name + "-" + generate_folder_name())
+        if results_dir is None and resume:
+            results_dir = self.get_latest_results_dir()
+        if results_dir is None:
+            results_dir = results_base / (self.configuration_name + "-" + generate_folder_name())
+        else:
+            print(f"Resuming runs in {results_dir}")
+
         runs = [
             SimulationRun.from_dict(settings, results_dir, i + 1)
             for i, settings in enumerate(all_settings)
         ]
 
+        # Runs that exist already keep their number by settings, also if the settings of the
+        # configuration were changed in between
+        run_numbers = JobLedger(results_dir).get_run_numbers()
+        if run_numbers:
+            next_number = max(run_numbers.values()) + 1
+            for i, (run, settings) in enumerate(zip(runs, all_settings)):
+                run_number = run_numbers.get(run.settings_hash())
+                if run_number is None:
+                    run_number = next_number
+                    next_number += 1
+                runs[i] = SimulationRun.from_dict(settings, results_dir, run_number)
+
         return runs
 
+    def get_latest_results_dir(self) -> Optional[Path]:
+        """Latest results directory of this configuration with a job ledger"""
+        # Folder names continue with the timestamp, so they sort by time. Starting with a digit
+        # excludes other configurations with the same prefix, e.g. the benchmark.
+        results_dirs = sorted(
+            path
+            for path in results_base.glob(self.configuration_name + "-[0-9]*")
+            if JobLedger(path).exists()
+        )
+        return results_dirs[-1] if results_dirs else None
+
 
 class SingleConfigurator(Configurator):
     def __init__(self, is_benchmark: bool = False):
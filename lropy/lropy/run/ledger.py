@@ -0,0 +1,101 @@
+import json
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Union, Any, Optional
+
+
+class JobState(Enum):
+    Pending = 1
+    Running = 2
+    Done = 3
+    Failed = 4
+
+
+class JobLedger:
+    """
+    Persistent state of the runs of a sweep, stored in its results directory. Every state change
+    of a run appends a line to a JSON lines table, so a sweep that was interrupted can be resumed
+    with only the runs that did not finish.
+    """
+
+    path: Path
+
+    def __init__(self, results_dir: Union[Path, str]):
+        if isinstance(results_dir, str):
+            results_dir = Path(results_dir)
+        self.path = results_dir / "ledger.jsonl"
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def mark(
+        self,
+        run_no: int,
+        state: JobState,
+        settings_hash: str,
+        return_code: Optional[int] = None,
+    ):
+        self.mark_all([run_no], state, [settings_hash], return_code)
+
+    def mark_all(
+        self,
+        run_numbers: list[int],
+        state: JobState,
+        settings_hashes: list[str],
+        return_code: Optional[int] = None,
+    ):
+        """Records the state of multiple runs with a single write"""
+        timestamp = time.time()
+        lines = [
+            json.dumps(
+                {
+                    "run_no": int(run_no),
+                    "state": state.name,
+                    "settings_hash": settings_hash,
+                    "return_code": return_code,
+                    "timestamp": timestamp,
+                }
+            )
+            + "\n"
+            for run_no, settings_hash in zip(run_numbers, settings_hashes)
+        ]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Whole lines are written at once, so concurrently finishing runs do not interleave
+        with self.path.open("a") as f:
+            f.write("".join(lines))
+
+    def load(self) -> dict[int, dict[str, Any]]:
+        """
+        Returns:
+            Latest entry by run number, with the state as JobState
+        """
+        if not self.exists():
+            return {}
+
+        entries = {}
+        with self.path.open() as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line of a sweep that was killed while writing
+                    continue
+                entry["state"] = JobState[entry["state"]]
+                # Later entries replace earlier ones of the same run
+                entries[entry["run_no"]] = entry
+        return entries
+
+    def get_run_numbers(self) -> dict[str, int]:
+        """Run numbers by settings hash"""
+        return {entry["settings_hash"]: run_no for run_no, entry in self.load().items()}
+
+    def get_done(self) -> set[tuple[int, str]]:
+        """(run number, settings hash) of the runs that finished successfully"""
+        return {
+            (run_no, entry["settings_hash"])
+            for run_no, entry in self.load().items()
+            if entry["state"] == JobState.Done
+        }
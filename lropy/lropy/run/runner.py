@@ -1,11 +1,21 @@
+import json
 import os
+import resource
+import signal
 import subprocess
 import time
-from concurrent.futures import ThreadPoolExecutor, wait
+import warnings
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from threading import Lock
+from threading import Lock, current_thread, main_thread
+from typing import Optional
 
-from lropy.analysis.spice_tools import spice_base
+from lropy.analysis.metadata_index import MetadataIndex
+from lropy.analysis.spice_tools import get_spice_base
+from lropy.run.admission import AdmissionController
+from lropy.run.ledger import JobLedger, JobState
+from lropy.run.scheduler import CostModel, order_by_cost
 from lropy.run.simulation_run import (
     SimulationRun,
     TargetType,
@@ -24,9 +34,19 @@ class Runner:
     lock: Lock = Lock()
 
     n_threads: int
+    admission: Optional[AdmissionController]
+    poll_interval: float = 5.0
+    executable: Path = Path("../simulations/build/bin/application_lro_json")
 
-    def __init__(self, n_threads: int = None):
-        self.n_threads = n_threads
+    def __init__(self, n_threads: int = None, admission: Optional[AdmissionController] = None):
+        """
+        Args:
+            n_threads: maximum number of concurrent runs, the number of CPUs by default
+            admission: decides when to start runs, up to n_threads. Without, n_threads runs are
+                executed at all times.
+        """
+        self.n_threads = n_threads if n_threads is not None else os.cpu_count()
+        self.admission = admission
         self._reset()
 
     def _reset(self):
@@ -35,25 +55,135 @@ class Runner:
             self.n_finished = 0
             self.n_total = 1
 
-    def run_all(self, runs: list[SimulationRun]):
+    def run_all(
+        self,
+        runs: list[SimulationRun],
+        resume: bool = True,
+        schedule: bool = True,
+        cost_model: Optional[CostModel] = None,
+    ):
+        """
+        Executes runs in parallel. Their states are recorded in the job ledger of their results
+        directory.
+
+        Args:
+            runs: runs to execute, the same run can be given multiple times, e.g. for benchmarks
+            resume: skip runs that finished successfully in an earlier call with the same
+                settings, e.g. of a sweep that was interrupted
+            schedule: start the runs with the longest predicted walltime first, instead of in
+                the given order
+            cost_model: predicts the walltimes, learned from the runs in the results
+                directories of the runs by default
+        """
+        runs, cost_model = self._prepare_runs(runs, resume, schedule, cost_model)
+
+        if self.admission is None:
+            with ThreadPoolExecutor(max_workers=self.n_threads) as executor:
+                fut = [executor.submit(self.run_single, run) for run in runs]
+                wait(fut)
+                for f in fut:
+                    f.result()
+        else:
+            self._run_admitted(runs, cost_model)
+
+    def _run_admitted(self, runs: list[SimulationRun], cost_model: CostModel):
+        """Starts runs in order whenever the admission controller allows it"""
+        pending = deque(runs)
+        running = set()
+        finished = []
+
+        # Signals can only be handled by the main thread
+        handle_signals = current_thread() is main_thread()
+        if handle_signals:
+            handlers = {
+                signal.SIGUSR1: signal.signal(signal.SIGUSR1, self.admission.pause),
+                signal.SIGUSR2: signal.signal(signal.SIGUSR2, self.admission.resume),
+            }
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.n_threads) as executor:
+                while pending or running:
+                    while (
+                        pending
+                        and len(running) < self.n_threads
+                        and self.admission.admit(
+                            len(running), cost_model.predict_memory(pending[0])
+                        )
+                    ):
+                        running.add(executor.submit(self.run_single, pending.popleft()))
+
+                    if not running:
+                        # Paused
+                        time.sleep(self.poll_interval)
+                        continue
+                    done, running = wait(
+                        running, timeout=self.poll_interval, return_when=FIRST_COMPLETED
+                    )
+                    finished.extend(done)
+        finally:
+            if handle_signals:
+                for signal_number, handler in handlers.items():
+                    signal.signal(signal_number, handler)
+
+        for f in finished:
+            f.result()
+
+    def _prepare_runs(
+        self,
+        runs: list[SimulationRun],
+        resume: bool,
+        schedule: bool,
+        cost_model: Optional[CostModel],
+    ) -> tuple[list[SimulationRun], Optional[CostModel]]:
+        """Skips, orders and registers the runs of run_all() in the job ledger"""
         self._reset()
+        if resume:
+            runs = self._skip_done(runs)
+        if cost_model is None and (schedule or self.admission is not None):
+            cost_model = CostModel.from_results({run.base_dir for run in runs})
+        if schedule:
+            runs = order_by_cost(runs, cost_model)
+        self._mark_pending(runs)
         self.n_total = len(runs)
+        return runs, cost_model
 
-        with ThreadPoolExecutor(max_workers=self.n_threads) as executor:
-            fut = [executor.submit(self.run_single, run) for run in runs]
-            wait(fut)
-            for f in fut:
-                f.result()
+    @staticmethod
+    def _skip_done(runs: list[SimulationRun]) -> list[SimulationRun]:
+        entries = {
+            base_dir: JobLedger(base_dir).load() for base_dir in {run.base_dir for run in runs}
+        }
 
-    def run_single(self, run: SimulationRun):
-        project_folder = Path("..")
-        executable = project_folder / "simulations/build/bin/application_lro_json"
-        json_path = run.write_json()
+        remaining = []
+        for run in runs:
+            entry = entries[run.base_dir].get(run.run_number)
+            if entry is None or entry["settings_hash"] != run.settings_hash():
+                remaining.append(run)
+            elif entry["state"] != JobState.Done:
+                # Wall time and resources of the unfinished attempt
+                (run.save_dir / "walltime.txt").unlink(missing_ok=True)
+                (run.save_dir / "resources.jsonl").unlink(missing_ok=True)
+                remaining.append(run)
 
-        with self.lock:
-            self.n_started += 1
-            print(f"[{self.n_started}/{self.n_total}] Run {run.id} started")
+        if len(remaining) < len(runs):
+            print(f"Skipping {len(runs) - len(remaining)} runs that finished before")
+        return remaining
 
+    @staticmethod
+    def _mark_pending(runs: list[SimulationRun]):
+        # Runs without number are not part of a sweep
+        unique_runs = {
+            (run.base_dir, run.run_number): run for run in runs if run.run_number is not None
+        }.values()
+        for base_dir in {run.base_dir for run in unique_runs}:
+            ledger_runs = [run for run in unique_runs if run.base_dir == base_dir]
+            JobLedger(base_dir).mark_all(
+                [run.run_number for run in ledger_runs],
+                JobState.Pending,
+                [run.settings_hash() for run in ledger_runs],
+            )
+
+    def run_single(self, run: SimulationRun):
+        json_path = self._start_run(run)
         time_start = time.perf_counter()
 
         if run.save_results:
@@ -63,19 +193,60 @@ class Runner:
 
         output_file = open(output_file, "w")
         p = subprocess.Popen(
-            [executable, str(json_path)],
+            [self.executable, str(json_path)],
             stdout=output_file,
             stderr=output_file,
-            env={**os.environ, "SPICE_BASE": f"{spice_base}/"},
+            env=self._get_env(),
         )
-        return_code = p.wait()
+        # wait4 also returns the resource usage of the process
+        _, status, rusage = os.wait4(p.pid, 0)
         time_end = time.perf_counter()
+        p.returncode = os.waitstatus_to_exitcode(status)
         output_file.close()
 
+        self._finish_run(run, p.returncode, time_end - time_start, rusage)
+
+    def _start_run(self, run: SimulationRun) -> Path:
+        """Writes the settings of a run and marks it as running, returns the settings file"""
+        json_path = run.write_json()
+
+        with self.lock:
+            if run.run_number is not None:
+                JobLedger(run.base_dir).mark(run.run_number, JobState.Running, run.settings_hash())
+            self.n_started += 1
+            print(f"[{self.n_started}/{self.n_total}] Run {run.id} started")
+
+        return json_path
+
+    @staticmethod
+    def _get_env() -> dict[str, str]:
+        return {**os.environ, "SPICE_BASE": f"{get_spice_base()}/"}
+
+    def _finish_run(
+        self, run: SimulationRun, return_code: int, walltime: float, rusage: resource.struct_rusage
+    ):
+        """Records the walltime, resources and state of a finished run"""
         with open(run.save_dir / "walltime.txt", "a") as f:
-            f.write(f"{time_end - time_start}\n")
+            f.write(f"{walltime}\n")
+        with open(run.save_dir / "resources.jsonl", "a") as f:
+            f.write(json.dumps(get_resource_usage(rusage, return_code)) + "\n")
 
         with self.lock:
+            if run.run_number is not None:
+                JobLedger(run.base_dir).mark(
+                    run.run_number,
+                    JobState.Done if return_code == 0 else JobState.Failed,
+                    run.settings_hash(),
+                    return_code,
+                )
+            if return_code == 0:
+                # The run is indexed later by MetadataIndex.update(), so a failure is no reason
+                # to stop the sweep
+                try:
+                    MetadataIndex(run.base_dir).add_run(run.save_dir)
+                except (OSError, ValueError) as e:
+                    warnings.warn(f"Run {run.id} could not be indexed: {e}")
+
             self.n_finished += 1
             print(
                 f"[{self.n_finished}/{self.n_total}] Run {run.id} finished (code {return_code}), "
@@ -83,6 +254,21 @@ class Runner:
             )
 
 
+def get_resource_usage(rusage: resource.struct_rusage, return_code: int) -> dict[str, float]:
+    """Resource usage of a finished run as written to resources.jsonl"""
+    return {
+        "return_code": return_code,
+        "user_time": rusage.ru_utime,
+        "system_time": rusage.ru_stime,
+        # Kilobytes on Linux
+        "max_rss": rusage.ru_maxrss * 1024,
+        "voluntary_context_switches": rusage.ru_nvcsw,
+        "involuntary_context_switches": rusage.ru_nivcsw,
+        # Blocks of 512 bytes written to storage, excluding what stays in the page cache
+        "write_bytes": rusage.ru_oublock * 512,
+    }
+
+
 if __name__ == "__main__":
     run = SimulationRun(Path("../results"))
 
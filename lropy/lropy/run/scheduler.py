@@ -0,0 +1,133 @@
+import json
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Union, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from lropy.analysis.metadata_index import MetadataIndex
+from lropy.run.simulation_run import SimulationRun
+
+# Number of panels of the LRO target models, see simulations/src/lro_json.cpp
+target_panels = {"Cannonball": 1, "Paneled": 10}
+
+
+def estimate_cost(settings: dict[str, Any]) -> float:
+    """
+    Estimates the relative cost of a run from its settings as the number of source and target
+    panel pairs that are evaluated over all propagation steps.
+
+    Args:
+        settings: run settings as written to settings.json
+
+    Returns:
+        Cost in arbitrary units
+    """
+    n_steps = settings["simulation_duration"] / settings["step_size"]
+    n_target_panels = target_panels[settings["target_type"]]
+
+    # Propagation and the other accelerations
+    step_cost = 1.0
+    if settings["use_solar_radiation"]:
+        step_cost += n_target_panels
+    if settings["use_moon_radiation"]:
+        if settings["paneling_moon"] == "Static":
+            n_source_panels = settings["number_of_panels_moon"]
+        else:
+            # Rings around a central cap
+            n_source_panels = 1 + sum(settings["number_of_panels_per_ring_moon"])
+        step_cost += n_target_panels * n_source_panels
+
+    return n_steps * step_cost
+
+
+class CostModel:
+    """
+    Predicts the walltime of runs. Runs whose settings were run before are predicted by their
+    mean measured walltime, others by their estimated cost scaled to the measured walltimes.
+    Peak memory usage is predicted from the runs with the same settings, or the largest peak of
+    all runs.
+    """
+
+    walltimes: dict[str, float]
+    scale: float
+    peak_memory: dict[str, float]
+
+    def __init__(self, metadata: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            metadata: metadata of finished runs as loaded from MetadataIndex
+        """
+        self.walltimes = {}
+        self.scale = 1.0
+        self.peak_memory = {}
+        if metadata is None or metadata.empty:
+            return
+
+        ratios = []
+        for settings_hash, group in metadata.groupby("settings_hash", sort=False):
+            if "resource_max_rss" in group:
+                max_rss = [m for max_rss in group["resource_max_rss"].dropna() for m in max_rss]
+                if max_rss:
+                    self.peak_memory[settings_hash] = float(max(max_rss))
+
+            walltimes = [w for walltime in group["walltime_total"] for w in walltime]
+            if not walltimes:
+                continue
+            self.walltimes[settings_hash] = float(np.mean(walltimes))
+
+            try:
+                cost = estimate_cost(group.iloc[0].to_dict())
+            except (KeyError, TypeError):
+                # Settings of an older version of the runs
+                continue
+            if cost > 0:
+                ratios.append(self.walltimes[settings_hash] / cost)
+
+        if ratios:
+            self.scale = float(np.median(ratios))
+
+    @classmethod
+    def from_results(cls, results_dirs: Iterable[Union[Path, str]]) -> "CostModel":
+        """
+        Learns the walltimes of the runs in the given results directories. Their indexes are
+        updated first, so runs of sweeps from before the index existed are included as well.
+        """
+        metadata = []
+        for results_dir in results_dirs:
+            if not Path(results_dir).is_dir():
+                continue
+            index = MetadataIndex(results_dir)
+            try:
+                index.update()
+            except OSError:
+                # Results directory is not writable, only the indexed runs are used
+                pass
+            metadata.append(index.load())
+
+        metadata = [m for m in metadata if not m.empty]
+        return cls(pd.concat(metadata) if metadata else None)
+
+    def predict(self, run: SimulationRun) -> float:
+        """Predicted walltime of a run in seconds, or in arbitrary units without measurements"""
+        walltime = self.walltimes.get(run.settings_hash())
+        if walltime is not None:
+            return walltime
+        return self.scale * estimate_cost(json.loads(run.as_json()))
+
+    def predict_memory(self, run: SimulationRun) -> Optional[float]:
+        """Predicted peak memory usage of a run in bytes, None without measurements"""
+        peak_memory = self.peak_memory.get(run.settings_hash())
+        if peak_memory is None and self.peak_memory:
+            return max(self.peak_memory.values())
+        return peak_memory
+
+
+def order_by_cost(runs: list[SimulationRun], cost_model: CostModel) -> list[SimulationRun]:
+    """
+    Orders runs by decreasing predicted walltime. Dispatching the longest runs first keeps the
+    long runs from finishing alone at the end of a sweep.
+    """
+    costs = [cost_model.predict(run) for run in runs]
+    return [runs[i] for i in sorted(range(len(runs)), key=lambda i: -costs[i])]
@@ -5,6 +5,7 @@ from enum import Enum
 from pathlib import Path
 from typing import Self, Any
 
+from lropy.analysis.metadata_index import get_settings_hash
 from lropy.constants import lro_period
 from lropy.run.util import generate_id, generate_folder_name
 
@@ -129,6 +130,10 @@ class SimulationRun:
             indent=3,
         )
 
+    def settings_hash(self) -> str:
+        """Hash of the settings, identical for runs with the same outcome"""
+        return get_settings_hash(json.loads(self.as_json()))
+
     def write_json(self) -> Path:
         self.save_dir.mkdir(parents=True, exist_ok=True)
         path = self.save_dir / "settings.json"
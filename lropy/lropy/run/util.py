@@ -18,17 +18,31 @@ def generate_folder_name(timestamp: datetime = None, id: str = None) -> str:
     return timestamp_string.replace(":", "-") + "-" + id
 
 
-def get_average_load(normalize=True):
+def get_load_averages(normalize=True) -> list[float]:
     with open("/proc/loadavg") as f:
-        # Averages over last 1, 5 and 10 min periods
+        # Averages over last 1, 5 and 15 min periods
         load_averages = [float(avg) for avg in f.readline().split(" ")[:3]]
 
     if normalize:
         n_cpus = os.cpu_count()
         load_averages = [avg / n_cpus for avg in load_averages]
 
-    # Return 10-min average load
-    return load_averages[2]
+    return load_averages
+
+
+def get_average_load(normalize=True):
+    # Return 15-min average load
+    return get_load_averages(normalize)[2]
+
+
+def get_available_memory() -> int:
+    """Memory available for new processes without swapping in bytes"""
+    with open("/proc/meminfo") as f:
+        for line in f:
+            if line.startswith("MemAvailable:"):
+                # Given in kB
+                return int(line.split()[1]) * 1024
+    raise RuntimeError("MemAvailable missing from /proc/meminfo")
 
 
 if __name__ == "__main__":
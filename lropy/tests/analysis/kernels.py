@@ -0,0 +1,94 @@
+import os
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import spiceypy as spice
+
+# Leap second kernel with the contents of naif0012.tls, so tests do not need the SPICE data
+lsk = r"""KPL/LSK
+
+\begindata
+
+DELTET/DELTA_T_A       =   32.184
+DELTET/K               =    1.657D-3
+DELTET/EB              =    1.671D-2
+DELTET/M               = (  6.239996D0   1.99096871D-7 )
+
+DELTET/DELTA_AT        = ( 10,   @1972-JAN-1
+                           11,   @1972-JUL-1
+                           12,   @1973-JAN-1
+                           13,   @1974-JAN-1
+                           14,   @1975-JAN-1
+                           15,   @1976-JAN-1
+                           16,   @1977-JAN-1
+                           17,   @1978-JAN-1
+                           18,   @1979-JAN-1
+                           19,   @1980-JAN-1
+                           20,   @1981-JUL-1
+                           21,   @1982-JUL-1
+                           22,   @1983-JUL-1
+                           23,   @1985-JUL-1
+                           24,   @1988-JAN-1
+                           25,   @1990-JAN-1
+                           26,   @1991-JAN-1
+                           27,   @1992-JUL-1
+                           28,   @1993-JUL-1
+                           29,   @1994-JUL-1
+                           30,   @1996-JAN-1
+                           31,   @1997-JUL-1
+                           32,   @1999-JAN-1
+                           33,   @2006-JAN-1
+                           34,   @2009-JAN-1
+                           35,   @2012-JUL-1
+                           36,   @2015-JUL-1
+                           37,   @2017-JAN-1 )
+
+\begintext
+"""
+
+
+def use_test_lsk(spice_base: Path) -> mock._patch:
+    """
+    Writes the test LSK to where init_spice_time() looks for it and points SPICE_BASE there.
+
+    Returns:
+        Patch of the environment, which has to be started and stopped by the caller
+    """
+    lsk_dir = spice_base / "lro" / "data" / "lsk"
+    lsk_dir.mkdir(parents=True, exist_ok=True)
+    (lsk_dir / "naif0012.tls").write_text(lsk)
+    return mock.patch.dict(os.environ, {"SPICE_BASE": f"{spice_base}/"})
+
+
+def load_eclipse_geometry(kernel_dir: Path) -> float:
+    """
+    Writes and loads an SPK in which LRO passes through the shadow of Earth on a straight line,
+    and the shapes of the Sun and Earth.
+
+    Returns:
+        Duration of the geometry, starting at ET 0
+    """
+    duration = 1e5
+    spk_file = str(kernel_dir / "eclipse.bsp")
+    handle = spice.spkopn(spk_file, "test", 0)
+    epochs = np.linspace(0, duration, 21)
+    for body, position, velocity in [
+        (10, [-1.5e8, 0, 0], [0, 0, 0]),
+        (399, [0, 0, 0], [0, 0, 0]),
+        (-85, [1e5, -5e4, 0], [0, 1, 0]),
+    ]:
+        states = np.zeros((len(epochs), 6))
+        states[:, :3] = np.array(position) + np.outer(epochs, velocity)
+        states[:, 3:] = velocity
+        spice.spkw09(handle, body, 0, "J2000", 0, duration, "test", 3, 21, states, epochs)
+    spice.spkcls(handle)
+    spice.furnsh(spk_file)
+
+    for body, radius in [(10, 696000.0), (399, 6378.0)]:
+        spice.pdpool(f"BODY{body}_RADII", [radius] * 3)
+        spice.pdpool(f"BODY{body}_POLE_RA", [0.0, 0.0, 0.0])
+        spice.pdpool(f"BODY{body}_POLE_DEC", [90.0, 0.0, 0.0])
+        spice.pdpool(f"BODY{body}_PM", [0.0, 1.0, 0.0])
+
+    return duration
@@ -0,0 +1,84 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from lropy.analysis.columnar import write_columns, read_columns, read_attributes, read_header
+from lropy.analysis.rotation import _get_root
+from lropy.analysis.schema import matrix_elements
+
+
+class TestColumnar(TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "df"
+
+        self.df = pd.DataFrame(
+            {
+                "pos_x": np.linspace(0, 1, 10),
+                "panels_vis_moon": np.arange(10, dtype=np.int32),
+            },
+            index=pd.to_datetime(np.arange(10) * 5, unit="s", utc=True).rename("t"),
+        )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_roundtrip(self):
+        write_columns(self.path, self.df, {"fingerprint": [1, 2]})
+
+        pd.testing.assert_frame_equal(self.df, read_columns(self.path))
+        pd.testing.assert_frame_equal(self.df, read_columns(self.path, mmap=False))
+        self.assertDictEqual(read_attributes(self.path), {"fingerprint": [1, 2]})
+
+    def test_select_columns(self):
+        write_columns(self.path, self.df)
+
+        pd.testing.assert_frame_equal(
+            self.df[["panels_vis_moon"]], read_columns(self.path, ["panels_vis_moon"])
+        )
+
+    def test_overwrite(self):
+        write_columns(self.path, self.df)
+        write_columns(self.path, self.df.iloc[:5])
+
+        pd.testing.assert_frame_equal(self.df.iloc[:5], read_columns(self.path))
+
+    def test_modify_mmap(self):
+        write_columns(self.path, self.df)
+
+        df = read_columns(self.path)
+        df.iloc[0, 0] = 5.0
+
+        pd.testing.assert_frame_equal(self.df, read_columns(self.path))
+
+    def test_select_rows(self):
+        write_columns(self.path, self.df)
+
+        pd.testing.assert_frame_equal(self.df.iloc[2:7], read_columns(self.path, rows=slice(2, 7)))
+
+    def test_groups(self):
+        df = pd.DataFrame(np.arange(30.0).reshape(10, 3), columns=["a", "b", "c"])
+        df["d"] = np.arange(10)
+        write_columns(self.path, df, groups=[["a", "b", "c"], ["a", "d"]])
+
+        for mmap in [True, False]:
+            read = read_columns(self.path, mmap=mmap, rows=slice(2, 7))
+            pd.testing.assert_frame_equal(df.iloc[2:7].reset_index(drop=True), read)
+
+            # Grouped columns are views of one array, groups of mixed dtypes are not stored
+            a, b, c, d = (read[column].to_numpy() for column in ["a", "b", "c", "d"])
+            self.assertTrue(np.shares_memory(_get_root(a), c))
+            self.assertFalse(np.shares_memory(_get_root(a), d))
+
+        pd.testing.assert_frame_equal(df[["c", "a"]], read_columns(self.path, ["c", "a"]))
+
+    def test_matrix_groups(self):
+        columns = [f"rot_LRO_Moon_{e}" for e in matrix_elements]
+        df = pd.DataFrame(np.arange(90.0).reshape(10, 9), columns=columns)
+        write_columns(self.path, df)
+
+        self.assertListEqual(read_header(self.path)["groups"], [columns])
+        pd.testing.assert_frame_equal(df, read_columns(self.path))
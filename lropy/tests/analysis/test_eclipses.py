@@ -0,0 +1,101 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+import numpy as np
+import pandas as pd
+import spiceypy as spice
+
+from lropy.analysis import eclipses, spice_tools
+from lropy.analysis.eclipses import EclipseIndex
+from lropy.analysis.spice_tools import calculate_eclipses, as_utc_datetime
+from tests.analysis.kernels import load_eclipse_geometry, use_test_lsk
+
+
+class TestEclipseIndex(TestCase):
+    def setUp(self):
+        spice.kclear()
+        self.tmp_dir = TemporaryDirectory()
+        self.env_patch = use_test_lsk(Path(self.tmp_dir.name))
+        self.env_patch.start()
+
+    def tearDown(self):
+        spice.kclear()
+        self.env_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def test_query(self):
+        index = EclipseIndex.from_occultations(
+            [(30.0, 40.0, "PARTIAL"), (10.0, 20.0, "FULL"), (40.0, 45.0, "ANNULAR")]
+        )
+        t_et = np.array([0, 10, 15, 20, 25, 30, 39.5, 40, 42, 45, 50])
+
+        types = index.query(t_et)
+
+        self.assertListEqual(
+            list(types),
+            ["NONE", "FULL", "FULL", "FULL", "NONE", "PARTIAL", "PARTIAL"]
+            + ["ANNULAR", "ANNULAR", "ANNULAR", "NONE"],
+        )
+
+        self.assertListEqual(list(EclipseIndex.from_occultations([]).query(t_et)), ["NONE"] * 11)
+
+    def test_mark(self):
+        index = EclipseIndex.from_occultations([(10.0, 20.0, "FULL")])
+        df = pd.DataFrame({"t_et": [5.0, 15.0]}, index=[3, 4])
+
+        occultation = index.mark(df)
+
+        self.assertListEqual(list(occultation.index), [3, 4])
+        self.assertListEqual(list(occultation), ["NONE", "FULL"])
+
+    def test_mark_compact(self):
+        t_et = np.array([0.0, 5.0, 15.0, 25.0])
+        index = EclipseIndex.from_occultations([(10.0, 20.0, "FULL")])
+        # Runs loaded in compact mode only have the UTC index
+        df = pd.DataFrame({"pos_x": np.zeros(4)}, index=as_utc_datetime(t_et).rename("t"))
+
+        occultation = index.mark(df)
+
+        self.assertTrue(occultation.index.equals(df.index))
+        self.assertListEqual(list(occultation), ["NONE", "NONE", "FULL", "NONE"])
+
+    def test_save_load(self):
+        index = EclipseIndex.from_occultations([(10.0, 20.0, "FULL"), (30.0, 40.0, "PARTIAL")])
+        path = Path(self.tmp_dir.name) / "index.npz"
+
+        with mock.patch("os.getpid", return_value=123), mock.patch.object(
+            np, "savez", wraps=np.savez
+        ) as savez:
+            index.save(path)
+        # Temporary file per process, so concurrent writers do not interfere
+        self.assertEqual(savez.call_args[0][0].name, "index.tmp-123.npz")
+        self.assertListEqual(
+            sorted(p.name for p in Path(self.tmp_dir.name).glob("index*")), ["index.npz"]
+        )
+
+        loaded = EclipseIndex.load(path)
+        np.testing.assert_array_equal(loaded.begins, index.begins)
+        np.testing.assert_array_equal(loaded.types, index.types)
+
+    def test_compute(self):
+        duration = load_eclipse_geometry(Path(self.tmp_dir.name))
+        t_et = np.linspace(0, duration, 1001)
+
+        with mock.patch.dict(os.environ, {"LROPY_CACHE": self.tmp_dir.name}), mock.patch.object(
+            spice_tools, "_loaded_mission", "test"
+        ):
+            occultations = calculate_eclipses("Sun", "Earth", "LRO", 0.0, duration)
+            index = EclipseIndex.compute("Sun", "Earth", "LRO", 0.0, duration)
+
+            for t, occultation_type in zip(t_et, index.query(t_et)):
+                matches = [o[2] for o in occultations if o[0] <= t <= o[1]]
+                self.assertEqual(occultation_type, matches[0] if matches else "NONE")
+
+            # Served from the cache
+            with mock.patch.object(eclipses, "calculate_eclipses") as calculate:
+                cached = EclipseIndex.compute("Sun", "Earth", "LRO", 0.0, duration)
+                calculate.assert_not_called()
+            np.testing.assert_array_equal(cached.begins, index.begins)
+            np.testing.assert_array_equal(cached.types, index.types)
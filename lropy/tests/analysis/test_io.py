@@ -1,6 +1,28 @@
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 
-from lropy.analysis.io import _get_column_name
+import numpy as np
+import pandas as pd
+import spiceypy as spice
+
+from lropy.analysis.io import (
+    _get_column_name,
+    _get_column_names,
+    load_simulation_results,
+    iter_simulation_results,
+    load_all_simulation_results,
+    LazyRunMapping,
+    update_results_store,
+    load_pickled_simulation_results,
+    _transfer_dir,
+    _transfer_run,
+    _receive_run,
+)
+from lropy.analysis.metadata_index import MetadataIndex
+from lropy.analysis.spice_tools import as_utc_datetime
+from tests.analysis.kernels import use_test_lsk
 
 
 class TestIO(TestCase):
@@ -35,3 +57,361 @@ class TestIO(TestCase):
         }
         for id, name in expected.items():
             self.assertEqual(name, _get_column_name(id))
+
+
+class RunsTestCase(TestCase):
+    """Creates two small runs in a results directory"""
+
+    names = [
+        ("Relative position of LRO w.r.t. Moon", 3),
+        ("Relative velocity of LRO w.r.t. Moon", 3),
+        (
+            "Single acceleration in inertial frame of type radiation pressure acceleration, acting on LRO, exerted by Sun",
+            3,
+        ),
+        ("Received irradiance at LRO due to Moon", 1),
+        ("Number of visible source panels of Moon as seen from LRO", 1),
+    ]
+
+    def setUp(self):
+        spice.kclear()
+        self.tmp_dir = TemporaryDirectory()
+        self.results_base = Path(self.tmp_dir.name) / "results"
+        self.env_patch = use_test_lsk(Path(self.tmp_dir.name) / "spice")
+        self.env_patch.start()
+
+        for run_no in [1, 2]:
+            self._make_run(self.results_base / str(run_no), step_size=10.0 * run_no)
+
+    def tearDown(self):
+        spice.kclear()
+        self.env_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def _make_run(self, result_dir: Path, step_size: float, n_steps=200):
+        result_dir.mkdir(parents=True)
+        rng = np.random.default_rng()
+
+        with (result_dir / "dependent_variable_names.csv").open("w") as f:
+            f.write("Index;Size;ID\n")
+            index = 1
+            for name, size in self.names:
+                f.write(f"{index};{size};{name}\n")
+                index += size
+
+        t_et = 3.3e8 + step_size * np.arange(n_steps)
+        data = rng.uniform(-5, 5, (n_steps, 11))
+        data[:, 10] = rng.integers(0, 100, n_steps)
+        np.savetxt(
+            result_dir / "dependent_variable_history.csv",
+            np.column_stack([t_et, data]),
+            delimiter=",",
+            fmt="%.17e",
+        )
+        np.savetxt(
+            result_dir / "cpu_time.csv",
+            np.column_stack([t_et, np.linspace(0, 2, n_steps)]),
+            delimiter=",",
+        )
+        (result_dir / "walltime.txt").write_text("3.5\n")
+        with (result_dir / "settings.json").open("w") as f:
+            json.dump({"step_size": step_size}, f)
+
+
+class TestLoading(RunsTestCase):
+    def test_get_column_names(self):
+        colnames = _get_column_names(self.results_base / "1")
+
+        self.assertEqual(len(colnames), 11)
+        self.assertListEqual(colnames[:3], ["pos_x", "pos_y", "pos_z"])
+        self.assertListEqual(colnames[-2:], ["irr_moon", "panels_vis_moon"])
+
+    def test_load_simulation_results(self):
+        result_dir = self.results_base / "1"
+        df = load_simulation_results(result_dir)
+
+        self.assertEqual(len(df), 200)
+        self.assertEqual(df.index[0], pd.Timestamp("2010-06-16 22:38:53.815495", tz="UTC"))
+        self.assertEqual(df.index[1] - df.index[0], pd.Timedelta(seconds=10))
+        self.assertListEqual(list(df.columns[:3]), ["pos_x", "pos_y", "pos_z"])
+        self.assertEqual(df["t_et"].iloc[0], 3.3e8)
+
+        # Second load is served from the cache
+        self.assertTrue((result_dir / "dependent_variable_history.cache").exists())
+        pd.testing.assert_frame_equal(df, load_simulation_results(result_dir))
+        pd.testing.assert_frame_equal(df, load_simulation_results(result_dir, use_cache=False))
+
+    def test_selection(self):
+        result_dir = self.results_base / "1"
+        for use_cache in [False, True, True]:
+            df = load_simulation_results(
+                result_dir, use_cache=use_cache, columns=["pos", "irr_moon"], start=3.3e8 + 95
+            )
+
+            self.assertListEqual(list(df.columns), ["pos_x", "pos_y", "pos_z", "irr_moon", "t_et"])
+            self.assertEqual(df["t_et"].iloc[0], 3.3e8 + 100)
+            self.assertEqual(len(df), 190)
+
+        with self.assertRaises(KeyError):
+            load_simulation_results(result_dir, columns=["vel_w"])
+
+    def test_selection_without_cache(self):
+        result_dir = self.results_base / "1"
+        cache_dir = result_dir / "dependent_variable_history.cache"
+
+        # Only the selected part of the CSV is parsed, the cache needs the full table
+        df = load_simulation_results(result_dir, columns=["vel"], end=3.3e8 + 500)
+        self.assertFalse(cache_dir.exists())
+        self.assertEqual(len(df), 51)
+
+        load_simulation_results(result_dir)
+        self.assertTrue(cache_dir.exists())
+        pd.testing.assert_frame_equal(
+            df, load_simulation_results(result_dir, columns=["vel"], end=3.3e8 + 500)
+        )
+
+    def test_load_all_simulation_results(self):
+        metadata, runs = load_all_simulation_results(self.results_base, load_runs=True)
+
+        self.assertListEqual(list(metadata.index), [1, 2])
+        self.assertListEqual(list(metadata["step_size"]), [10.0, 20.0])
+        self.assertAlmostEqual(metadata.loc[1, "walltime_propagation"], 2)
+        pd.testing.assert_frame_equal(runs[2], load_simulation_results(self.results_base / "2"))
+
+    def test_metadata_index(self):
+        index_file = self.results_base / "index.jsonl"
+
+        # Loading does not write the index unless asked to
+        metadata = load_all_simulation_results(self.results_base)
+        self.assertFalse(index_file.exists())
+        pd.testing.assert_frame_equal(
+            metadata, load_all_simulation_results(self.results_base, update_index=True)
+        )
+        self.assertTrue(index_file.exists())
+
+        # Changed runs are loaded from their directory, not taken from the index
+        with (self.results_base / "2" / "settings.json").open("w") as f:
+            json.dump({"step_size": 250.0}, f)
+        metadata = load_all_simulation_results(self.results_base)
+        self.assertListEqual(list(metadata["step_size"]), [10.0, 250.0])
+        self.assertEqual(MetadataIndex(self.results_base).load().loc[2, "step_size"], 20.0)
+
+
+class TestCompact(RunsTestCase):
+    def test_compact(self):
+        df = load_simulation_results(self.results_base / "1", do_tf=True, compact=True)
+
+        np.testing.assert_allclose(df["r"], np.linalg.norm(df[["pos_x", "pos_y", "pos_z"]], axis=1))
+        self.assertIn("acc_rp_sun_radial", df.columns)
+        self.assertEqual(df["panels_vis_moon"].dtype, np.int32)
+        self.assertEqual(df["pos_x"].dtype, np.float64)
+        self.assertNotIn("t_et", df.columns)
+
+    def test_float32_derived(self):
+        result_dir = self.results_base / "1"
+        df = load_simulation_results(result_dir, do_tf=True)
+        df_float32 = load_simulation_results(result_dir, do_tf=True, float32_derived=True)
+
+        self.assertListEqual(list(df.columns), list(df_float32.columns))
+        for column in ["r", "acc_rp_sun", "acc_rp_sun_radial"]:
+            self.assertEqual(df_float32[column].dtype, np.float32)
+            np.testing.assert_allclose(df_float32[column], df[column], rtol=1e-6)
+        # Loaded columns keep their precision
+        self.assertEqual(df_float32["pos_x"].dtype, np.float64)
+        self.assertLess(df_float32.memory_usage(deep=True).sum(), df.memory_usage(deep=True).sum())
+
+
+class TestStreaming(RunsTestCase):
+    def test_iter_simulation_results(self):
+        result_dir = self.results_base / "2"
+        df = load_simulation_results(result_dir)
+
+        for use_cache in [False, True]:
+            chunks = list(iter_simulation_results(result_dir, chunk_size=64, use_cache=use_cache))
+            self.assertListEqual([len(chunk) for chunk in chunks], [64, 64, 64, 8])
+            pd.testing.assert_frame_equal(df, pd.concat(chunks))
+
+    def test_selection(self):
+        result_dir = self.results_base / "2"
+        selection = dict(
+            columns=["pos", "vel", "acc_rp_sun"], start=3.3e8 + 1000, end=3.3e8 + 2990, do_tf=True
+        )
+        df = load_simulation_results(result_dir, use_cache=False, **selection)
+
+        for use_cache in [False, True]:
+            if use_cache:
+                load_simulation_results(result_dir)
+            chunks = list(
+                iter_simulation_results(result_dir, chunk_size=64, use_cache=use_cache, **selection)
+            )
+            # The window spans rows 50 to 149, chunks outside of it are skipped
+            self.assertEqual(sum(len(chunk) for chunk in chunks), 100)
+            self.assertIn("acc_rp_sun_radial", chunks[0].columns)
+            pd.testing.assert_frame_equal(df, pd.concat(chunks))
+
+    def test_empty_window(self):
+        result_dir = self.results_base / "2"
+        chunks = list(iter_simulation_results(result_dir, chunk_size=64, start=3.3e8 + 10000))
+        self.assertListEqual(chunks, [])
+
+    def test_empty_window_without_cache(self):
+        result_dir = self.results_base / "2"
+        selection = dict(columns=["pos", "vel"], start=3.3e8 + 10000)
+
+        df = load_simulation_results(result_dir, use_cache=False, **selection)
+        self.assertEqual(len(df), 0)
+        load_simulation_results(result_dir)
+        pd.testing.assert_frame_equal(df, load_simulation_results(result_dir, **selection))
+
+    def test_datetime64_bounds(self):
+        result_dir = self.results_base / "2"
+        # Between two rows, so rounding to microseconds selects the same rows
+        start = as_utc_datetime(3.3e8 + 1005).to_numpy()[0]
+        pd.testing.assert_frame_equal(
+            load_simulation_results(result_dir, use_cache=False, start=start),
+            load_simulation_results(result_dir, use_cache=False, start=3.3e8 + 1005),
+        )
+
+
+class TestLazyRunMapping(RunsTestCase):
+    def test_lazy_loading(self):
+        metadata, runs = load_all_simulation_results(self.results_base, load_runs=True, lazy=True)
+
+        self.assertIsInstance(runs, LazyRunMapping)
+        self.assertListEqual(list(metadata.index), [1, 2])
+        self.assertListEqual(list(runs), [1, 2])
+        self.assertIn(1, runs)
+        self.assertNotIn(3, runs)
+        self.assertFalse(runs.is_resident(1))
+
+        self.assertEqual(len(runs[1]), 200)
+        self.assertTrue(runs.is_resident(1))
+        self.assertIs(runs[1], runs[1])
+
+    def test_eviction(self):
+        runs = LazyRunMapping(
+            {run_no: self.results_base / str(run_no) for run_no in [1, 2]}, max_resident=1
+        )
+
+        runs[1]
+        runs[2]
+        self.assertFalse(runs.is_resident(1))
+        self.assertTrue(runs.is_resident(2))
+        self.assertEqual(len(runs[1]), 200)
+
+        runs.clear()
+        self.assertFalse(runs.is_resident(1))
+
+    def test_prefetch(self):
+        runs = LazyRunMapping({run_no: self.results_base / str(run_no) for run_no in [1, 2]})
+
+        for zero_copy in [False, True]:
+            runs.clear()
+            runs.prefetch([1, 2], n_workers=2, zero_copy=zero_copy)
+
+            self.assertTrue(runs.is_resident(1))
+            self.assertTrue(runs.is_resident(2))
+            pd.testing.assert_frame_equal(runs[2], load_simulation_results(self.results_base / "2"))
+
+
+class TestTransfer(RunsTestCase):
+    def test_transfer_run(self):
+        run = load_simulation_results(self.results_base / "1", do_tf=True)
+
+        with _transfer_dir(zero_copy=True) as transfer_dir:
+            if Path("/dev/shm").is_dir():
+                self.assertEqual(transfer_dir.parent, Path("/dev/shm"))
+            self.assertIsNone(_transfer_run(run, transfer_dir, 1))
+            self.assertTrue((transfer_dir / "1").exists())
+
+            received = _receive_run(None, transfer_dir, 1)
+            # The files are removed as soon as they are mapped
+            self.assertFalse((transfer_dir / "1").exists())
+        self.assertFalse(transfer_dir.exists())
+
+        # Still valid after the transfer directory is removed
+        pd.testing.assert_frame_equal(run, received)
+
+    def test_fallback(self):
+        run = load_simulation_results(self.results_base / "1")
+
+        with _transfer_dir(zero_copy=False) as transfer_dir:
+            self.assertIsNone(transfer_dir)
+            self.assertIs(_transfer_run(run, transfer_dir, 1), run)
+
+        # Object columns cannot be memory-mapped and are pickled
+        run["label"] = "a"
+        with _transfer_dir(zero_copy=True) as transfer_dir:
+            self.assertIs(_transfer_run(run, transfer_dir, 1), run)
+            self.assertIs(_receive_run(run, transfer_dir, 1), run)
+
+    def test_load_all_simulation_results(self):
+        runs = {}
+        for zero_copy in [False, True]:
+            _, runs[zero_copy] = load_all_simulation_results(
+                self.results_base, load_runs=True, n_workers=2, zero_copy=zero_copy
+            )
+
+        for run_no in [1, 2]:
+            pd.testing.assert_frame_equal(runs[False][run_no], runs[True][run_no])
+
+
+class TestUpdateResultsStore(RunsTestCase):
+    def _count_entries(self, store) -> int:
+        with store.metadata_file.open() as f:
+            return sum(1 for line in f if line.strip())
+
+    def test_update(self):
+        store = update_results_store(self.results_base)
+
+        self.assertListEqual(list(store.load_metadata().index), [1, 2])
+        pd.testing.assert_frame_equal(
+            store.load_run(2), load_simulation_results(self.results_base / "2", use_cache=False)
+        )
+        self.assertFalse((self.results_base / "1" / "dependent_variable_history.cache").exists())
+
+        fingerprints = store.load_fingerprints()
+        self.assertEqual(fingerprints[1]["files"]["walltime.txt"][0], 4)
+        self.assertIsNone(fingerprints[1]["files"]["resources.jsonl"])
+        self.assertTrue(fingerprints[1]["load_runs"])
+        self.assertFalse(fingerprints[1]["do_tf"])
+
+    def test_skip_unchanged(self):
+        store = update_results_store(self.results_base)
+        n_entries = self._count_entries(store)
+
+        update_results_store(self.results_base)
+        self.assertEqual(self._count_entries(store), n_entries)
+
+        # Runs are reprocessed with different options
+        update_results_store(self.results_base, do_tf=True)
+        self.assertEqual(self._count_entries(store), n_entries + 2)
+        self.assertIn("acc_rp_sun_radial", store.load_run(1).columns)
+
+    def test_load_pickled_from_store(self):
+        store = update_results_store(self.results_base)
+
+        # Sweeps without results.pkl are loaded from their store
+        metadata, runs = load_pickled_simulation_results(self.results_base)
+        pd.testing.assert_frame_equal(metadata, store.load_metadata())
+        self.assertListEqual(list(runs), [1, 2])
+        pd.testing.assert_frame_equal(runs[2], store.load_run(2))
+
+        pd.to_pickle((metadata.iloc[:1], {}), self.results_base / "results.pkl")
+        metadata, runs = load_pickled_simulation_results(self.results_base)
+        self.assertListEqual(list(metadata.index), [1])
+        self.assertDictEqual(runs, {})
+
+    def test_reprocess_changed(self):
+        store = update_results_store(self.results_base)
+        n_entries = self._count_entries(store)
+
+        (self.results_base / "2" / "walltime.txt").write_text("7.25\n")
+        self._make_run(self.results_base / "3", step_size=30.0)
+        update_results_store(self.results_base)
+
+        self.assertEqual(self._count_entries(store), n_entries + 2)
+        metadata = store.load_metadata()
+        self.assertListEqual(list(metadata.index), [1, 2, 3])
+        self.assertListEqual(list(metadata.loc[2, "walltime_total"]), [7.25])
+        self.assertTrue(store.has_run(3))
@@ -0,0 +1,121 @@
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+
+from lropy.analysis.metadata_index import (
+    MetadataIndex,
+    get_result_dirs,
+    get_settings_hash,
+    load_walltime_propagation,
+    load_run_metadata,
+)
+
+
+class TestMetadataIndex(TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.results_base = Path(self.tmp_dir.name)
+        self.index = MetadataIndex(self.results_base)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _make_run(self, run_no: int, settings: dict, n_steps=1000) -> Path:
+        result_dir = self.results_base / str(run_no)
+        result_dir.mkdir()
+        with (result_dir / "settings.json").open("w") as f:
+            json.dump({"id": f"id{run_no}", **settings}, f)
+        np.savetxt(
+            result_dir / "cpu_time.csv",
+            np.column_stack([np.arange(n_steps) * 10.0, np.linspace(0.5, 7.25, n_steps)]),
+            delimiter=",",
+        )
+        (result_dir / "walltime.txt").write_text("8.5\n9.0\n")
+        return result_dir
+
+    def test_walltime_propagation(self):
+        result_dir = self._make_run(1, {}, n_steps=1000)
+        self.assertAlmostEqual(load_walltime_propagation(result_dir / "cpu_time.csv"), 6.75)
+
+        result_dir = self._make_run(2, {}, n_steps=1)
+        self.assertEqual(load_walltime_propagation(result_dir / "cpu_time.csv"), 0.0)
+
+    def test_malformed_cpu_time(self):
+        # Left by runs that were killed
+        for run_no, cpu_time in [(1, ""), (2, "0.0\n")]:
+            result_dir = self._make_run(run_no, {"step_size": float(run_no)})
+            (result_dir / "cpu_time.csv").write_text(cpu_time)
+            with self.assertRaises(ValueError):
+                load_walltime_propagation(result_dir / "cpu_time.csv")
+        self.index.add_run(self._make_run(3, {"step_size": 3.0}))
+
+        self.assertListEqual(self.index.update(), [])
+        self.assertListEqual(list(self.index.load().index), [3])
+
+    def test_add_run(self):
+        for run_no in [2, 1]:
+            self.index.add_run(self._make_run(run_no, {"step_size": float(run_no)}))
+
+        metadata = self.index.load()
+        self.assertListEqual(list(metadata.index), [1, 2])
+        self.assertListEqual(metadata.loc[1, "walltime_total"], [8.5, 9.0])
+        self.assertAlmostEqual(metadata.loc[2, "walltime_propagation"], 6.75)
+        self.assertListEqual(self.index.select(lambda m: m["step_size"] > 1.5), [2])
+
+    def test_resource_usage(self):
+        result_dir = self._make_run(1, {"step_size": 1.0})
+        with (result_dir / "resources.jsonl").open("w") as f:
+            for max_rss in [1000, 2000]:
+                f.write(json.dumps({"return_code": 0, "max_rss": max_rss}) + "\n")
+        self.index.add_run(result_dir)
+
+        metadata = self.index.load()
+        self.assertListEqual(metadata.loc[1, "resource_max_rss"], [1000, 2000])
+        self.assertListEqual(metadata.loc[1, "resource_return_code"], [0, 0])
+        self.assertEqual(metadata.loc[1, "settings_hash"], get_settings_hash({"step_size": 1.0}))
+
+    def test_group_by_settings(self):
+        for run_no, step_size in enumerate([1.0, 2.0, 1.0]):
+            self.index.add_run(self._make_run(run_no, {"step_size": step_size}))
+
+        groups = self.index.group_by_settings()
+        self.assertCountEqual(groups.values(), [[0, 2], [1]])
+        self.assertIn(get_settings_hash({"id": "other", "step_size": 2.0}), groups)
+
+    def test_update(self):
+        self._make_run(1, {"step_size": 1.0})
+        self.index.add_run(self._make_run(2, {"step_size": 2.0}))
+        (self.results_base / "results").mkdir()
+
+        self.assertListEqual(self.index.update(), [1])
+        self.assertListEqual(list(self.index.load().index), [1, 2])
+        self.assertListEqual(sorted(d.name for d in get_result_dirs(self.results_base)), ["1", "2"])
+
+    def test_get_changed(self):
+        result_dir = self._make_run(1, {"step_size": 1.0})
+        self.index.add_run(result_dir)
+        self._make_run(2, {"step_size": 2.0})
+        result_dirs = get_result_dirs(self.results_base)
+
+        self.assertListEqual(list(self.index.get_changed(result_dirs)), [2])
+
+        # E.g. a repeated run that failed after writing its settings
+        with (result_dir / "settings.json").open("w") as f:
+            json.dump({"id": "id1", "step_size": 30.0}, f)
+        self.assertCountEqual(self.index.get_changed(result_dirs), [1, 2])
+
+        self.assertCountEqual(self.index.update(), [1, 2])
+        self.assertDictEqual(self.index.get_changed(result_dirs), {})
+        self.assertEqual(self.index.load().loc[1, "step_size"], 30.0)
+
+        (result_dir / "resources.jsonl").write_text(json.dumps({"max_rss": 1000}) + "\n")
+        self.assertListEqual(list(self.index.get_changed(result_dirs)), [1])
+
+    def test_entries_without_fingerprint(self):
+        result_dir = self._make_run(1, {"step_size": 1.0})
+        self.index.add(*load_run_metadata(result_dir))
+
+        self.assertListEqual(list(self.index.get_changed([result_dir])), [1])
@@ -0,0 +1,90 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from lropy.analysis.io import load_simulation_results, iter_simulation_results
+from lropy.analysis.rotation import get_rotation_matrices, rotate_to_tnw, rotate_to_rsw
+from lropy.analysis.schema import matrix_elements, vector_elements
+from lropy.analysis.transform import align_vectors_batch, cart2track_batch
+from tests.analysis.kernels import use_test_lsk
+
+
+class TestRotation(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng()
+        self.pos = rng.uniform(-5, 5, (100, 3))
+        self.vel = rng.uniform(-5, 5, (100, 3))
+        self.acc = rng.uniform(-5, 5, (100, 3))
+        self.rotation = align_vectors_batch(np.array([1, 0, 0]), self.pos)
+
+        # Matrix columns in a single block, as created from a 2D array
+        self.df = pd.DataFrame(
+            self.rotation.reshape(-1, 9), columns=[f"rot_LRO_Moon_{e}" for e in matrix_elements]
+        )
+        for name, vec in [("pos", self.pos), ("vel", self.vel), ("acc_rp_moon", self.acc)]:
+            for i, elem in enumerate(vector_elements):
+                self.df[f"{name}_{elem}"] = vec[:, i]
+
+    def test_view(self):
+        rotation = get_rotation_matrices(self.df)
+
+        np.testing.assert_array_equal(rotation, self.rotation)
+        self.assertTrue(np.shares_memory(rotation, self.df["rot_LRO_Moon_r11"].to_numpy()))
+        self.assertIs(rotation, get_rotation_matrices(self.df))
+
+    def test_copy(self):
+        # Columns in separate arrays cannot be viewed
+        df = pd.DataFrame({column: self.df[column].to_numpy().copy() for column in self.df})
+
+        np.testing.assert_array_equal(get_rotation_matrices(df), self.rotation)
+
+    def test_view_of_loaded_run(self):
+        with TemporaryDirectory() as tmp_dir, use_test_lsk(Path(tmp_dir) / "spice"):
+            result_dir = Path(tmp_dir) / "1"
+            result_dir.mkdir()
+            (result_dir / "dependent_variable_names.csv").write_text(
+                "Index;Size;ID\n"
+                "1;3;Relative position of LRO w.r.t. Moon\n"
+                "4;9;TNW to inertial frame rotation matrix of LRO w.r.t. Moon\n"
+            )
+            np.savetxt(
+                result_dir / "dependent_variable_history.csv",
+                np.column_stack(
+                    [3.3e8 + 10 * np.arange(100), self.pos, self.rotation.reshape(-1, 9)]
+                ),
+                delimiter=",",
+                fmt="%.17e",
+            )
+
+            # Parsed from the CSV, from the cache, selected without cache and streamed
+            for df in [
+                load_simulation_results(result_dir, do_tf=True),
+                load_simulation_results(result_dir, do_tf=True, compact=True),
+                load_simulation_results(result_dir, use_cache=False, columns=["rot_LRO_Moon"]),
+                next(iter_simulation_results(result_dir, chunk_size=40, use_cache=False)),
+            ]:
+                rotation = get_rotation_matrices(df)
+                np.testing.assert_allclose(rotation, self.rotation[: len(df)], rtol=1e-15)
+                self.assertTrue(np.shares_memory(rotation, df["rot_LRO_Moon_r33"].to_numpy()))
+
+    def test_rotate_to_tnw(self):
+        tnw = rotate_to_tnw(self.df, ["acc_rp_moon", "pos"])
+
+        expected = np.array([r.T @ a for r, a in zip(self.rotation, self.acc)])
+        np.testing.assert_allclose(
+            tnw[["acc_rp_moon_t", "acc_rp_moon_n", "acc_rp_moon_w"]], expected
+        )
+        # TNW x-axis was aligned with the position
+        np.testing.assert_allclose(tnw["pos_t"], np.linalg.norm(self.pos, axis=1))
+
+    def test_rotate_to_rsw(self):
+        rsw = rotate_to_rsw(self.df, "acc_rp_moon")
+
+        expected = np.column_stack(cart2track_batch(self.acc, self.vel, self.pos))
+        np.testing.assert_array_equal(rsw.to_numpy(), expected)
+        self.assertListEqual(
+            list(rsw.columns), ["acc_rp_moon_radial", "acc_rp_moon_along", "acc_rp_moon_cross"]
+        )
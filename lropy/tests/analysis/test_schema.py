@@ -0,0 +1,38 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from lropy.analysis.schema import ColumnSchema, get_column_schema, get_schema_of_columns
+
+
+class TestSchema(TestCase):
+    def test_get_column_schema(self):
+        with TemporaryDirectory() as tmp_dir:
+            names_file = Path(tmp_dir) / "dependent_variable_names.csv"
+            names_file.write_text(
+                "Index;Size;ID\n"
+                "1;3;Relative position of LRO w.r.t. Moon\n"
+                "4;1;Received irradiance at LRO due to Moon\n"
+                "5;6;Kepler elements of LRO w.r.t. Moon\n"
+                "11;9;TNW to inertial frame rotation matrix of LRO w.r.t. Moon\n"
+                "20;1;Number of visible source panels of Moon as seen from LRO\n"
+            )
+            schema = get_column_schema(names_file)
+
+            # Same layout resolves to the same schema
+            self.assertIs(schema, get_column_schema(names_file))
+
+        self.assertEqual(len(schema.columns), 20)
+        self.assertListEqual(schema.columns[:4], ["pos_x", "pos_y", "pos_z", "irr_moon"])
+        self.assertListEqual(schema.group("kepler")[:2], ["kepler_a", "kepler_e"])
+        self.assertEqual(schema.kinds["rot_LRO_Moon"], "matrix")
+        self.assertListEqual(list(schema.groups_of_kind("vector")), ["pos"])
+        self.assertListEqual(schema.count_columns, ["panels_vis_moon"])
+        self.assertIsNone(schema.group("vel"))
+
+    def test_from_columns(self):
+        columns = ["pos_x", "pos_y", "pos_z", "vel_x", "vel_y", "t_et", "kepler_a"]
+        schema = ColumnSchema.from_columns(columns)
+
+        self.assertDictEqual(schema.groups, {"pos": ["pos_x", "pos_y", "pos_z"]})
+        self.assertIs(get_schema_of_columns(columns), get_schema_of_columns(tuple(columns)))
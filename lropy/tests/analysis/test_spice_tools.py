@@ -0,0 +1,232 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+import numpy as np
+import pandas as pd
+import spiceypy as spice
+
+from lropy.analysis import spice_tools
+from lropy.analysis.spice_tools import (
+    as_et,
+    as_utc,
+    as_utc_datetime,
+    as_et_array,
+    get_spice_base,
+    get_kernel_coverage,
+    get_states,
+    get_ephemeris_cache_dir,
+    get_furnished_kernels,
+    get_distance,
+    calculate_eclipses,
+    init_spice_lro,
+)
+from tests.analysis.kernels import load_eclipse_geometry, use_test_lsk
+
+
+class TestSpiceTools(TestCase):
+    def setUp(self):
+        spice.kclear()
+        self.tmp_dir = TemporaryDirectory()
+        self.env_patch = use_test_lsk(Path(self.tmp_dir.name))
+        self.env_patch.start()
+
+    def tearDown(self):
+        spice.kclear()
+        self.env_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def test_spice_base(self):
+        self.assertEqual(get_spice_base(), self.tmp_dir.name)
+
+    def test_lazy_time_kernels(self):
+        self.assertFalse(spice.expool("DELTET/DELTA_AT"))
+
+        et = as_et("2012-07-01 00:00:00 UTC")
+
+        # Only the leap seconds are loaded, no mission kernels
+        self.assertEqual(spice.ktotal("ALL"), 1)
+        self.assertIsNone(spice_tools.get_loaded_mission())
+        self.assertEqual(as_utc(et), "2012-07-01 00:00:00 UTC")
+
+    def test_lazy_mission_kernels(self):
+        spk_file = f"{self.tmp_dir.name}/test.bsp"
+        lsk_file = f"{self.tmp_dir.name}/lro/data/lsk/naif0012.tls"
+        self._write_spk(spk_file, [(0, 1000)])
+        # Loaded by hand, e.g. in a notebook
+        spice.furnsh(spk_file)
+
+        with mock.patch.object(
+            spice_tools, "_get_lro_kernels", return_value=([lsk_file], [spk_file])
+        ), mock.patch.object(spice_tools, "_loaded_mission", None):
+            self.assertAlmostEqual(get_distance("LRO", "Moon", 500.0), 5e5)
+
+            # Kernels loaded by hand are kept, only missing ones are loaded
+            self.assertEqual(spice_tools.get_loaded_mission(), "lro")
+            self.assertListEqual(get_furnished_kernels(), [spk_file, lsk_file])
+
+    def test_as_utc_datetime(self):
+        et = np.concatenate(
+            [
+                np.linspace(-9e8, 9e8, 101),
+                # Around the leap second at the end of June 2012
+                as_et("2012-06-30 23:59:58 UTC") + np.arange(0, 4, 0.25),
+            ]
+        )
+
+        expected = pd.to_datetime([as_utc(t, sec_prec=6) for t in et])
+        actual = as_utc_datetime(et)
+
+        # Differences of one microsecond can occur due to floating-point rounding
+        difference = np.abs((actual - expected).to_numpy()).astype("timedelta64[us]")
+        self.assertTrue(np.all(difference <= np.timedelta64(1, "us")))
+
+        # Inverse up to the truncation to microseconds, except within the leap second, which
+        # datetimes cannot represent
+        in_leap_second = (et >= as_et("2012-06-30 23:59:60 UTC")) & (
+            et < as_et("2012-07-01 00:00:00 UTC")
+        )
+        np.testing.assert_allclose(
+            as_et_array(actual)[~in_leap_second], et[~in_leap_second], atol=1e-6, rtol=0
+        )
+        self.assertEqual(
+            as_et_array(pd.Timestamp("2012-07-01"))[0], as_et("2012-07-01 00:00:00 UTC")
+        )
+
+    def _write_spk(self, file: str, intervals: list[tuple[float, float]]):
+        handle = spice.spkopn(file, "test", 0)
+        for begin, end in intervals:
+            epochs = np.linspace(begin, end, 5)
+            states = np.zeros((5, 6))
+            states[:, 0] = epochs
+            states[:, 3] = 1
+            spice.spkw09(handle, -85, 301, "J2000", begin, end, "test", 1, 5, states, epochs)
+        spice.spkcls(handle)
+
+    def test_kernel_coverage(self):
+        spk_file = f"{self.tmp_dir.name}/test.bsp"
+        index_file = f"{self.tmp_dir.name}/coverage.json"
+        self._write_spk(spk_file, [(0, 100), (200, 300)])
+
+        coverage = get_kernel_coverage([spk_file], index_file)
+        self.assertListEqual(coverage[spk_file], [(0, 100), (200, 300)])
+
+        # Coverage is read from the index
+        with mock.patch.object(spice_tools, "_get_coverage_intervals") as get_intervals:
+            self.assertDictEqual(get_kernel_coverage([spk_file], index_file), coverage)
+            get_intervals.assert_not_called()
+
+        # Changed files are indexed again
+        Path(spk_file).unlink()
+        self._write_spk(spk_file, [(0, 50)])
+        self.assertListEqual(get_kernel_coverage([spk_file], index_file)[spk_file], [(0, 50)])
+
+    def test_init_spice_lro_window(self):
+        lsk_file = f"{self.tmp_dir.name}/lro/data/lsk/naif0012.tls"
+        spk_files = [f"{self.tmp_dir.name}/test{i}.bsp" for i in range(3)]
+        for spk_file, interval in zip(spk_files, [(0, 100), (200, 300), (400, 500)]):
+            self._write_spk(spk_file, [interval])
+
+        with mock.patch.object(
+            spice_tools, "_get_lro_kernels", return_value=([lsk_file], spk_files)
+        ), mock.patch.object(spice_tools, "_loaded_mission", None):
+            # Only the files covering the window
+            init_spice_lro(150.0, 250.0)
+            self.assertListEqual(get_furnished_kernels(), [lsk_file, spk_files[1]])
+            self.assertEqual(spice_tools.get_loaded_mission(), "lro")
+
+            init_spice_lro(start=250.0)
+            self.assertListEqual(get_furnished_kernels(), [lsk_file] + spk_files[1:])
+
+            # Without window, all files
+            init_spice_lro()
+            self.assertListEqual(get_furnished_kernels(), [lsk_file] + spk_files)
+
+    def test_get_states(self):
+        spk_file = f"{self.tmp_dir.name}/test.bsp"
+        self._write_spk(spk_file, [(0, 1000)])
+        spice.furnsh(spk_file)
+        times = np.linspace(0, 1000, 101)
+
+        with mock.patch.dict(os.environ, {"LROPY_CACHE": self.tmp_dir.name}), mock.patch.object(
+            spice_tools, "_loaded_mission", "test"
+        ):
+            states = get_states("LRO", "Moon", times, n_workers=2, chunk_size=30)
+            self.assertEqual(len(list(get_ephemeris_cache_dir().iterdir())), 1)
+
+            np.testing.assert_allclose(states[:, 0], times)
+            np.testing.assert_array_equal(
+                states, spice.spkezr("LRO", times, "ECLIPJ2000", "NONE", "Moon")[0]
+            )
+
+            # Served from the cache
+            with mock.patch.object(spice, "spkezr") as spkezr:
+                np.testing.assert_array_equal(get_states("LRO", "Moon", times), states)
+                spkezr.assert_not_called()
+
+    def test_workers_without_fork(self):
+        spk_file = f"{self.tmp_dir.name}/test.bsp"
+        self._write_spk(spk_file, [(0, 1000)])
+        spice.furnsh(spk_file)
+        times = np.linspace(0, 1000, 101)
+
+        # Spawned workers start without kernels, like with the default start method since
+        # Python 3.14
+        spawn_executor = partial(
+            ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn")
+        )
+        with mock.patch.object(spice_tools, "_loaded_mission", "test"), mock.patch.object(
+            spice_tools, "ProcessPoolExecutor", spawn_executor
+        ):
+            states = get_states("LRO", "Moon", times, use_cache=False, n_workers=2, chunk_size=30)
+
+        np.testing.assert_allclose(states[:, 0], times)
+
+    def test_states_cache_key(self):
+        spk_file = f"{self.tmp_dir.name}/test.bsp"
+        self._write_spk(spk_file, [(0, 1000)])
+        spice.furnsh(spk_file)
+        times = np.linspace(0, 1000, 11)
+        cache_dir = Path(self.tmp_dir.name) / "ephemeris"
+
+        with mock.patch.dict(os.environ, {"LROPY_CACHE": self.tmp_dir.name}), mock.patch.object(
+            spice_tools, "_loaded_mission", "test"
+        ):
+            get_states("LRO", "Moon", times)
+            get_states("LRO", "Moon", times)
+            self.assertEqual(len(list(cache_dir.iterdir())), 1)
+
+            # Kernels were updated
+            stat = os.stat(spk_file)
+            os.utime(spk_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            get_states("LRO", "Moon", times)
+            self.assertEqual(len(list(cache_dir.iterdir())), 2)
+
+            # Kernels were added
+            other_spk_file = f"{self.tmp_dir.name}/other.bsp"
+            self._write_spk(other_spk_file, [(2000, 3000)])
+            spice.furnsh(other_spk_file)
+            get_states("LRO", "Moon", times)
+            self.assertEqual(len(list(cache_dir.iterdir())), 3)
+
+    def test_calculate_eclipses(self):
+        duration = load_eclipse_geometry(Path(self.tmp_dir.name))
+
+        with mock.patch.object(spice_tools, "_loaded_mission", "test"):
+            expected = calculate_eclipses("Sun", "Earth", "LRO", 0.0, duration)
+            self.assertListEqual([o[2] for o in expected], ["PARTIAL", "FULL", "PARTIAL"])
+
+            # Chunk borders split every interval
+            for n_chunks in [7, 100]:
+                occultations = calculate_eclipses(
+                    "Sun", "Earth", "LRO", 0.0, duration, n_workers=2, n_chunks=n_chunks
+                )
+                self.assertListEqual([o[2] for o in occultations], [o[2] for o in expected])
+                # Up to the convergence tolerance of the search
+                np.testing.assert_allclose(
+                    [o[:2] for o in occultations], [o[:2] for o in expected], atol=1e-5, rtol=0
+                )
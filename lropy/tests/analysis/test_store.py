@@ -0,0 +1,62 @@
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from lropy.analysis.store import ResultsStore
+
+
+class TestStore(TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.store = ResultsStore(self.tmp_dir.name)
+
+        self.metadata = pd.DataFrame(
+            {
+                1: {"target_type": "Cannonball", "walltime_total": [1.5, 2.0]},
+                2: {"target_type": "Paneled", "walltime_total": [3.5]},
+            }
+        ).T
+        self.runs = {
+            run_no: pd.DataFrame(
+                {"pos_x": np.full(5, float(run_no)), "t_et": np.arange(5.0)},
+                index=pd.to_datetime(np.arange(5), unit="s", utc=True).rename("t"),
+            )
+            for run_no in [1, 2]
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_roundtrip(self):
+        self.store.append(self.metadata, self.runs)
+
+        pd.testing.assert_frame_equal(self.metadata, self.store.load_metadata())
+        runs = self.store.load_runs()
+        self.assertListEqual(list(runs.keys()), [1, 2])
+        for run_no, run in runs.items():
+            pd.testing.assert_frame_equal(self.runs[run_no], run)
+
+    def test_selective_loading(self):
+        self.store.append(self.metadata, self.runs)
+
+        self.assertListEqual(list(self.store.load_runs([2]).keys()), [2])
+        runs = self.store.load_runs(where=lambda m: m["target_type"] == "Cannonball")
+        self.assertListEqual(list(runs.keys()), [1])
+        self.assertListEqual(list(self.store.load_run(1, ["t_et"]).columns), ["t_et"])
+
+    def test_append(self):
+        self.store.append(self.metadata.loc[[1]], {1: self.runs[1]})
+        self.store.append(self.metadata.loc[[2]], {2: self.runs[2]})
+
+        pd.testing.assert_frame_equal(self.metadata, self.store.load_metadata())
+        self.assertListEqual(list(self.store.load_runs().keys()), [1, 2])
+
+    def test_replace(self):
+        self.store.append(self.metadata, self.runs)
+        metadata = self.metadata.loc[[1]].copy()
+        metadata["target_type"] = "Paneled"
+        self.store.append(metadata)
+
+        self.assertListEqual(self.store.select(lambda m: m["target_type"] == "Paneled"), [1, 2])
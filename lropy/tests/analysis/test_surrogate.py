@@ -0,0 +1,76 @@
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+
+from lropy.analysis.surrogate import ChebyshevEphemeris, get_beta_angle, get_distance
+
+period = 7000.0
+radius = 1800.0
+inclination = 0.3
+
+
+def circular_orbit(t):
+    w = 2 * np.pi / period
+    return np.column_stack(
+        [
+            radius * np.cos(w * t),
+            radius * np.sin(w * t) * np.cos(inclination),
+            radius * np.sin(w * t) * np.sin(inclination),
+            -radius * w * np.sin(w * t),
+            radius * w * np.cos(w * t) * np.cos(inclination),
+            radius * w * np.cos(w * t) * np.sin(inclination),
+        ]
+    )
+
+
+def fixed_sun(t):
+    return np.tile([0, 0, 1.5e8, 0, 0, 0], (len(t), 1))
+
+
+class TestSurrogate(TestCase):
+    def setUp(self):
+        self.ephemeris = ChebyshevEphemeris.fit(
+            circular_orbit, 0, 1e5, segment_length=5e4, position_tolerance=1e-4
+        )
+
+    def test_fit(self):
+        # Initial segments are too long for the tolerance and have to be split
+        self.assertGreater(len(self.ephemeris.boundaries), 3)
+        self.assertLessEqual(self.ephemeris.position_error, 1e-4)
+
+        t = np.random.default_rng().uniform(0, 1e5, 10000)
+        error = self.ephemeris.state(t) - circular_orbit(t)
+        self.assertLess(np.linalg.norm(error[:, :3], axis=1).max(), 1e-4)
+        self.assertLess(np.linalg.norm(error[:, 3:], axis=1).max(), 1e-6)
+
+        with self.assertRaises(ValueError):
+            self.ephemeris.position([1e5 + 1])
+
+    def test_max_splits(self):
+        with self.assertWarnsRegex(UserWarning, "exceed the tolerances after 1 splits"):
+            ephemeris = ChebyshevEphemeris.fit(
+                circular_orbit, 0, 1e5, segment_length=5e4, position_tolerance=1e-4, max_splits=1
+            )
+
+        # The achieved error is reported
+        self.assertGreater(ephemeris.position_error, 1e-4)
+        self.assertEqual(len(ephemeris.boundaries), 5)
+
+    def test_geometry(self):
+        sun = ChebyshevEphemeris.fit(fixed_sun, 0, 1e5, segment_length=1e5)
+        t = np.linspace(0, 1e5, 100)
+
+        np.testing.assert_allclose(get_distance(self.ephemeris, t), radius * 1e3)
+        np.testing.assert_allclose(
+            get_beta_angle(self.ephemeris, sun, t), np.degrees(inclination) - 90
+        )
+
+    def test_save_load(self):
+        with TemporaryDirectory() as tmp_dir:
+            self.ephemeris.save(f"{tmp_dir}/ephemeris.npz")
+            ephemeris = ChebyshevEphemeris.load(f"{tmp_dir}/ephemeris.npz")
+
+        t = np.linspace(0, 1e5, 100)
+        np.testing.assert_array_equal(ephemeris.state(t), self.ephemeris.state(t))
+        self.assertEqual(ephemeris.position_error, self.ephemeris.position_error)
@@ -3,7 +3,15 @@ from unittest import TestCase
 
 import numpy as np
 
-from lropy.analysis.transform import cart2track
+from lropy.analysis.transform import (
+    cart2track,
+    cart2track_batch,
+    cart2spher,
+    cart2spher_batch,
+    spher2cart_batch,
+    align_vectors,
+    align_vectors_batch,
+)
 
 
 class TestTransform(TestCase):
@@ -42,3 +50,48 @@ class TestTransform(TestCase):
                 np.linalg.norm(acc),
                 np.linalg.norm(np.array([radial, along, cross])),
             )
+
+    def test_cart2track_batch(self):
+        rng = np.random.default_rng()
+        acc = rng.uniform(-5, 5, (100, 3))
+        vel = rng.uniform(-5, 5, (100, 3))
+        pos = rng.uniform(-5, 5, (100, 3))
+
+        radial, along, cross = cart2track_batch(acc, vel, pos)
+
+        for i in range(len(acc)):
+            expected = cart2track(acc[i], vel[i], pos[i])
+            self.assertAlmostEqual(radial[i], expected[0])
+            self.assertAlmostEqual(along[i], expected[1])
+            self.assertAlmostEqual(cross[i], expected[2])
+
+    def test_cart2spher_batch(self):
+        rng = np.random.default_rng()
+        vec = rng.uniform(-5, 5, (100, 3))
+
+        radius, polar, azimuth = cart2spher_batch(vec)
+
+        for i in range(len(vec)):
+            expected = cart2spher(*vec[i])
+            self.assertAlmostEqual(radius[i], expected[0])
+            self.assertAlmostEqual(polar[i], expected[1])
+            self.assertAlmostEqual(azimuth[i], expected[2])
+
+        np.testing.assert_allclose(spher2cart_batch(radius, polar, azimuth), vec)
+
+    def test_align_vectors_batch(self):
+        rng = np.random.default_rng()
+        from_vec = rng.uniform(-5, 5, (100, 3))
+        to_vec = rng.uniform(-5, 5, (100, 3))
+        to_vec[0] = 2 * from_vec[0]
+
+        rotation = align_vectors_batch(from_vec, to_vec)
+
+        for i in range(len(from_vec)):
+            np.testing.assert_allclose(
+                rotation[i], align_vectors(from_vec[i], to_vec[i]), atol=1e-12
+            )
+
+        rotation = align_vectors_batch(np.array([0, 0, 1]), to_vec)
+        aligned = np.einsum("nij,j->ni", rotation, np.array([0, 0, 1]))
+        np.testing.assert_allclose(aligned, to_vec / np.linalg.norm(to_vec, axis=1)[:, None])
@@ -0,0 +1,64 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+from lropy.run import admission
+from lropy.run.admission import AdmissionController
+
+
+class TestAdmissionController(TestCase):
+    def setUp(self):
+        self.patches = [
+            mock.patch.object(admission.os, "cpu_count", return_value=10),
+            mock.patch.object(admission, "get_load_averages", return_value=[2.0, 2.0, 2.0]),
+            mock.patch.object(admission, "get_available_memory", return_value=10 * 2**30),
+            mock.patch("builtins.print"),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def test_load(self):
+        controller = AdmissionController(max_load=0.8, min_free_memory=0, default_memory=0)
+
+        # Other users cause a load of 4, leaving 4 of 8 CPUs to the sweep
+        for n_running in range(6):
+            with mock.patch.object(
+                admission, "get_load_averages", return_value=[n_running + 4.0] * 3
+            ):
+                self.assertEqual(controller.admit(n_running), n_running < 4)
+
+        with mock.patch.object(admission, "get_load_averages", return_value=[9.5, 9.5, 9.5]):
+            self.assertFalse(controller.admit(1))
+            # The first run is always admitted
+            self.assertTrue(controller.admit(0))
+
+    def test_memory(self):
+        controller = AdmissionController(min_free_memory=2 * 2**30, ramp_time=60.0)
+
+        self.assertTrue(controller.admit(1, 5 * 2**30))
+        # The first run did not reach its peak memory yet
+        self.assertFalse(controller.admit(2, 5 * 2**30))
+        self.assertTrue(controller.admit(2, 2**30))
+
+        controller.ramp_time = 0.0
+        self.assertTrue(controller.admit(3, 5 * 2**30))
+        self.assertFalse(controller.admit(4, 9 * 2**30))
+
+    def test_pause(self):
+        with TemporaryDirectory() as tmp_dir:
+            pause_file = Path(tmp_dir) / "pause"
+            controller = AdmissionController(pause_file=pause_file)
+
+            controller.pause()
+            self.assertFalse(controller.admit(0))
+            controller.resume()
+            self.assertTrue(controller.admit(0))
+
+            pause_file.touch()
+            self.assertFalse(controller.admit(0))
+            pause_file.unlink()
+            self.assertTrue(controller.admit(0))
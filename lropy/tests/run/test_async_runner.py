@@ -0,0 +1,93 @@
+import stat
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+import spiceypy as spice
+
+from lropy.analysis.metadata_index import load_resource_usage
+from lropy.analysis.spice_tools import as_et
+from lropy.run import configurator
+from lropy.run.async_runner import AsyncRunner, parse_epoch
+from lropy.run.ledger import JobLedger, JobState
+from tests.analysis.kernels import use_test_lsk
+from tests.run.test_runner import SmallConfigurator
+
+# Prints the propagation progress like Tudat, fails for runs without Moon radiation
+simulation = """#!{python}
+import json, sys
+with open(sys.argv[1]) as f:
+    settings = json.load(f)
+start = {start!r}
+for i in range(1, 11):
+    epoch = start + i * settings["simulation_duration"] / 10
+    print(f"Current time and state in integration: {{epoch}} 1.0 2.0 3.0", flush=True)
+with open(settings["save_dir"] + "/cpu_time.csv", "w") as f:
+    f.write("0.0,0.0\\n1.0,0.5\\n")
+sys.exit(0 if settings["use_moon_radiation"] else 3)
+"""
+
+
+class TestAsyncRunner(TestCase):
+    def setUp(self):
+        spice.kclear()
+        self.tmp_dir = TemporaryDirectory()
+        self.patches = [
+            use_test_lsk(Path(self.tmp_dir.name)),
+            mock.patch.object(configurator, "results_base", Path(self.tmp_dir.name)),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        spice.kclear()
+        self.tmp_dir.cleanup()
+
+    def test_parse_epoch(self):
+        line = b"Current time and state in integration: 5.0 330000000.5 1.0 2.0 3.0"
+        self.assertEqual(parse_epoch(line, 330000000.0, 330001000.0), 330000000.5)
+        self.assertEqual(parse_epoch(line, 0.0, 1000.0), 5.0)
+        self.assertIsNone(parse_epoch(line, 1e9, 1e9 + 1000.0))
+        self.assertIsNone(parse_epoch(b"Simulation start: 330000000.5", 3.3e8, 3.31e8))
+
+    def test_report_before_run_all(self):
+        with mock.patch("builtins.print") as print_:
+            AsyncRunner(n_threads=3).report()
+        self.assertIn("0 runs in flight", print_.call_args.args[0])
+
+    def test_run_all(self):
+        runs = SmallConfigurator().get_runs()
+        executable = Path(self.tmp_dir.name) / "simulation.py"
+        executable.write_text(
+            simulation.format(python=sys.executable, start=as_et(runs[0].simulation_start))
+        )
+        executable.chmod(executable.stat().st_mode | stat.S_IEXEC)
+
+        runner = AsyncRunner(n_threads=3, report_interval=0.01)
+        runner.executable = executable
+        with mock.patch("builtins.print") as print_:
+            runner.run_all(runs)
+
+        self.assertEqual(len(runner.progress), len(runs))
+        for progress in runner.progress:
+            self.assertEqual(progress.fraction, 1.0)
+            self.assertGreater(progress.throughput, 0)
+        printed = [call.args[0] for call in print_.call_args_list]
+        for run in runs:
+            self.assertIn(f"Run {run.id}: 100% of simulated time", "\n".join(printed))
+        self.assertIn("100% of the sweep done, ETA 0:00:00", printed[-1])
+
+        entries = JobLedger(runs[0].base_dir).load()
+        for run in runs:
+            return_code = 0 if run.use_moon_radiation else 3
+            self.assertEqual(
+                entries[run.run_number]["state"],
+                JobState.Done if return_code == 0 else JobState.Failed,
+            )
+            self.assertListEqual(
+                load_resource_usage(run.save_dir)["resource_return_code"], [return_code]
+            )
+            self.assertEqual((run.save_dir / "out.txt").read_text().count("Current time"), 10)
@@ -0,0 +1,255 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+import pandas as pd
+
+from lropy.analysis.metadata_index import load_resource_usage
+from lropy.run import configurator, runner
+from lropy.run.configurator import Configurator
+from lropy.run.ledger import JobLedger, JobState
+from lropy.run.runner import Runner
+from lropy.run.scheduler import CostModel, estimate_cost, order_by_cost
+from lropy.run.simulation_run import (
+    TargetType,
+    ThermalType,
+    AlbedoDistribution,
+    PanelingType,
+)
+
+
+class SmallConfigurator(Configurator):
+    def __init__(self):
+        super().__init__(
+            "test",
+            {
+                "simulation_start": ["2010 JUN 28 15:00:00"],
+                "simulation_duration_rev": [1],
+                "target_type": [TargetType.Cannonball, TargetType.Paneled],
+                "with_instantaneous_reradiation": [True],
+                "use_occultation": [True],
+                "use_solar_radiation": [True],
+                "use_moon_radiation": [False, True],
+                "paneling_moon": [PanelingType.Dynamic],
+                "albedo_distribution_moon": [AlbedoDistribution.DLAM1],
+                "number_of_panels_moon": [5000],
+                "number_of_panels_per_ring_moon": [[6, 12]],
+                "thermal_type_moon": [ThermalType.AngleBased],
+                "step_size": [5],
+            },
+            is_benchmark=False,
+        )
+
+
+class TestLedger(TestCase):
+    def test_mark(self):
+        with TemporaryDirectory() as tmp_dir:
+            ledger = JobLedger(tmp_dir)
+            self.assertDictEqual(ledger.load(), {})
+
+            ledger.mark_all([1, 2], JobState.Pending, ["a", "b"])
+            ledger.mark(1, JobState.Done, "a", 0)
+            ledger.mark(2, JobState.Failed, "b", 1)
+            # Interrupted write
+            with ledger.path.open("a") as f:
+                f.write('{"run_no": 2, "sta')
+
+            entries = ledger.load()
+            self.assertEqual(entries[1]["state"], JobState.Done)
+            self.assertEqual(entries[2]["state"], JobState.Failed)
+            self.assertEqual(entries[2]["return_code"], 1)
+            self.assertDictEqual(ledger.get_run_numbers(), {"a": 1, "b": 2})
+            self.assertSetEqual(ledger.get_done(), {(1, "a")})
+
+
+class TestRunner(TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.results_patch = mock.patch.object(
+            configurator, "results_base", Path(self.tmp_dir.name)
+        )
+        self.results_patch.start()
+
+    def tearDown(self):
+        self.results_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def _run_all(
+        self,
+        runs,
+        return_codes: dict[str, int],
+        n_threads=2,
+        admission=None,
+        index_error=None,
+        **kwargs,
+    ) -> list[str]:
+        """Runs with a fake executable, returns the settings hashes of the executed runs"""
+        executed = []
+
+        def popen(args, **kwargs):
+            settings_hash = next(
+                run.settings_hash() for run in runs if str(run.save_dir) in args[1]
+            )
+            executed.append(settings_hash)
+            return mock.Mock(pid=len(executed) - 1)
+
+        def wait4(pid, options):
+            # Exit status as returned by waitpid
+            return (
+                pid,
+                return_codes.get(executed[pid], 0) << 8,
+                resource.getrusage(resource.RUSAGE_SELF),
+            )
+
+        with mock.patch.object(runner.subprocess, "Popen", side_effect=popen), mock.patch.object(
+            runner.os, "wait4", side_effect=wait4
+        ), mock.patch.object(runner.MetadataIndex, "add_run", side_effect=index_error), mock.patch(
+            "builtins.print"
+        ):
+            runner_ = Runner(n_threads, admission)
+            runner_.poll_interval = 0.01
+            runner_.run_all(runs, **kwargs)
+        return executed
+
+    def test_resume(self):
+        runs = SmallConfigurator().get_runs()
+        self.assertEqual(len(runs), 5)
+        failed = runs[0].settings_hash()
+
+        executed = self._run_all(runs, {failed: 1})
+        self.assertEqual(len(executed), 5)
+
+        ledger = JobLedger(runs[0].base_dir)
+        self.assertEqual(ledger.load()[runs[0].run_number]["state"], JobState.Failed)
+        resources = load_resource_usage(runs[0].save_dir)
+        self.assertListEqual(resources["resource_return_code"], [1])
+        self.assertGreater(resources["resource_max_rss"][0], 0)
+        self.assertEqual(len(ledger.get_done()), 4)
+
+        resumed = SmallConfigurator().get_runs(resume=True)
+        self.assertEqual(resumed[0].base_dir, runs[0].base_dir)
+        # Runs keep their number, independent of the order of the settings
+        self.assertDictEqual(
+            {run.settings_hash(): run.run_number for run in resumed},
+            {run.settings_hash(): run.run_number for run in runs},
+        )
+
+        executed = self._run_all(resumed, {})
+        self.assertListEqual(executed, [failed])
+        self.assertEqual(len(ledger.get_done()), 5)
+
+        # A new sweep starts in a new directory
+        self.assertNotEqual(SmallConfigurator().get_runs()[0].base_dir, runs[0].base_dir)
+
+    def test_indexing_error(self):
+        runs = SmallConfigurator().get_runs()
+
+        with self.assertWarns(UserWarning):
+            self._run_all(runs, {}, index_error=ValueError("Invalid cpu_time.csv line: b''"))
+
+        # Finished runs are not resumed, they are indexed later
+        self.assertEqual(len(JobLedger(runs[0].base_dir).get_done()), 5)
+
+    def test_resume_with_other_hash_seed(self):
+        # Generates the runs of the latest sweep, or of a new one, and marks them as done
+        script = (
+            "import json, sys\n"
+            "from pathlib import Path\n"
+            "from lropy.run import configurator\n"
+            "from lropy.run.ledger import JobLedger, JobState\n"
+            "from tests.run.test_runner import SmallConfigurator\n"
+            "configurator.results_base = Path(sys.argv[1])\n"
+            "runs = SmallConfigurator().get_runs(resume=True)\n"
+            "JobLedger(runs[0].base_dir).mark_all(\n"
+            "    [run.run_number for run in runs],\n"
+            "    JobState.Done,\n"
+            "    [run.settings_hash() for run in runs],\n"
+            ")\n"
+            "print(json.dumps({run.settings_hash(): run.run_number for run in runs}))\n"
+        )
+
+        run_numbers = []
+        for hash_seed in ["1", "2", "3"]:
+            output = subprocess.run(
+                [sys.executable, "-c", script, self.tmp_dir.name],
+                env={**os.environ, "PYTHONHASHSEED": hash_seed},
+                cwd=Path(__file__).parents[2],
+                capture_output=True,
+                check=True,
+                text=True,
+            ).stdout
+            run_numbers.append(json.loads(output.splitlines()[-1]))
+
+        # The resumed sweeps have the same runs, including the baseline
+        self.assertEqual(len(run_numbers[0]), 5)
+        self.assertDictEqual(run_numbers[1], run_numbers[0])
+        self.assertDictEqual(run_numbers[2], run_numbers[0])
+
+    def test_admission(self):
+        runs = SmallConfigurator().get_runs()
+        controller = mock.Mock()
+        # Paused at first, then one run at a time
+        controller.admit.side_effect = lambda n_running, memory: (
+            controller.admit.call_count > 3 and n_running == 0
+        )
+
+        executed = self._run_all(runs, {}, n_threads=4, admission=controller)
+
+        self.assertCountEqual(executed, [run.settings_hash() for run in runs])
+        # Rejected while paused and while a run is in flight
+        self.assertGreater(controller.admit.call_count, len(runs))
+
+
+class TestScheduler(TestCase):
+    def test_estimate_cost(self):
+        runs = {
+            (run.target_type, run.use_moon_radiation): run
+            for run in SmallConfigurator().get_runs()
+            if run.use_solar_radiation
+        }
+        costs = {key: estimate_cost(json.loads(run.as_json())) for key, run in runs.items()}
+
+        self.assertLess(costs[(TargetType.Cannonball, False)], costs[(TargetType.Paneled, False)])
+        self.assertLess(costs[(TargetType.Paneled, False)], costs[(TargetType.Paneled, True)])
+        self.assertLess(costs[(TargetType.Cannonball, True)], costs[(TargetType.Paneled, True)])
+
+    def test_order_by_cost(self):
+        runs = SmallConfigurator().get_runs()
+        cost_model = CostModel()
+        costs = [cost_model.predict(run) for run in order_by_cost(runs, cost_model)]
+        self.assertListEqual(costs, sorted(costs, reverse=True))
+
+        # Measured walltimes replace the estimate
+        cheapest = min(runs, key=cost_model.predict)
+        metadata = pd.DataFrame([{**json.loads(cheapest.as_json()), "walltime_total": [1.0, 3.0]}])
+        metadata["settings_hash"] = [cheapest.settings_hash()]
+        cost_model = CostModel(metadata)
+        self.assertEqual(cost_model.predict(cheapest), 2.0)
+        self.assertAlmostEqual(
+            cost_model.scale, 2.0 / estimate_cost(json.loads(cheapest.as_json()))
+        )
+
+    def test_cost_model_from_results(self):
+        with TemporaryDirectory() as tmp_dir:
+            results_dir = Path(tmp_dir) / "sweep"
+            runs = SmallConfigurator().get_runs(results_dir)
+            # Sweep from before the metadata index, with a failed run
+            for run, walltimes in [(runs[0], "4.0\n6.0\n"), (runs[1], None)]:
+                run.save_dir.mkdir(parents=True)
+                (run.save_dir / "settings.json").write_text(run.as_json())
+                if walltimes is not None:
+                    (run.save_dir / "cpu_time.csv").write_text("0.0,0.0\n10.0,1.0\n")
+                    (run.save_dir / "walltime.txt").write_text(walltimes)
+            (Path(tmp_dir) / "results.pkl").touch()
+
+            with mock.patch("builtins.print"):
+                cost_model = CostModel.from_results(Path(tmp_dir).glob("*"))
+
+            self.assertEqual(cost_model.predict(runs[0]), 5.0)
+            self.assertNotIn(runs[1].settings_hash(), cost_model.walltimes)
+            self.assertTrue((results_dir / "index.jsonl").exists())